@@ -0,0 +1,220 @@
+"""
+ABI tables for the Goldilocks DeFi bot.
+Extracts the functions and events the bot actually uses from the full ABI
+files and caches them, with their selectors, topics and type lists, in a
+compact pickle next to the ABIs. Workers load the cache instead of parsing
+~2,500 lines of JSON and get the type lists eth_abi needs for each call.
+
+Usage (optional, the cache is also built on first import):
+    python abi_tables.py
+"""
+import hashlib
+import json
+import os
+import pickle
+from collections import namedtuple
+
+from eth_abi.abi import default_codec
+from eth_utils import function_abi_to_4byte_selector, event_abi_to_log_topic
+
+import config
+
+ARTIFACT_VERSION = 2
+ARTIFACT_PATH = os.path.join(config.ABI_DIR, "bot_abis.pickle")
+
+ABI_PATHS = {
+    "honey": config.HONEY_ABI_PATH,
+    "locks": config.LOCKS_ABI_PATH,
+    "porridge": config.PORRIDGE_ABI_PATH,
+}
+
+# Everything the bot, its status CLI and the stub-backed tests touch.
+# Admin entry points (upgradeToAndCall, initializeProtocol, changePrgEmissions, ...) stay out.
+TOKEN_FUNCTIONS = ["name", "symbol", "decimals", "totalSupply", "balanceOf", "allowance", "approve"]
+BOT_INTERFACE = {
+    "honey": {
+        "functions": TOKEN_FUNCTIONS,
+        "events": ["Transfer", "Approval"],
+    },
+    "locks": {
+        "functions": TOKEN_FUNCTIONS + ["buy", "sell", "floorPrice", "marketPrice", "fsl", "psl", "targetRatio"],
+        "events": ["Transfer", "Approval", "Buy", "Sale"],
+    },
+    "porridge": {
+        "functions": TOKEN_FUNCTIONS + ["borrow", "repay", "claim", "stir", "stake", "unstake",
+                                        "userBorrowLimit", "userBorrowedHoney", "userClaimablePrg",
+                                        "userStakedLocks", "userLockedLocks", "userVestingCheck",
+                                        "annualPrgEmissions", "claimablePrgPerLocksStored"],
+        "events": ["Transfer", "Approval", "Borrow", "Repay", "Claim", "Stir", "Stake", "Unstake"],
+    },
+}
+
+Function = namedtuple("Function", "name selector inputs outputs")
+Event = namedtuple("Event", "name topic inputs")
+
+
+def _types(params):
+    """Canonical type strings of ABI parameters, with tuples expanded."""
+    types = []
+    for param in params:
+        if param["type"].startswith("tuple"):
+            types.append(f"({','.join(_types(param['components']))}){param['type'][5:]}")
+        else:
+            types.append(param["type"])
+    return types
+
+
+def trim_abi(abi, interface):
+    """
+    Keep only the functions and events listed in an interface.
+
+    Args:
+        abi: Full contract ABI
+        interface: Dict with "functions" and "events" name lists
+
+    Returns:
+        Trimmed ABI list
+    """
+    wanted = {("function", name) for name in interface["functions"]}
+    wanted |= {("event", name) for name in interface["events"]}
+    trimmed = [entry for entry in abi if (entry["type"], entry.get("name")) in wanted]
+    missing = wanted - {(entry["type"], entry.get("name")) for entry in trimmed}
+    if missing:
+        raise ValueError(f"ABI is missing {sorted(name for _, name in missing)}")
+    return trimmed
+
+
+def build_tables():
+    """
+    Build the cache contents from the full ABI files.
+
+    Returns:
+        Dict with the artifact version, the source file stamps and per
+        contract the trimmed ABI, function selectors/types and event topics
+    """
+    tables = {"version": ARTIFACT_VERSION, "sources": _source_stamps(), "contracts": {}}
+    for contract, path in ABI_PATHS.items():
+        with open(path) as f:
+            abi = trim_abi(json.load(f), BOT_INTERFACE[contract])
+        tables["contracts"][contract] = {
+            "abi": abi,
+            "functions": {
+                entry["name"]: (function_abi_to_4byte_selector(entry), _types(entry["inputs"]), _types(entry["outputs"]))
+                for entry in abi if entry["type"] == "function"
+            },
+            "events": {
+                entry["name"]: (event_abi_to_log_topic(entry),
+                                [(p["name"], p["type"], p["indexed"]) for p in entry["inputs"]])
+                for entry in abi if entry["type"] == "event"
+            },
+        }
+    return tables
+
+
+def _source_stamps():
+    """Size and mtime of each ABI file plus a hash of BOT_INTERFACE; the cache is rebuilt when any of them change."""
+    stamps = {contract: (os.path.getsize(path), os.path.getmtime(path)) for contract, path in ABI_PATHS.items()}
+    stamps["interface"] = hashlib.sha256(json.dumps(BOT_INTERFACE, sort_keys=True).encode()).hexdigest()
+    return stamps
+
+
+def write_artifact(tables, path=ARTIFACT_PATH):
+    """Write the tables atomically so concurrent workers never read half a file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_tables(path=ARTIFACT_PATH):
+    """
+    Load the cached tables, rebuilding them when missing, older than the ABI files or built for another BOT_INTERFACE.
+
+    Args:
+        path: Artifact path
+
+    Returns:
+        Tables dict as returned by build_tables()
+    """
+    try:
+        with open(path, "rb") as f:
+            tables = pickle.load(f)
+        if tables.get("version") == ARTIFACT_VERSION and tables.get("sources") == _source_stamps():
+            return tables
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+
+    tables = build_tables()
+    try:
+        write_artifact(tables, path)
+    except OSError:
+        # Read-only install: keep working from the freshly built tables
+        pass
+    return tables
+
+
+class ContractTables:
+    """
+    Selectors, topics and type lists of one contract's bot interface.
+    """
+
+    def __init__(self, tables):
+        self.abi = tables["abi"]
+        self.functions = {
+            name: Function(name, selector, inputs, outputs)
+            for name, (selector, inputs, outputs) in tables["functions"].items()
+        }
+        self.events = {name: Event(name, topic, inputs) for name, (topic, inputs) in tables["events"].items()}
+
+    def encode_call(self, name, *args):
+        """
+        Encode calldata for a function call.
+
+        Args:
+            name: Function name
+            *args: Function arguments
+
+        Returns:
+            Calldata bytes (selector + encoded arguments)
+        """
+        fn = self.functions[name]
+        return fn.selector + default_codec.encode(fn.inputs, args)
+
+    def decode_output(self, name, data):
+        """
+        Decode the return data of a function call.
+
+        Args:
+            name: Function name
+            data: Raw return data
+
+        Returns:
+            Single value for one output, otherwise a tuple
+        """
+        values = default_codec.decode(self.functions[name].outputs, data)
+        return values[0] if len(values) == 1 else values
+
+
+_contract_tables = None
+
+
+def get_tables():
+    """
+    Get the ContractTables of all three contracts, loading the cache once per process.
+
+    Returns:
+        Dict of contract name ("honey", "locks", "porridge") to ContractTables
+    """
+    global _contract_tables
+    if _contract_tables is None:
+        tables = load_tables()
+        _contract_tables = {name: ContractTables(t) for name, t in tables["contracts"].items()}
+    return _contract_tables
+
+
+if __name__ == "__main__":
+    built = build_tables()
+    write_artifact(built)
+    for name, contract in built["contracts"].items():
+        print(f"{name}: {len(contract['functions'])} functions, {len(contract['events'])} events")
+    print(f"Wrote {ARTIFACT_PATH} ({os.path.getsize(ARTIFACT_PATH)} bytes)")
@@ -0,0 +1,279 @@
+"""
+Analytics module for the Goldilocks DeFi bot.
+Loads the per-wallet ledgers (ledger.py) and price histories (timeseries.py)
+into NumPy arrays and computes what the bot actually achieved per wallet:
+realized PRG yield on the staked LOCKS, HONEY debt growth, gas spent and the
+price paid when stirring compared with the market price. Wallets running
+with different settings are compared against each other.
+
+Needs numpy (pip install numpy); the bot itself does not.
+
+Usage:
+    python analytics.py ../ledger --timeseries-dir ../timeseries --days 7
+    python analytics.py ../ledger --days 1 --discord --interval 86400
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+import ledger
+import timeseries
+
+YEAR = 365 * 86400
+LEDGER_DTYPE = np.dtype(ledger.DTYPE)
+PRICE_DTYPE = np.dtype(timeseries.DTYPE)
+
+# Discord rejects longer messages
+DIGEST_LIMIT = 2000
+
+
+def load_ledger(path):
+    """
+    Load a ledger file as a structured array (fields of ledger.DTYPE).
+
+    Args:
+        path: Ledger file
+
+    Returns:
+        numpy structured array in append order
+    """
+    ledger.Ledger(path)  # checks the header
+    count = (os.path.getsize(path) - ledger.HEADER_SIZE) // LEDGER_DTYPE.itemsize
+    return np.fromfile(path, dtype=LEDGER_DTYPE, count=count, offset=ledger.HEADER_SIZE)
+
+
+def load_prices(path):
+    """
+    Load a time series ring file as a structured array sorted by block.
+
+    Args:
+        path: Time series file
+
+    Returns:
+        numpy structured array (fields of timeseries.DTYPE)
+    """
+    series = timeseries.TimeSeries(path, readonly=True)
+    try:
+        count = min(series.count, series.capacity)
+        view = np.frombuffer(series.buffer, dtype=PRICE_DTYPE, count=count, offset=timeseries.HEADER_SIZE)
+        prices = view.copy()
+        del view  # the buffer cannot be released while a view exports it
+    finally:
+        series.close()
+    return prices[np.argsort(prices["block"], kind="stable")]
+
+
+def market_at(prices, blocks):
+    """
+    Market price of the newest sample at or before each block.
+
+    Args:
+        prices: Array from load_prices()
+        blocks: Block numbers
+
+    Returns:
+        float array of market prices, NaN where no sample precedes the block
+    """
+    if prices is None or not len(prices):
+        return np.full(len(blocks), np.nan)
+    index = np.searchsorted(prices["block"], blocks, side="right") - 1
+    market = prices["market_price"][np.maximum(index, 0)]
+    return np.where(index >= 0, market, np.nan)
+
+
+def summarize(records, prices=None, since=None, now=None):
+    """
+    Compute a wallet's results from its ledger.
+
+    Args:
+        records: Array from load_ledger()
+        prices: Array from load_prices(), for the stir comparison
+        since: Unix time the window starts (default: first record)
+        now: Unix time the window ends (default: now)
+
+    Returns:
+        Dict of token amounts (floats) and rates; NaN where the history does not allow a value
+    """
+    now = time.time() if now is None else now
+    kinds = len(ledger.KINDS)
+    stamps = records["timestamp"].astype(np.float64)
+
+    # The stake held when the window starts counts from its start, so the stake snapshot before it is kept
+    staked = records[records["kind"] == ledger.KIND["staked"]]
+    staked_times = staked["timestamp"].astype(np.float64)
+    if since is not None:
+        first = max(np.searchsorted(staked_times, since, side="right") - 1, 0)
+        staked, staked_times = staked[first:], np.maximum(staked_times[first:], since)
+        window = records[stamps >= since]
+    else:
+        window = records
+    start = since if since is not None else (stamps[0] if len(stamps) else now)
+    staked_seconds = float(np.sum(staked["amount"] * np.diff(np.append(staked_times, now))))
+
+    # One pass over the window for the totals of every kind
+    kind = window["kind"]
+    amount = np.bincount(kind, weights=window["amount"], minlength=kinds)
+    honey = np.bincount(kind, weights=window["honey"], minlength=kinds)
+    count = np.bincount(kind, minlength=kinds)
+    total = {name: float(amount[index]) for name, index in ledger.KIND.items()}
+
+    stirs = window[kind == ledger.KIND["stir"]]
+    market = market_at(prices, stirs["block"])
+    priced = ~np.isnan(market)
+    stir_paid = float(honey[ledger.KIND["stir"]])
+    stir_price = stir_paid / total["stir"] if total["stir"] else np.nan
+    if priced.any():
+        stir_market = float(np.average(market[priced], weights=stirs["amount"][priced]))
+        stir_saved = float(np.sum(stirs["amount"][priced] * market[priced] - stirs["honey"][priced]))
+    else:
+        stir_market = stir_saved = np.nan
+
+    days = max(now - start, 1) / 86400
+    gas = float(window["gas"].sum())
+    return {
+        "days": days,
+        "transactions": int(count[ledger.KIND["tx"]]),
+        "staked_avg": staked_seconds / max(now - start, 1),
+        "staked_added": total["stake"] - total["unstake"],
+        "prg_claimed": total["claim"],
+        "prg_apr": total["claim"] / staked_seconds * YEAR if staked_seconds > 0 else np.nan,
+        "honey_borrowed": total["borrow"],
+        "honey_repaid": total["repay"],
+        "debt_growth": total["borrow"] - total["repay"],
+        "debt_growth_per_day": (total["borrow"] - total["repay"]) / days,
+        "prg_stirred": total["stir"],
+        "stir_price": stir_price,
+        "stir_market": stir_market,
+        "stir_discount": 1 - stir_price / stir_market if priced.any() and stir_market else np.nan,
+        "stir_saved": stir_saved,
+        "locks_bought": total["buy"],
+        "buy_honey": float(honey[ledger.KIND["buy"]]),
+        "gas": gas,
+        "gas_per_prg": gas / total["claim"] if total["claim"] else np.nan,
+    }
+
+
+def load_fleet(ledger_dir, timeseries_dir=None, since=None, now=None):
+    """
+    Summarize every wallet with a ledger in a directory.
+
+    Args:
+        ledger_dir: LEDGER_DIR of the bots
+        timeseries_dir: TIMESERIES_DIR of the bots, for the stir comparison
+        since: Unix time the window starts
+        now: Unix time the window ends
+
+    Returns:
+        Dict of wallet to summarize() results plus "settings" (empty when the bot stored none)
+    """
+    fleet = {}
+    for path in sorted(glob.glob(os.path.join(ledger_dir, "*.ledger"))):
+        wallet = os.path.basename(path)[:-len(".ledger")]
+        prices_path = os.path.join(timeseries_dir, f"{wallet}.ts") if timeseries_dir else None
+        prices = load_prices(prices_path) if prices_path and os.path.exists(prices_path) else None
+        summary = summarize(load_ledger(path), prices, since, now)
+        settings_path = os.path.join(ledger_dir, f"{wallet}.json")
+        if os.path.exists(settings_path):
+            with open(settings_path) as f:
+                summary["settings"] = json.load(f)
+        else:
+            summary["settings"] = {}
+        fleet[wallet] = summary
+    return fleet
+
+
+def compare(fleet, metric="prg_apr"):
+    """
+    Compare a metric between wallets that differ in a setting.
+
+    Args:
+        fleet: Result of load_fleet()
+        metric: summarize() field to compare
+
+    Returns:
+        Dict of setting name to {value: (wallets, mean of the metric)}, for settings with several values
+    """
+    values = {}
+    for summary in fleet.values():
+        for name, value in summary["settings"].items():
+            values.setdefault(name, {}).setdefault(json.dumps(value), []).append(summary[metric])
+    comparison = {}
+    for name, groups in values.items():
+        if len(groups) > 1:
+            comparison[name] = {
+                json.loads(value): (len(results), float(np.nanmean(results)) if not np.isnan(results).all() else np.nan)
+                for value, results in sorted(groups.items())
+            }
+    return comparison
+
+
+def _short(wallet):
+    return f"{wallet[:6]}...{wallet[-4:]}"
+
+
+def format_digest(fleet, comparison, days):
+    """
+    Discord digest of the fleet's results.
+
+    Args:
+        fleet: Result of load_fleet()
+        comparison: Result of compare()
+        days: Length of the window in days
+
+    Returns:
+        Message text (at most DIGEST_LIMIT characters)
+    """
+    claimed = sum(s["prg_claimed"] for s in fleet.values())
+    gas = sum(s["gas"] for s in fleet.values())
+    debt = sum(s["debt_growth"] for s in fleet.values())
+    lines = [
+        f"📊 Goldilocks digest, last {days:g} days, {len(fleet)} wallets",
+        f"PRG claimed {claimed:.4f} | HONEY debt +{debt:.4f} | gas {gas:.6f} BERA",
+    ]
+    ranked = sorted(fleet.items(), key=lambda item: -np.nan_to_num(item[1]["prg_apr"], nan=-np.inf))
+    for wallet, s in ranked:
+        lines.append(f"{_short(wallet)}: APR {s['prg_apr']:.2%} on {s['staked_avg']:.2f} LOCKS, "
+                     f"claimed {s['prg_claimed']:.4f} PRG, debt +{s['debt_growth']:.4f}, "
+                     f"stir discount {s['stir_discount']:.2%}, gas {s['gas']:.6f}")
+    for name, groups in comparison.items():
+        lines.append(f"{name}: " + ", ".join(f"{value} → {mean:.2%} ({wallets})"
+                                             for value, (wallets, mean) in groups.items()))
+
+    message = ""
+    for line in lines:
+        if len(message) + len(line) + 1 > DIGEST_LIMIT - 4:
+            return message + "..."
+        message += line + "\n"
+    return message.rstrip("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Realized yield, debt, gas and stir prices per wallet")
+    parser.add_argument("ledger_dir", help="LEDGER_DIR of the bots")
+    parser.add_argument("--timeseries-dir", help="TIMESERIES_DIR of the bots, for the stir vs market comparison")
+    parser.add_argument("--days", type=float, default=7, help="window in days")
+    parser.add_argument("--metric", default="prg_apr", help="metric for the settings comparison")
+    parser.add_argument("--discord", action="store_true", help="send the digest to WEBHOOK_URL")
+    parser.add_argument("--interval", type=float, help="repeat every INTERVAL seconds")
+    args = parser.parse_args()
+
+    while True:
+        now = time.time()
+        fleet = load_fleet(args.ledger_dir, args.timeseries_dir, since=now - args.days * 86400, now=now)
+        digest = format_digest(fleet, compare(fleet, args.metric), args.days)
+        if args.discord:
+            from notifications import send_discord_message
+            send_discord_message(digest)
+        else:
+            print(digest)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
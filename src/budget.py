@@ -0,0 +1,111 @@
+"""
+Time budgets for the Goldilocks DeFi bot.
+Bounds how long a cycle and each of its steps may take. A step that runs out
+of time is cancelled; the swap and stake steps are then left for the next
+cycle (with the amounts they would have used) instead of holding up the
+cycles behind them. A step cancelled while waiting for a receipt leaves its
+transaction to be mined; the wallet's position is re-read from the chain
+before the next cycle catches up (see web3_utils.send_tx).
+"""
+import asyncio
+
+import clock
+from deployments import wallet_key
+
+# Steps that can be left for a later cycle when time runs out
+DEFERRABLE_STEPS = ("swap", "stake")
+
+
+class BudgetExceeded(Exception):
+    """A step ran out of its own or the cycle's time budget."""
+
+
+class CycleBudget:
+    """
+    Deadline of one cycle plus per-step limits.
+    """
+
+    def __init__(self, total=0, steps=None, clock=clock.monotonic):
+        """
+        Start the cycle's clock.
+
+        Args:
+            total: Seconds for the whole cycle, 0 for no limit
+            steps: Dict of step name to seconds (steps without an entry only have the cycle limit)
+            clock: Monotonic time source
+        """
+        self.clock = clock
+        self.deadline = clock() + total if total else None
+        self.steps = steps or {}
+
+    def remaining(self):
+        """Seconds left in the cycle, or None without a cycle limit."""
+        return None if self.deadline is None else max(0.0, self.deadline - self.clock())
+
+    def exhausted(self):
+        """True once the cycle limit has passed."""
+        return self.remaining() == 0
+
+    def timeout(self, step):
+        """Seconds the step may take: its own limit or what is left of the cycle, whichever is lower."""
+        limits = [limit for limit in (self.steps.get(step), self.remaining()) if limit is not None]
+        return min(limits) if limits else None
+
+    async def run(self, step, awaitable):
+        """
+        Await a step within its budget.
+
+        Args:
+            step: Step name, e.g. "stir"
+            awaitable: Coroutine of the step
+
+        Returns:
+            Result of the step
+
+        Raises:
+            BudgetExceeded: The step was cancelled, or not started because no time was left
+        """
+        timeout = self.timeout(step)
+        if timeout is not None and timeout <= 0:
+            awaitable.close()
+            raise BudgetExceeded(f"no time left in the cycle budget for {step}")
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise BudgetExceeded(f"{step} exceeded its {timeout:.0f}s budget") from None
+
+
+_deferred = {}
+
+
+def defer_step(wallet, step, *args):
+    """
+    Leave a step for the wallet's next cycle on the current deployment.
+
+    Args:
+        wallet: Wallet address
+        step: One of DEFERRABLE_STEPS
+        *args: Arguments the step is to be run with
+    """
+    _deferred.setdefault(wallet_key(wallet), {})[step] = args
+
+
+def has_deferred(wallet):
+    """True while steps of the wallet wait for its next cycle."""
+    return bool(_deferred.get(wallet_key(wallet)))
+
+
+def take_deferred(wallet):
+    """
+    Remove and return the wallet's deferred steps.
+
+    Returns:
+        Dict of step name to arguments, in DEFERRABLE_STEPS order
+    """
+    steps = _deferred.pop(wallet_key(wallet), {})
+    return {step: steps[step] for step in DEFERRABLE_STEPS if step in steps}
+
+
+def reset_deferred():
+    """Forget all deferred steps, e.g. after switching chains."""
+    _deferred.clear()
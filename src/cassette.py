@@ -0,0 +1,214 @@
+"""
+RPC record/replay module for the Goldilocks DeFi bot.
+A recording provider writes every JSON-RPC request and response of a cycle
+to a gzipped JSON-lines cassette; a replay provider feeds a cassette back
+without any network, so a bad production cycle can be rerun offline.
+
+Usage:
+    python cassette.py replay recordings/cycle-1735689600-000042.rpc.gz
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+from collections import defaultdict, deque
+
+from web3._utils.encoding import Web3JsonEncoder
+from web3.providers import JSONBaseProvider
+
+import clock
+
+CASSETTE_VERSION = 1
+
+# Environment a replay needs from the recording (the private key is never stored)
+RECORDED_SETTINGS = ["HONEY_ADDRESS", "LOCKS_ADDRESS", "PORRIDGE_ADDRESS", "BORROW_THRESHOLD",
+                     "ALLOW_WALLET_HONEY", "SWAP_LEFTOVER_HONEY", "SWAP_ALL_WALLET_HONEY", "POSITION_MODEL"]
+
+
+class CassetteMismatchError(Exception):
+    """Raised when a replayed run sends a request the cassette has no (more) answers for."""
+
+
+def request_key(method, params):
+    """Stable key of a request, independent of dict ordering and byte types."""
+    return method, json.dumps(params, sort_keys=True, cls=Web3JsonEncoder)
+
+
+class Cassette:
+    """
+    Recorded JSON-RPC interactions with a metadata header.
+    Each interaction is [method, params, response]; a response is either the
+    JSON-RPC response dict or {"exception": "..."} for a transport failure.
+    """
+
+    def __init__(self, meta=None, interactions=None):
+        self.meta = meta or {}
+        self.interactions = interactions if interactions is not None else []
+
+    def save(self, path):
+        """Write the cassette as gzipped JSON lines."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CASSETTE_VERSION, "meta": self.meta}) + "\n")
+            for interaction in self.interactions:
+                f.write(json.dumps(interaction, separators=(",", ":"), cls=Web3JsonEncoder) + "\n")
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a cassette written by save().
+
+        Args:
+            path: Cassette file
+
+        Returns:
+            Cassette instance
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version {header.get('version')} in {path}")
+            return cls(header["meta"], [json.loads(line) for line in f if line.strip()])
+
+
+class RecordingProvider(JSONBaseProvider):
+    """
+    Wraps a provider and records everything passing through it.
+    Requests made before the first cycle (connection check, contract
+    verification) are kept as a prelude and written into every cycle's
+    cassette, so a replay can import the bot modules as well.
+    """
+
+    def __init__(self, provider, **kwargs):
+        super().__init__(**kwargs)
+        self.provider = provider
+        self.endpoint_uri = getattr(provider, "endpoint_uri", None)
+        self.interactions = []
+        self._prelude = None
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        try:
+            response = self.provider.make_request(method, params)
+        except Exception as e:
+            self._record(method, params, {"exception": f"{type(e).__name__}: {e}"})
+            raise
+        self._record(method, params, response)
+        return response
+
+    def _record(self, method, params, response):
+        with self._lock:
+            self.interactions.append([method, params, response])
+
+    def begin_cycle(self):
+        """Drop what was recorded since the last cycle, keeping the prelude."""
+        with self._lock:
+            if self._prelude is None:
+                self._prelude = list(self.interactions)
+            self.interactions = list(self._prelude)
+
+    def save_cycle(self, path, meta=None):
+        """
+        Write the prelude plus everything recorded since begin_cycle().
+
+        Args:
+            path: Cassette file
+            meta: Metadata stored in the header
+        """
+        with self._lock:
+            interactions = list(self.interactions)
+        Cassette(meta, interactions).save(path)
+
+
+class ReplayProvider(JSONBaseProvider):
+    """
+    Answers requests from a cassette.
+    Identical requests get their recorded responses in recording order, so
+    polling loops replay faithfully. A raw transaction signed by another key
+    falls back to the next recorded broadcast; anything else unknown raises
+    CassetteMismatchError.
+    """
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.endpoint_uri = "replay://"
+        self._responses = defaultdict(deque)
+        self._by_method = defaultdict(deque)
+        for method, params, response in cassette.interactions:
+            self._responses[request_key(method, params)].append(response)
+            self._by_method[method].append(response)
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            queue = self._responses.get(request_key(method, params))
+            if not queue and method == "eth_sendRawTransaction":
+                queue = self._by_method[method]
+            if not queue:
+                raise CassetteMismatchError(f"No recorded response for {method} {params}")
+            response = queue.popleft()
+
+        if "exception" in response:
+            # Replayed as a connection failure, so the retry middleware reacts as it did live
+            raise ConnectionError(response["exception"])
+        return {**response, "id": next(self.request_counter)}
+
+
+def cycle_cassette_path(directory, cycle):
+    """File name of a recorded cycle, sortable by time (cycle numbers restart with the bot)."""
+    return os.path.join(directory, f"cycle-{int(clock.time())}-{cycle:06d}.rpc.gz")
+
+
+def prune_cassettes(directory, keep):
+    """Delete all but the newest `keep` cycle cassettes."""
+    names = sorted(n for n in os.listdir(directory) if n.startswith("cycle-") and n.endswith(".rpc.gz"))
+    for name in names[:-keep] if keep > 0 else []:
+        os.remove(os.path.join(directory, name))
+
+
+def replay(path):
+    """
+    Rerun a recorded cycle offline.
+
+    Args:
+        path: Cassette file
+
+    Returns:
+        Result of run_protocol_cycle()
+    """
+    cassette = Cassette.load(path)
+    # The bot modules read their settings at import, so restore the recorded ones first
+    os.environ.update({k: str(v) for k, v in cassette.meta.get("settings", {}).items()})
+    os.environ["RPC_REPLAY_FILE"] = path
+    os.environ.setdefault("RPC_URL", "replay://")
+    os.environ.setdefault("WEBHOOK_URL", "replay://")
+    os.environ["SUBSCRIPTION_URL"] = ""
+
+    import main
+    from web3_utils import ACCOUNT
+
+    recorded_wallet = cassette.meta.get("wallet")
+    if recorded_wallet and recorded_wallet != ACCOUNT.address:
+        print(f"Warning: cassette was recorded for {recorded_wallet}, PRIVATE_KEY is {ACCOUNT.address}; "
+              "reads will not match", file=sys.stderr)
+    return asyncio.run(main.run_protocol_cycle())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded protocol cycle without network access")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="rerun run_protocol_cycle() from a cassette")
+    replay_parser.add_argument("path", help="cassette file (.rpc.gz)")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        result = replay(args.path)
+        print(f"Cycle replayed, run_protocol_cycle() returned {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Clock for the Goldilocks DeFi bot.
+The bot reads the time through this module instead of the time module:
+time() for timestamps (ledger, samples, PRG accrual), monotonic() for
+durations (receipt timeouts, scanner rests, breaker resets, rate limits) and
+sleep() for the blocking waits of the RPC middleware. Timers of the event
+loop (asyncio.sleep, wait_for) follow the loop's own time.
+
+Normally that is the system clock. run_virtual() runs a coroutine on an
+event loop driven by a VirtualClock instead: whenever nothing is ready to
+run, the loop moves the clock to its next timer instead of waiting, and the
+blocking sleeps only move the clock. Against the local RPC stand-in (with
+the same clock), a week of cycles with their timeouts and retries takes as
+long as the work in them; see soak.py.
+"""
+import asyncio
+import threading
+import time as _time
+
+
+class SystemClock:
+    """The real clock."""
+
+    @staticmethod
+    def time():
+        return _time.time()
+
+    @staticmethod
+    def monotonic():
+        return _time.monotonic()
+
+    @staticmethod
+    def sleep(seconds):
+        _time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated clock that only moves when told to.
+    """
+
+    def __init__(self, start=1_700_000_000.0):
+        """
+        Args:
+            start: Unix time the clock starts at
+        """
+        self.start = start
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self.start + self.elapsed
+
+    def monotonic(self):
+        return self.elapsed
+
+    def sleep(self, seconds):
+        """Blocking sleep: returns at once, the time simply passes."""
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        """Move the clock forward."""
+        with self._lock:
+            self.elapsed += max(0.0, seconds)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """The clock in use."""
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Switch the clock the bot reads.
+
+    Args:
+        clock: SystemClock or VirtualClock
+
+    Returns:
+        The previous clock
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def time():
+    """Unix time in seconds."""
+    return _clock.time()
+
+
+def monotonic():
+    """Seconds of a clock that never goes back, for durations."""
+    return _clock.monotonic()
+
+
+def sleep(seconds):
+    """Blocking sleep, for code that runs outside of the event loop's timers."""
+    _clock.sleep(seconds)
+
+
+class _VirtualSelector:
+    """
+    The loop's selector, except that instead of waiting for the next timer
+    it moves the clock to it. Waits without a timer (only I/O, e.g. results
+    of other threads) stay real.
+    """
+
+    def __init__(self, selector, clock):
+        self._selector = selector
+        self._clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            return self._selector.select(None)
+        events = self._selector.select(0)
+        if not events and timeout > 0:
+            self._clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop running on a VirtualClock.
+    """
+
+    def __init__(self, clock):
+        """
+        Args:
+            clock: VirtualClock
+        """
+        super().__init__()
+        self.clock = clock
+        self._selector = _VirtualSelector(self._selector, clock)
+
+    def time(self):
+        return self.clock.monotonic()
+
+
+def run_virtual(main, clock=None):
+    """
+    Run a coroutine in simulated time, like asyncio.run().
+
+    Args:
+        main: Coroutine
+        clock: VirtualClock (default one starting at a fixed date)
+
+    Returns:
+        Result of the coroutine
+    """
+    clock = clock or VirtualClock()
+    previous = set_clock(clock)
+    loop = VirtualTimeLoop(clock)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            set_clock(previous)
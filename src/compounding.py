@@ -0,0 +1,184 @@
+"""
+Compounding scheduler for the Goldilocks DeFi bot.
+Decides whether a cycle (borrow → claim → stir → stake) is worth its gas.
+
+Claimed PRG is stirred into LOCKS and staked, so compounding earns the
+staking yield on the claimed amount; each cycle costs a roughly fixed amount
+of gas. With accrual rate a (PRG/s), staking yield r (PRG per staked LOCKS
+per second), premium v = market - floor (HONEY per PRG) and gas cost G
+(HONEY per cycle), compounding every T seconds loses G/T + a*T*r*v/2 per
+second. The optimum is T* = sqrt(2G / (a*r*v)), i.e. a cycle pays off once
+
+    claimable >= sqrt(2 * G * staked / v)
+
+which replaces the static BORROW_THRESHOLD with a threshold per wallet.
+"""
+import math
+from collections import namedtuple
+
+import clock
+from deployments import wallet_key
+
+PRECISION = 10 ** 18
+
+# Typical gas used per function; refined from our receipts by record_gas()
+DEFAULT_GAS_USED = {
+    "borrow": 140_000,
+    "claim": 95_000,
+    "approve": 46_000,
+    "stir": 170_000,
+    "stake": 120_000,
+    "buy": 160_000,
+}
+# Transactions of a full cycle (the three approvals are only sent when allowances run out,
+# so this is the pessimistic estimate)
+CYCLE_TXS = ["borrow", "claim", "approve", "approve", "stir", "approve", "stake"]
+# Added by swap_step when SWAP_LEFTOVER_HONEY is on: HONEY approval for LOCKS and the buy
+SWAP_TXS = ["approve", "buy"]
+
+Decision = namedtuple("Decision", "run claimable threshold gas_cost premium interval defer reason")
+
+_gas_used = dict(DEFAULT_GAS_USED)
+_accrual = {}
+_decisions = {}
+
+
+def record_gas(fn_name, gas_used, weight=0.2):
+    """
+    Fold the gas used by one of our transactions into the per-function estimate.
+
+    Args:
+        fn_name: Contract function name, e.g. "stir"
+        gas_used: gasUsed of the receipt
+        weight: Weight of the new observation (exponential moving average)
+    """
+    if fn_name in _gas_used:
+        _gas_used[fn_name] = int(_gas_used[fn_name] * (1 - weight) + gas_used * weight)
+
+
+def cycle_txs(swap_leftover_honey):
+    """
+    Transactions of a full cycle with the wallet's settings.
+
+    Args:
+        swap_leftover_honey: Whether the cycle swaps leftover HONEY to LOCKS
+
+    Returns:
+        List of function names
+    """
+    return CYCLE_TXS + SWAP_TXS if swap_leftover_honey else CYCLE_TXS
+
+
+def cycle_gas(txs=CYCLE_TXS):
+    """Estimated gas units of a cycle."""
+    return sum(_gas_used[fn] for fn in txs)
+
+
+def observe_claimable(wallet, claimable, now=None):
+    """
+    Track how fast a wallet accrues PRG from successive claimable reads.
+
+    Args:
+        wallet: Wallet address
+        claimable: userClaimablePrg
+        now: Unix time of the read (default: now)
+
+    Returns:
+        Accrual rate in PRG wei per second, or None until two reads allow an estimate
+    """
+    now = clock.time() if now is None else now
+    key = wallet_key(wallet)
+    last = _accrual.get(key)
+    rate = last[2] if last else None
+    if last and claimable >= last[1] and now > last[0]:
+        rate = (claimable - last[1]) / (now - last[0])
+    _accrual[key] = (now, claimable, rate)
+    return rate
+
+
+def reset_claimable(wallet, now=None):
+    """Restart accrual tracking after a claim emptied the claimable balance."""
+    key = wallet_key(wallet)
+    last = _accrual.get(key)
+    _accrual[key] = (clock.time() if now is None else now, 0, last[2] if last else None)
+
+
+def optimal_threshold(gas_cost, staked, premium):
+    """
+    Claimable PRG at which compounding pays for its gas.
+
+    Args:
+        gas_cost: Gas of one cycle in HONEY wei
+        staked: Staked LOCKS in wei
+        premium: Market minus floor price in HONEY wei per PRG
+
+    Returns:
+        Threshold in PRG wei
+    """
+    return math.isqrt(2 * gas_cost * staked * PRECISION // premium)
+
+
+def decide(claimable, staked, floor_price, market_price, gas_price, gas_token_price,
+           accrual_rate=None, gas_units=None, max_defer=86400):
+    """
+    Decide whether to run the cycle now.
+
+    Args:
+        claimable: Claimable PRG in wei
+        staked: Staked LOCKS in wei
+        floor_price: LOCKS floor price in HONEY wei
+        market_price: LOCKS market price in HONEY wei
+        gas_price: Gas price paid in wei
+        gas_token_price: HONEY per native gas token
+        accrual_rate: PRG wei accrued per second (see observe_claimable), if known
+        gas_units: Gas of one cycle (default cycle_gas())
+        max_defer: Upper bound for the suggested deferral in seconds
+
+    Returns:
+        Decision with the threshold, cycle gas cost in HONEY wei, the optimal
+        interval and, when deferring, the seconds until the threshold is reached
+        (None when the accrual rate is unknown)
+    """
+    gas_units = cycle_gas() if gas_units is None else gas_units
+    gas_cost = int(gas_units * gas_price * gas_token_price)
+    premium = market_price - floor_price
+    if claimable == 0:
+        return Decision(False, claimable, None, gas_cost, premium, None, None, "nothing to claim")
+    if premium <= 0:
+        return Decision(False, claimable, None, gas_cost, premium, None, None, "market price at or below floor")
+
+    threshold = optimal_threshold(gas_cost, staked, premium)
+    interval = threshold / accrual_rate if accrual_rate else None
+    if claimable >= threshold:
+        return Decision(True, claimable, threshold, gas_cost, premium, interval, None, "claimable above threshold")
+    defer = min(max_defer, (threshold - claimable) / accrual_rate) if accrual_rate else None
+    return Decision(False, claimable, threshold, gas_cost, premium, interval, defer, "gas exceeds compounding gain")
+
+
+def record_decision(wallet, decision):
+    """Remember a wallet's latest decision, for the main loop's wait."""
+    _decisions[wallet_key(wallet)] = decision
+
+
+def next_cycle_in(wallet, interval):
+    """
+    Seconds until a wallet's next cycle: the regular interval, or longer while
+    the latest decision deferred compounding.
+
+    Args:
+        wallet: Wallet address
+        interval: Regular cycle interval in seconds
+
+    Returns:
+        Seconds to wait
+    """
+    decision = _decisions.get(wallet_key(wallet))
+    if decision is None or decision.run or not decision.defer:
+        return interval
+    return max(interval, decision.defer)
+
+
+def reset_wallets():
+    """Forget the accrual tracking and decisions of all wallets, e.g. after switching chains."""
+    _accrual.clear()
+    _decisions.clear()
@@ -13,13 +13,9 @@ RPC_URL = os.getenv("RPC_URL")
 if not RPC_URL:
     raise ValueError("RPC_URL not set in .env")
 
+# Only the bot needs these; read-only tools (status.py) run without them, see require()
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-if not PRIVATE_KEY:
-    raise ValueError("PRIVATE_KEY not set in .env")
-
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
-if not WEBHOOK_URL:
-    raise ValueError("WEBHOOK_URL not set in .env")
 
 # Contract addresses
 HONEY_ADDRESS = os.getenv("HONEY_ADDRESS")
@@ -37,6 +33,22 @@ if not PORRIDGE_ADDRESS:
     raise ValueError("PORRIDGE_ADDRESS not set in .env")
 PORRIDGE_ADDRESS = Web3.to_checksum_address(PORRIDGE_ADDRESS)
 
+
+def require(*names):
+    """
+    Check settings a module cannot run without.
+
+    Args:
+        *names: Setting names, e.g. "PRIVATE_KEY"
+
+    Raises:
+        ValueError: If one of them is not set
+    """
+    for name in names:
+        if not globals()[name]:
+            raise ValueError(f"{name} not set in .env")
+
+
 # Optional configuration with defaults
 BORROW_THRESHOLD = int(os.getenv("BORROW_THRESHOLD", "1000000000000000000"))  # Default: 1 token (18 decimals)
 ALLOW_WALLET_HONEY = os.getenv("ALLOW_WALLET_HONEY", "false").lower() == "true"
@@ -44,12 +56,126 @@ SWAP_LEFTOVER_HONEY = os.getenv("SWAP_LEFTOVER_HONEY", "false").lower() == "true
 CYCLE_INTERVAL = int(os.getenv("CYCLE_INTERVAL", "120"))  # Default: 2 minutes
 SWAP_ALL_WALLET_HONEY = os.getenv("SWAP_ALL_WALLET_HONEY", "false").lower() == "true"
 
+# Push subscriptions (newHeads + logs) over a WebSocket URL or a local IPC socket path.
+# Falls back to RPC_URL when that is an IPC path; empty means HTTP polling.
+SUBSCRIPTION_URL = os.getenv("SUBSCRIPTION_URL", "")
+if not SUBSCRIPTION_URL and not RPC_URL.startswith(("http://", "https://")):
+    SUBSCRIPTION_URL = RPC_URL
+
+# Logging: JSON lines (or "text") written by a background thread.
+# LOG_SAMPLE_RATE keeps only that fraction of the noisy per-read messages.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Provider request cap in requests per second (0 disables the limiter).
+# Broadcasts always pass; receipt checks, reads and bulk work back off in that order.
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))
+RPC_BURST = int(os.getenv("RPC_BURST", "0"))  # Default: one second worth of requests
+
+# Transient RPC failures are retried with jittered exponential backoff; after
+# RPC_BREAKER_THRESHOLD failures in a row the endpoint is left alone for RPC_BREAKER_RESET seconds.
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))  # Default: 10 seconds per HTTP request
+RPC_RETRIES = int(os.getenv("RPC_RETRIES", "3"))
+RPC_BREAKER_THRESHOLD = int(os.getenv("RPC_BREAKER_THRESHOLD", "5"))
+RPC_BREAKER_RESET = float(os.getenv("RPC_BREAKER_RESET", "30"))
+
+# Record every cycle's RPC traffic to RPC_RECORD_DIR (keeping the newest RPC_RECORD_KEEP cassettes);
+# RPC_REPLAY_FILE answers all requests from a recorded cassette instead of the network.
+RPC_RECORD_DIR = os.getenv("RPC_RECORD_DIR", "")
+RPC_RECORD_KEEP = int(os.getenv("RPC_RECORD_KEEP", "100"))
+RPC_REPLAY_FILE = os.getenv("RPC_REPLAY_FILE", "")
+
+# Cycle traces (cycle → step → RPC call/sign/broadcast/receipt wait) as OTLP/JSON,
+# appended to a file or POSTed to an OTLP/HTTP collector such as http://localhost:4318. Empty disables tracing.
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "goldilocks-bot")
+
+# Per-block samples of floor/market price, borrow limit and claimable PRG, kept in one
+# memory-mapped ring file per wallet of TIMESERIES_CAPACITY records. Empty disables them.
+# Without SUBSCRIPTION_URL the block number is polled every TIMESERIES_POLL_INTERVAL seconds.
+TIMESERIES_DIR = os.getenv("TIMESERIES_DIR", "")
+TIMESERIES_CAPACITY = int(os.getenv("TIMESERIES_CAPACITY", "100000"))
+TIMESERIES_POLL_INTERVAL = float(os.getenv("TIMESERIES_POLL_INTERVAL", "2"))  # Default: about one Berachain block
+
+# Ledger of what each of our transactions did (gas, borrow, claim, stir, buy, stake), one
+# file of fixed-width records per wallet, for analytics.py. Empty disables it.
+LEDGER_DIR = os.getenv("LEDGER_DIR", "")
+
+# Keep balances, staked LOCKS and borrowed HONEY in memory, updated from our own receipts,
+# and check them against a Multicall3 snapshot every POSITION_VERIFY_INTERVAL seconds.
+POSITION_MODEL = os.getenv("POSITION_MODEL", "true").lower() == "true"
+POSITION_VERIFY_INTERVAL = float(os.getenv("POSITION_VERIFY_INTERVAL", "600"))  # Default: 10 minutes
+
+# Gas-aware compounding: run a cycle only once the claimable PRG outweighs its gas,
+# with the threshold computed per wallet instead of BORROW_THRESHOLD. GAS_TOKEN_PRICE
+# (HONEY per BERA) converts gas into HONEY; COMPOUND_MAX_DEFER caps the wait between checks.
+COMPOUND_OPTIMIZER = os.getenv("COMPOUND_OPTIMIZER", "false").lower() == "true"
+GAS_TOKEN_PRICE = float(os.getenv("GAS_TOKEN_PRICE", "0"))
+COMPOUND_MAX_DEFER = int(os.getenv("COMPOUND_MAX_DEFER", "86400"))  # Default: 1 day
+
+# Time budgets: CYCLE_BUDGET seconds per cycle and STEP_BUDGETS per step ("stir=90,swap=30,stake=30";
+# steps borrow, claim, stir, swap, stake), 0/empty for no limit. A swap or stake that runs out of
+# time is cancelled and retried after DEFERRED_STEP_RETRY seconds.
+CYCLE_BUDGET = float(os.getenv("CYCLE_BUDGET", "0"))
+STEP_BUDGETS = {step.strip(): float(seconds) for step, seconds in
+                (item.split("=") for item in os.getenv("STEP_BUDGETS", "").split(",") if item.strip())}
+DEFERRED_STEP_RETRY = float(os.getenv("DEFERRED_STEP_RETRY", "30"))
+
+# Simulate the cycle's transactions in one eth_call before signing any of them, and leave out
+# the steps that would revert (costs a snapshot and one or more eth_calls per cycle)
+SIMULATE_CYCLE = os.getenv("SIMULATE_CYCLE", "false").lower() == "true"
+
+# Fleet mode: run the accounts of FLEET_KEYS_FILE (one private key per line) instead of PRIVATE_KEY.
+# Every FLEET_SCAN_INTERVAL seconds (or block, with SUBSCRIPTION_URL) their borrow limits are read in
+# Multicall3 batches of FLEET_SCAN_CHUNK wallets, and only wallets with work run a cycle.
+FLEET_KEYS_FILE = os.getenv("FLEET_KEYS_FILE", "")
+FLEET_CONCURRENCY = int(os.getenv("FLEET_CONCURRENCY", "10"))
+FLEET_SCAN_CHUNK = int(os.getenv("FLEET_SCAN_CHUNK", "100"))
+FLEET_SCAN_INTERVAL = float(os.getenv("FLEET_SCAN_INTERVAL", "2"))  # Default: about one Berachain block
+
+# Event-loop lag monitor: a lag above LOOP_LAG_THRESHOLD seconds is charged to the blocking
+# line of the bot's code (stack logged once per line); the worst lines are reported every
+# LOOP_LAG_REPORT_INTERVAL seconds. 0 disables the monitor; see loop_monitor.py
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+LOOP_LAG_REPORT_INTERVAL = int(os.getenv("LOOP_LAG_REPORT_INTERVAL", "600"))
+
+# Memory leak guard (diagnostics, slows the bot down): tracemalloc snapshots every
+# MEMORY_SNAPSHOT_INTERVAL seconds, logging the allocation sites that grew; SIGUSR2 dumps
+# a snapshot to MEMORY_DUMP_DIR. 0 disables it; see memory_guard.py
+MEMORY_SNAPSHOT_INTERVAL = int(os.getenv("MEMORY_SNAPSHOT_INTERVAL", "0"))
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+MEMORY_DUMP_DIR = os.getenv("MEMORY_DUMP_DIR", "memory-dumps")
+
+# Per-wallet overrides of BORROW_THRESHOLD, CYCLE_INTERVAL, the swap flags and COMPOUND_OPTIMIZER,
+# picked up between cycles without a restart: a JSON file or sqlite:<path>; see wallet_settings.py
+WALLET_SETTINGS = os.getenv("WALLET_SETTINGS", "")
+
+# JSON file of protocol deployments (RPC URL, contract addresses, keys file of the wallets) to run
+# in one process instead of the one of RPC_URL and the *_ADDRESS settings; see deployments.py
+DEPLOYMENTS_FILE = os.getenv("DEPLOYMENTS_FILE", "")
+
+# Hot standby: only the instance holding the leader lease sends transactions. LEADER_LEASE is a lock
+# file path (flock, for instances on one host) or "sqlite:<path>" (a row renewed every third of
+# LEADER_LEASE_TTL seconds). A standby takes the lease over once it is released or expired.
+LEADER_LEASE = os.getenv("LEADER_LEASE", "")
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "15"))
+
+# Board file of market_data.py: floor/market price and the other protocol-global values, published
+# once per block for all workers. Values older than MARKET_DATA_MAX_AGE seconds are read from the chain.
+MARKET_DATA_FILE = os.getenv("MARKET_DATA_FILE", "")
+MARKET_DATA_MAX_AGE = float(os.getenv("MARKET_DATA_MAX_AGE", "5"))
+
+# Multicall3 contract used to batch read-only snapshots (same address on Berachain and most EVM chains)
+MULTICALL_ADDRESS = Web3.to_checksum_address(os.getenv("MULTICALL_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11"))
+
 # Token precision (for display purposes)
 TOKEN_DECIMALS = 18
 TOKEN_PRECISION = 10 ** TOKEN_DECIMALS
 
-# Define paths for ABI files
-ABI_DIR = "ABIs"
+# Define paths for ABI files (relative to this module, so the bot runs from any directory)
+ABI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ABIs")
 HONEY_ABI_PATH = f"{ABI_DIR}/abi_honey.json"
 LOCKS_ABI_PATH = f"{ABI_DIR}/abi_locks.json"
 PORRIDGE_ABI_PATH = f"{ABI_DIR}/abi_porridge.json"
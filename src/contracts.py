@@ -4,44 +4,64 @@ Handles loading ABIs and initializing contract instances.
 """
 import json
 import config
-from web3_utils import w3
+import deployments
+from abi_tables import get_tables
+from logger import get_logger
+from web3_utils import get_web3
 
-
-def load_abi(filename):
-    """
-    Load ABI from JSON file.
-    
-    Args:
-        filename: Path to ABI JSON file
-        
-    Returns:
-        ABI as a Python object
-    """
-    with open(filename) as f:
-        return json.load(f)
+logger = get_logger(__name__)
 
 
-# Load contract ABIs
+# Load the trimmed contract ABIs (cached pickle, rebuilt from the JSON files when they change)
 try:
-    honey_abi = load_abi(config.HONEY_ABI_PATH)
-    locks_abi = load_abi(config.LOCKS_ABI_PATH)
-    porridge_abi = load_abi(config.PORRIDGE_ABI_PATH)
+    tables = get_tables()
 except FileNotFoundError as e:
     raise FileNotFoundError(f"ABI file not found: {e}. Make sure the ABI files exist in the {config.ABI_DIR} directory.")
 except json.JSONDecodeError as e:
     raise ValueError(f"Invalid JSON in ABI file: {e}")
 
-# Initialize contract instances
-honey_contract = w3.eth.contract(address=config.HONEY_ADDRESS, abi=honey_abi)
-locks_contract = w3.eth.contract(address=config.LOCKS_ADDRESS, abi=locks_abi)
-porridge_contract = w3.eth.contract(address=config.PORRIDGE_ADDRESS, abi=porridge_abi)
+_contracts = {}
 
-# Verify contract connections by calling view functions
-try:
-    honey_symbol = honey_contract.functions.symbol().call()
-    locks_symbol = locks_contract.functions.symbol().call()
-    porridge_symbol = porridge_contract.functions.symbol().call()
-    
-    print(f"Connected to contracts: {honey_symbol}, {locks_symbol}, and {porridge_symbol}")
-except Exception as e:
-    raise Exception(f"Failed to connect to one or more contracts: {e}")
+
+def get_contracts(deployment=None):
+    """
+    Get the contract instances of a deployment, creating them from the shared
+    ABI tables and verifying them on first use.
+
+    Args:
+        deployment: deployments.Deployment (default: the current task's)
+
+    Returns:
+        Dict of "honey", "locks" and "porridge" to contract instances
+    """
+    deployment = deployment or deployments.current()
+    if deployment.name not in _contracts:
+        web3 = get_web3(deployment)
+        contracts = {name: web3.eth.contract(address=address, abi=tables[name].abi)
+                     for name, address in deployments.addresses(deployment).items()}
+
+        # Verify contract connections by calling view functions
+        try:
+            symbols = [contracts[name].functions.symbol().call() for name in deployments.CONTRACTS]
+            logger.info("Connected to contracts: %s, %s, and %s", *symbols)
+        except Exception as e:
+            raise Exception(f"Failed to connect to one or more contracts: {e}")
+        _contracts[deployment.name] = contracts
+    return _contracts[deployment.name]
+
+
+class _CurrentContract:
+    """Stands for a contract of the current task's deployment (see deployments.use_deployment())."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_contracts()[self._name], attr)
+
+
+# Initialize contract instances
+get_contracts(deployments.default_deployment())
+honey_contract = _CurrentContract("honey")
+locks_contract = _CurrentContract("locks")
+porridge_contract = _CurrentContract("porridge")
@@ -0,0 +1,141 @@
+"""
+Protocol deployments for the Goldilocks DeFi bot.
+A deployment is an RPC endpoint plus the HONEY/LOCKS/PORRIDGE addresses.
+The bot runs the one of RPC_URL and the *_ADDRESS settings unless
+DEPLOYMENTS_FILE lists several (e.g. mainnet, a test deployment and a fork),
+each with its own wallets. They run in one process and one event loop and
+share the ABI tables; the deployment a task works on is switched with
+use_deployment(), like the account with web3_utils.use_account().
+
+DEPLOYMENTS_FILE (JSON object of name to deployment):
+    {
+      "mainnet": {"rpc_url": "https://rpc.berachain.com", "honey": "0x...", "locks": "0x...",
+                  "porridge": "0x...", "keys_file": "mainnet-keys.txt"},
+      "test": {"rpc_url": "http://127.0.0.1:8545", "honey": "0x...", "locks": "0x...", "porridge": "0x..."}
+    }
+keys_file lists the private keys of the deployment's wallets (default: PRIVATE_KEY),
+market_data_file an optional market_data.py board of that deployment. The same
+keys may run on several deployments; what the bot keeps per wallet is keyed
+by wallet_key() and its files go to data_dir().
+"""
+import contextlib
+import contextvars
+import json
+import os
+from collections import namedtuple
+
+from web3 import Web3
+
+import config
+
+DEFAULT_NAME = "default"
+CONTRACTS = ("honey", "locks", "porridge")
+
+Deployment = namedtuple("Deployment", "name rpc_url honey locks porridge keys_file market_data_file")
+
+
+def default_deployment():
+    """The deployment of RPC_URL, the *_ADDRESS settings, FLEET_KEYS_FILE and MARKET_DATA_FILE."""
+    return Deployment(DEFAULT_NAME, config.RPC_URL, config.HONEY_ADDRESS, config.LOCKS_ADDRESS,
+                      config.PORRIDGE_ADDRESS, config.FLEET_KEYS_FILE, config.MARKET_DATA_FILE)
+
+
+def load_deployments(path):
+    """
+    Load the deployments of a DEPLOYMENTS_FILE.
+
+    Args:
+        path: JSON file
+
+    Returns:
+        List of Deployment in file order
+
+    Raises:
+        ValueError: A deployment lacks its RPC URL or a contract address
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    deployments = []
+    for name, entry in entries.items():
+        missing = [key for key in ("rpc_url",) + CONTRACTS if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Deployment {name} in {path} lacks {', '.join(missing)}")
+        deployments.append(Deployment(
+            name, entry["rpc_url"], *(Web3.to_checksum_address(entry[c]) for c in CONTRACTS),
+            entry.get("keys_file", ""), entry.get("market_data_file", "")))
+    return deployments
+
+
+# Deployment the current task works on; the default one unless switched with use_deployment()
+_current = contextvars.ContextVar("deployment", default=None)
+
+
+def current():
+    """
+    Get the deployment the current task works on.
+
+    Returns:
+        Deployment
+    """
+    return _current.get() or default_deployment()
+
+
+def is_default():
+    """True while the current task works on the default deployment."""
+    return _current.get() is None or _current.get().name == DEFAULT_NAME
+
+
+@contextlib.contextmanager
+def use_deployment(deployment):
+    """
+    Run the enclosed block (and tasks created in it) on another deployment.
+
+    Args:
+        deployment: Deployment
+    """
+    token = _current.set(deployment)
+    try:
+        yield deployment
+    finally:
+        _current.reset(token)
+
+
+def wallet_key(wallet):
+    """
+    Key of a wallet's state (position model, deferred steps, compounding) on
+    the current deployment; the same wallet may run on several of them.
+
+    Args:
+        wallet: Checksummed wallet address
+
+    Returns:
+        (deployment name, wallet)
+    """
+    return current().name, wallet
+
+
+def data_dir(directory):
+    """
+    Directory for the current deployment's per-wallet files (ledgers, time series).
+
+    Args:
+        directory: LEDGER_DIR or TIMESERIES_DIR
+
+    Returns:
+        The directory itself for the default deployment, its subdirectory named after the deployment otherwise
+    """
+    return directory if is_default() else os.path.join(directory, current().name)
+
+
+def addresses(deployment=None):
+    """
+    Contract addresses of a deployment, keyed like abi_tables.get_tables().
+
+    Args:
+        deployment: Deployment (default: the current one)
+
+    Returns:
+        Dict of "honey", "locks" and "porridge" to checksummed addresses
+    """
+    deployment = deployment or current()
+    return {name: getattr(deployment, name) for name in CONTRACTS}
@@ -2,9 +2,13 @@
 HONEY token logic for the Goldilocks DeFi bot.
 Handles HONEY token related operations.
 """
-import config
-from web3_utils import ACCOUNT, format_amount
+import wallet_settings
+from logger import get_logger, SAMPLED
+from web3_utils import get_account, format_amount, position_value
 from contracts import honey_contract
+from planner import honey_for_stir
+
+logger = get_logger(__name__)
 
 
 def get_honey_balance():
@@ -14,8 +18,10 @@ def get_honey_balance():
     Returns:
         Current HONEY balance
     """
-    balance = honey_contract.functions.balanceOf(ACCOUNT.address).call()
-    print(f"HONEY balance: {format_amount(balance)} HONEY")
+    balance = position_value("honey_balance")
+    if balance is None:
+        balance = honey_contract.functions.balanceOf(get_account().address).call()
+    logger.info("HONEY balance: %s HONEY", format_amount(balance), extra=SAMPLED)
     return balance
 
 
@@ -29,8 +35,8 @@ def get_honey_allowance(spender):
     Returns:
         Current allowance
     """
-    allowance = honey_contract.functions.allowance(ACCOUNT.address, spender).call()
-    print(f"HONEY allowance for {spender}: {format_amount(allowance)}")
+    allowance = honey_contract.functions.allowance(get_account().address, spender).call()
+    logger.info("HONEY allowance for %s: %s", spender, format_amount(allowance), extra=SAMPLED)
     return allowance
 
 
@@ -45,18 +51,4 @@ def check_honey_for_stir(needed_amount, borrowed_amount):
     Returns:
         (honey_to_use, can_stir_full, use_wallet_honey)
     """
-    honey_balance = get_honey_balance()
-    
-    if borrowed_amount >= needed_amount:
-        # Can stir all PORRIDGE
-        return needed_amount, True, False
-    
-    # Need to do partial stir or skip based on settings
-    if not config.ALLOW_WALLET_HONEY:
-        # Only use borrowed honey
-        honey_available = min(honey_balance, borrowed_amount)
-    else:
-        # Use all available honey
-        honey_available = honey_balance
-        
-    return honey_available, False, config.ALLOW_WALLET_HONEY and honey_available > borrowed_amount
+    return honey_for_stir(needed_amount, borrowed_amount, get_honey_balance(), wallet_settings.current().allow_wallet_honey)
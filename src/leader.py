@@ -0,0 +1,221 @@
+"""
+Leader lease for the Goldilocks DeFi bot.
+Lets a second instance run as a hot standby for the same wallets: only the
+holder of the lease sends transactions. The standby keeps its connection,
+ABIs and position snapshots warm and takes over once the leader stops
+renewing the lease, and a leader that lost the lease stops before signing
+anything else.
+
+LEADER_LEASE selects the backend:
+    /run/goldilocks.lock          flock on a lock file; the lease ends with the holder's process
+    sqlite:/var/lib/bot/lease.db  a row with an expiry renewed by heartbeats; also ends when the
+                                  holder hangs, e.g. in a blocking call
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LeaseLost(Exception):
+    """The instance no longer holds the leader lease."""
+
+
+class FileLease:
+    """
+    Lease held through an exclusive flock on a lock file. The kernel releases
+    it when the process exits, so a standby takes over as soon as the leader dies.
+    """
+
+    def __init__(self, path, holder=None):
+        """
+        Args:
+            path: Lock file, created if missing
+            holder: Identity written into the file (default host:pid)
+        """
+        self.path = path
+        self.holder = holder or default_holder()
+        self._file = None
+
+    def acquire(self):
+        """
+        Take the lease if nobody holds it.
+
+        Returns:
+            True when this instance holds the lease
+        """
+        import fcntl
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        f.truncate(0)
+        f.write(self.holder)
+        f.flush()
+        self._file = f
+        return True
+
+    def renew(self):
+        """Keep the lease; the lock needs no heartbeat while the process lives."""
+        return self.held()
+
+    def held(self):
+        return self._file is not None
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteLease:
+    """
+    Lease stored as a row (name, holder, expiry) in an SQLite database. The
+    holder renews it every few seconds; anyone may take it once it expired.
+    """
+
+    def __init__(self, path, ttl, holder=None, name="leader", clock=time.time):
+        """
+        Args:
+            path: Database file, created if missing
+            ttl: Seconds a lease lasts without renewal
+            holder: Identity of this instance (default host:pid)
+            name: Lease name, for several independent leases in one database
+            clock: Wall-clock time source shared by the instances
+        """
+        self.path = path
+        self.ttl = ttl
+        self.holder = holder or default_holder()
+        self.name = name
+        self.clock = clock
+        self.expires_at = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=ttl / 3, isolation_level=None, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT, expires_at REAL)")
+
+    def acquire(self):
+        """
+        Take or renew the lease unless another holder's lease is still valid.
+
+        Returns:
+            True when this instance holds the lease
+        """
+        now = self.clock()
+        self._db.execute("BEGIN IMMEDIATE")  # waits up to a third of the TTL for other instances
+        try:
+            row = self._db.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if row and row[0] != self.holder and row[1] > now:
+                self._db.execute("COMMIT")
+                self.expires_at = None
+                return False
+            self._db.execute("INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                             (self.name, self.holder, now + self.ttl))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self.expires_at = now + self.ttl
+        return True
+
+    def renew(self):
+        """Extend the lease; False when it expired and was taken over meanwhile."""
+        return self.acquire()
+
+    def held(self):
+        return self.expires_at is not None and self.clock() < self.expires_at
+
+    def release(self):
+        self._db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+        self.expires_at = None
+
+
+def default_holder():
+    """Identity of this instance."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def make_lease(spec, ttl):
+    """
+    Build the lease of a LEADER_LEASE value.
+
+    Args:
+        spec: "sqlite:<path>" or the path of a lock file
+        ttl: Seconds an SQLite lease lasts without renewal
+
+    Returns:
+        FileLease or SqliteLease
+    """
+    if spec.startswith("sqlite:"):
+        return SqliteLease(spec[len("sqlite:"):], ttl)
+    return FileLease(spec)
+
+
+_lease = None
+
+
+def set_lease(lease):
+    """Make sending transactions depend on holding a lease (None: always allowed)."""
+    global _lease
+    _lease = lease
+
+
+def check():
+    """
+    Make sure this instance may send transactions; called before signing.
+
+    Raises:
+        LeaseLost: A lease is in use and no longer held
+    """
+    if _lease is not None and not _lease.held():
+        raise LeaseLost("leader lease lost, not signing")
+
+
+async def wait_for_lease(lease, interval, warm=None):
+    """
+    Stand by until the lease is acquired.
+
+    Args:
+        lease: FileLease or SqliteLease
+        interval: Seconds between attempts
+        warm: Optional function called between attempts to keep caches and connections warm
+    """
+    while True:
+        try:
+            if lease.acquire():
+                return
+        except Exception as e:
+            logger.warning("Leader lease check failed: %s", e)
+        if warm:
+            try:
+                warm()
+            except Exception as e:
+                logger.warning("Standby warm-up failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+async def keep_lease(lease, interval):
+    """
+    Renew the lease until it is lost.
+
+    Args:
+        lease: Held FileLease or SqliteLease
+        interval: Seconds between renewals, well below the TTL
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            lease.renew()
+        except Exception as e:
+            logger.warning("Leader lease renewal failed: %s", e)  # still held until it expires
+        if not lease.held():
+            return
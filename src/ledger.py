@@ -0,0 +1,185 @@
+"""
+Ledger module for the Goldilocks DeFi bot.
+Appends what each of the bot's own transactions did (gas paid, HONEY
+borrowed/repaid, PRG claimed/stirred, LOCKS bought/staked) to a per-wallet
+file of fixed-width records, so analytics.py can load the whole history as
+columnar arrays. Entries are decoded from the receipt events, like the
+position model.
+
+Usage:
+    python ledger.py ../ledger/0xYourWallet.ledger --last 20
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+MAGIC = b"GLLG"
+FORMAT_VERSION = 1
+
+# Entry kinds; the index is stored in the record
+KINDS = ("tx", "borrow", "repay", "claim", "stir", "buy", "stake", "unstake", "staked")
+KIND = {name: index for index, name in enumerate(KINDS)}
+
+# Wallet events and the kind they are recorded as
+EVENT_KINDS = {
+    ("porridge", "Borrow"): "borrow",
+    ("porridge", "Repay"): "repay",
+    ("porridge", "Claim"): "claim",
+    ("porridge", "Stir"): "stir",
+    ("porridge", "Stake"): "stake",
+    ("porridge", "Unstake"): "unstake",
+    ("locks", "Buy"): "buy",
+}
+
+# Header: magic, version, record size
+HEADER = struct.Struct("<4sII")
+HEADER_SIZE = 16
+# Record: block, unix timestamp, kind, then token amounts as float64:
+#   amount: tokens of the event (HONEY for borrow/repay, PRG for claim/stir, LOCKS for buy/stake/unstake,
+#           staked LOCKS after the transaction for "staked")
+#   honey:  HONEY the wallet paid in the same transaction (stir and buy)
+#   gas:    native token paid for gas ("tx" entries)
+RECORD = struct.Struct("<QQB7xddd")
+
+# numpy.dtype(DTYPE) describes the records (np.fromfile(path, DTYPE, offset=HEADER_SIZE))
+DTYPE = [("block", "<u8"), ("timestamp", "<u8"), ("kind", "u1"), ("_pad", "V7"),
+         ("amount", "<f8"), ("honey", "<f8"), ("gas", "<f8")]
+
+PRECISION = 10 ** 18
+
+
+def entries_from_receipt(decoded, wallet, receipt, staked=None):
+    """
+    Ledger entries for one of the wallet's receipts.
+
+    Args:
+        decoded: Receipt logs decoded with position.decode_log() (None for foreign logs)
+        wallet: Checksummed wallet address
+        receipt: Transaction receipt
+        staked: Staked LOCKS in wei after the transaction, if known
+
+    Returns:
+        List of (kind, amount, honey, gas) with token amounts in wei
+    """
+    wallet = wallet.lower()
+    gas_paid = receipt["gasUsed"] * receipt.get("effectiveGasPrice", 0)
+    entries = [("tx", 0, 0, gas_paid)]
+    honey_paid = sum(args["amount"] for contract, name, args in filter(None, decoded)
+                     if (contract, name) == ("honey", "Transfer") and args["from"].lower() == wallet)
+    for contract, name, args in filter(None, decoded):
+        kind = EVENT_KINDS.get((contract, name))
+        if kind and args["user"].lower() == wallet:
+            entries.append((kind, args["amount"], honey_paid if kind in ("stir", "buy") else 0, 0))
+    if staked is not None:
+        entries.append(("staked", staked, 0, 0))
+    return entries
+
+
+class Ledger:
+    """
+    Append-only file of ledger records for one wallet.
+    """
+
+    def __init__(self, path):
+        """
+        Open or create a ledger file.
+
+        Args:
+            path: File path
+        """
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size).ljust(HEADER_SIZE, b"\0"))
+        with open(path, "rb") as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} ledger file")
+
+    def append(self, block, timestamp, entries):
+        """
+        Append entries in one write, so readers never see part of a transaction.
+
+        Args:
+            block: Block number of the transaction
+            timestamp: Unix time
+            entries: List of (kind, amount, honey, gas) with token amounts in wei
+        """
+        data = b"".join(RECORD.pack(block, int(timestamp), KIND[kind], amount / PRECISION,
+                                    honey / PRECISION, gas / PRECISION) for kind, amount, honey, gas in entries)
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def read(self, last=None):
+        """
+        Read the newest records, oldest first.
+
+        Args:
+            last: Number of records (default: all)
+
+        Returns:
+            List of (block, timestamp, kind name, amount, honey, gas)
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()[HEADER_SIZE:]
+        count = len(data) // RECORD.size  # a record being appended is skipped
+        first = 0 if last is None else max(0, count - last)
+        records = []
+        for i in range(first, count):
+            block, timestamp, kind, amount, honey, gas = RECORD.unpack_from(data, i * RECORD.size)
+            records.append((block, timestamp, KINDS[kind], amount, honey, gas))
+        return records
+
+
+_ledgers = {}
+
+
+def get_ledger(directory, wallet):
+    """
+    Get the ledger of a wallet, opening it once per process.
+
+    Args:
+        directory: Directory holding one <wallet>.ledger file per wallet
+        wallet: Wallet address
+
+    Returns:
+        Ledger instance
+    """
+    path = os.path.join(directory, f"{wallet}.ledger")
+    if path not in _ledgers:
+        _ledgers[path] = Ledger(path)
+    return _ledgers[path]
+
+
+def write_settings(directory, wallet, settings):
+    """
+    Store the settings a wallet runs with next to its ledger, for the fleet
+    comparison in analytics.py.
+
+    Args:
+        directory: Ledger directory
+        wallet: Wallet address
+        settings: Dict of setting name to value
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{wallet}.json"), "w") as f:
+        json.dump(settings, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the newest records of a ledger file")
+    parser.add_argument("path", help="ledger file written with LEDGER_DIR")
+    parser.add_argument("--last", type=int, default=20, help="number of records to show")
+    args = parser.parse_args()
+
+    print(f"{'block':>10} {'time':>19} {'kind':>8} {'amount':>14} {'honey':>14} {'gas':>12}")
+    for block, timestamp, kind, amount, honey, gas in Ledger(args.path).read(args.last):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+        print(f"{block:>10} {stamp:>19} {kind:>8} {amount:>14.4f} {honey:>14.4f} {gas:>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Load-test entry point for the Goldilocks DeFi bot.
+Runs full protocol cycles for many synthetic wallets against the local
+JSON-RPC stand-in, ramping concurrency, and writes a JSON report with cycle
+throughput, latency percentiles, RPC requests per cycle, event-loop lag and
+memory use.
+
+Usage:
+    python loadtest.py --wallets 2000 --concurrency 1,10,100,500 --output loadtest.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+from eth_account import Account
+from eth_utils import keccak
+
+import rpc_stub
+
+PRECISION = 10 ** 18
+REPORT_VERSION = 1
+
+
+def synthetic_accounts(count):
+    """
+    Derive deterministic throwaway accounts.
+
+    Args:
+        count: Number of accounts
+
+    Returns:
+        List of LocalAccount
+    """
+    return [Account.from_key(keccak(f"goldilocks-loadtest-{i}".encode())) for i in range(count)]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (0 for an empty list)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def rss_bytes():
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def _probe_loop_lag(lags, interval, stop):
+    """Record how late the event loop wakes a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_level(bot, use_account, chain, accounts, concurrency):
+    """
+    Run one cycle for every wallet with the given concurrency.
+
+    Returns:
+        Metrics dict for this level
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    lags = []
+    stop = asyncio.Event()
+
+    async def one_wallet(account):
+        nonlocal errors
+        async with semaphore:
+            with use_account(account):
+                start = time.perf_counter()
+                try:
+                    await bot.run_protocol_cycle()
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    probe = asyncio.create_task(_probe_loop_lag(lags, 0.01, stop))
+    requests_before = chain.request_count
+    start = time.perf_counter()
+    await asyncio.gather(*(one_wallet(account) for account in accounts))
+    duration = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    cycles = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "cycles": cycles,
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "cycles_per_second": round(cycles / duration, 2) if duration else 0,
+        "cycle_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0) * 1000, 2),
+        },
+        "rpc_requests_per_cycle": round((chain.request_count - requests_before) / cycles, 2) if cycles else 0,
+        "event_loop_lag_ms": {
+            "p50": round(percentile(lags, 50) * 1000, 2),
+            "p99": round(percentile(lags, 99) * 1000, 2),
+            "max": round(max(lags, default=0) * 1000, 2),
+        },
+        "rss_mb": round(rss_bytes() / 2 ** 20, 1),
+    }
+
+
+def fresh_chain(args, accounts):
+    """Build a stub chain where every wallet has a full cycle of work."""
+    chain = rpc_stub.StubChain(block_time=args.block_time, latency=args.latency,
+                               error_rate=args.error_rate, clock=lambda: 1_700_000_000)
+    for account in accounts:
+        chain.fund(account.address, honey=5 * PRECISION, porridge=10 * PRECISION, staked=100 * PRECISION)
+    return chain
+
+
+async def run(args, server=None):
+    """
+    Start the stub, import the bot against it and ramp through the concurrency levels.
+
+    Args:
+        args: Parsed command line arguments
+        server: Running StubServer the bot is already configured against; by default one is started
+
+    Returns:
+        Report dict
+    """
+    accounts = synthetic_accounts(args.wallets)
+    own_server = server is None
+    if own_server:
+        server = rpc_stub.StubServer(fresh_chain(args, accounts[:1]))
+        server.start()
+
+        # The bot modules connect at import time, so configure them first
+        os.environ.update({
+            "RPC_URL": server.url,
+            "PRIVATE_KEY": accounts[0].key.hex(),
+            "WEBHOOK_URL": f"{server.url}/webhook",
+            "HONEY_ADDRESS": rpc_stub.HONEY_ADDRESS,
+            "LOCKS_ADDRESS": rpc_stub.LOCKS_ADDRESS,
+            "PORRIDGE_ADDRESS": rpc_stub.PORRIDGE_ADDRESS,
+            "SUBSCRIPTION_URL": "",
+            "LOG_LEVEL": args.log_level,
+        })
+    import main as bot
+    from web3_utils import use_account
+
+    levels = []
+    rss_start = rss_bytes()
+    for concurrency in args.concurrency:
+        chain = fresh_chain(args, accounts)
+        server.chain = chain
+        bot.reset_wallet_state()  # models and deferred steps of the previous level describe its chain
+        metrics = await run_level(bot, use_account, chain, accounts, concurrency)
+        print(f"concurrency={concurrency}: {metrics['cycles_per_second']} cycles/s, "
+              f"p99 {metrics['cycle_latency_ms']['p99']} ms, "
+              f"{metrics['rpc_requests_per_cycle']} RPC/cycle", file=sys.stderr)
+        levels.append(metrics)
+    if own_server:
+        server.shutdown()
+
+    return {
+        "version": REPORT_VERSION,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "params": {
+            "wallets": args.wallets,
+            "concurrency": args.concurrency,
+            "block_time": args.block_time,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+        },
+        "rss_start_mb": round(rss_start / 2 ** 20, 1),
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot against the local RPC stand-in")
+    parser.add_argument("--wallets", type=int, default=500, help="number of synthetic wallets")
+    parser.add_argument("--concurrency", default="1,10,100",
+                        type=lambda s: [int(c) for c in s.split(",")],
+                        help="comma-separated concurrency levels to ramp through")
+    parser.add_argument("--block-time", type=float, default=0, help="stub seconds per block, 0 mines instantly")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub latency added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub probability of a failed request")
+    parser.add_argument("--log-level", default="WARNING", help="bot log level during the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
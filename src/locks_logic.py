@@ -2,10 +2,14 @@
 LOCKS token logic for the Goldilocks DeFi bot.
 Handles LOCKS token related operations.
 """
-import config
-from web3_utils import ACCOUNT, send_tx, approve_if_needed, format_amount
+import wallet_settings
+from logger import get_logger, SAMPLED
+from web3_utils import get_account, send_tx, approve_if_needed, format_amount, position_value, market_value
 from contracts import locks_contract
 from honey_logic import get_honey_balance
+from planner import stirable_porridge, swap_honey_amount, locks_for_honey
+
+logger = get_logger(__name__)
 
 
 def get_locks_balance():
@@ -15,8 +19,10 @@ def get_locks_balance():
     Returns:
         Current LOCKS balance
     """
-    balance = locks_contract.functions.balanceOf(ACCOUNT.address).call()
-    print(f"LOCKS balance: {format_amount(balance)} LOCKS")
+    balance = position_value("locks_balance")
+    if balance is None:
+        balance = locks_contract.functions.balanceOf(get_account().address).call()
+    logger.info("LOCKS balance: %s LOCKS", format_amount(balance), extra=SAMPLED)
     return balance
 
 
@@ -27,8 +33,10 @@ def get_floor_price():
     Returns:
         Current floor price (HONEY per LOCKS)
     """
-    floor_price = locks_contract.functions.floorPrice().call()
-    print(f"Floor price: {format_amount(floor_price)} HONEY per LOCKS")
+    floor_price = market_value("floor_price")
+    if floor_price is None:
+        floor_price = locks_contract.functions.floorPrice().call()
+    logger.info("Floor price: %s HONEY per LOCKS", format_amount(floor_price), extra=SAMPLED)
     return floor_price
 
 def get_market_price():
@@ -38,8 +46,10 @@ def get_market_price():
     Returns:
         Current market price (HONEY per LOCKS)
     """
-    market_price = locks_contract.functions.marketPrice().call()
-    print(f"Market price: {format_amount(market_price)} HONEY per LOCKS")
+    market_price = market_value("market_price")
+    if market_price is None:
+        market_price = locks_contract.functions.marketPrice().call()
+    logger.info("Market price: %s HONEY per LOCKS", format_amount(market_price), extra=SAMPLED)
     return market_price
 
 
@@ -54,11 +64,7 @@ def calculate_stirable_porridge(honey_amount, floor_price):
     Returns:
         Amount of PORRIDGE that can be stirred
     """
-    if floor_price == 0:
-        return 0
-        
-    stirable_prg = (honey_amount * 10 ** 18) // floor_price
-    return stirable_prg
+    return stirable_porridge(honey_amount, floor_price)
 
 
 async def swap_honey_to_locks(borrowed_amount=0, honey_used=0):
@@ -74,39 +80,38 @@ async def swap_honey_to_locks(borrowed_amount=0, honey_used=0):
     Returns:
         Amount of HONEY swapped or 0 if none
     """
-    if not config.SWAP_LEFTOVER_HONEY:
-        print("SWAP_LEFTOVER_HONEY is disabled, skipping swap")
+    settings = wallet_settings.current()
+    if not settings.swap_leftover_honey:
+        logger.info("SWAP_LEFTOVER_HONEY is disabled, skipping swap")
         return 0
 
     try:
         # Determine how much HONEY to swap
-        leftover_borrowed = max(0, borrowed_amount - honey_used)
-
-        if config.SWAP_ALL_WALLET_HONEY:
+        if settings.swap_all_wallet_honey:
             # Swap 95% of all available HONEY if SWAP_ALL_WALLET_HONEY is enabled
             total_honey = get_honey_balance()
-            honey_balance = int(total_honey * 0.95)  # Leave 5% buffer
-            print(
-                f"SWAP_ALL_WALLET_HONEY is enabled, swapping 95% of wallet HONEY ({format_amount(honey_balance)} of {format_amount(total_honey)})")
+            honey_balance = swap_honey_amount(borrowed_amount, honey_used, total_honey, True)
+            logger.info("SWAP_ALL_WALLET_HONEY is enabled, swapping 95%% of wallet HONEY (%s of %s)",
+                        format_amount(honey_balance), format_amount(total_honey))
         else:
             # Only swap leftover borrowed HONEY
-            honey_balance = leftover_borrowed
-            print(f"Swapping only leftover borrowed HONEY: {format_amount(honey_balance)}")
+            honey_balance = swap_honey_amount(borrowed_amount, honey_used, 0, False)
+            logger.info("Swapping only leftover borrowed HONEY: %s", format_amount(honey_balance))
 
         if honey_balance <= 0:
-            print("No HONEY to swap")
+            logger.info("No HONEY to swap")
             return 0
 
         # Approve HONEY for locks contract
-        await approve_if_needed(honey_contract, config.LOCKS_ADDRESS, honey_balance)
+        await approve_if_needed(honey_contract, locks_contract.address, honey_balance)
 
         # Get floor price for calculation
         market_price = get_market_price()
 
         # Estimate LOCKS amount based on floor price and slippage 5%
-        locks_amount = int((honey_balance * 10**18) / market_price * 0.95)
+        locks_amount = locks_for_honey(honey_balance, market_price)
 
-        print(f"Buying approximately {format_amount(locks_amount)} LOCKS with max {format_amount(honey_balance)} HONEY")
+        logger.info("Buying approximately %s LOCKS with max %s HONEY", format_amount(locks_amount), format_amount(honey_balance))
 
         # Execute buy
         receipt = await send_tx(locks_contract.functions.buy(locks_amount, honey_balance))
@@ -122,13 +127,13 @@ async def swap_honey_to_locks(borrowed_amount=0, honey_used=0):
                 continue
 
         if swapped_amount > 0:
-            print(f"Successfully bought {format_amount(swapped_amount)} LOCKS")
+            logger.info("Successfully bought %s LOCKS", format_amount(swapped_amount))
         else:
-            print(f"Buy transaction confirmed, but couldn't verify amount from events")
+            logger.warning("Buy transaction confirmed, but couldn't verify amount from events")
 
         return honey_balance
     except Exception as e:
-        print(f"Error in swap_honey_to_locks: {e}")
+        logger.error("Error in swap_honey_to_locks: %s", e)
         raise
 
 
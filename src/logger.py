@@ -0,0 +1,178 @@
+"""
+Logging module for the Goldilocks DeFi bot.
+Provides structured JSON-lines logging with per-wallet/cycle/step context,
+written to the output by a background thread.
+"""
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+import config
+
+# Pass as `extra=SAMPLED` on noisy per-read messages so LOG_SAMPLE_RATE applies to them
+SAMPLED = {"sampled": True}
+
+# Fields bound by `bind()` for the current task (wallet, cycle, step, ...)
+_context = contextvars.ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "context", "sampled"}
+
+_listener = None
+
+
+@contextlib.contextmanager
+def bind(**fields):
+    """
+    Add context fields to every log record emitted inside the block.
+
+    Args:
+        **fields: Context fields, e.g. wallet, cycle or step
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def get_logger(name):
+    """
+    Get a bot logger.
+
+    Args:
+        name: Module name, usually __name__
+
+    Returns:
+        logging.Logger below the "goldilocks" hierarchy
+    """
+    return logging.getLogger(f"goldilocks.{name}")
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attaches the bound context to the record.
+    Runs on the emitting thread, before the record crosses the queue.
+    """
+
+    def filter(self, record):
+        record.context = _context.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through only a fraction of the records marked as sampled.
+    Sampling is deterministic per message template: with a rate of 0.1 every
+    tenth `HONEY balance: ...` line is kept.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        if self.every == 0:
+            return False
+        with self._lock:
+            count = self._counts.get(record.msg, 0)
+            self._counts[record.msg] = count + 1
+        return count % self.every == 0
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that renders the message on the emitting thread but leaves
+    formatting (and the traceback layout) to the listener's formatter.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats records as readable console lines with the bound context as a prefix.
+    """
+
+    def format(self, record):
+        context = getattr(record, "context", {})
+        prefix = " ".join(f"{k}={v}" for k, v in context.items())
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{stamp} {record.levelname:<7} {prefix + ' ' if prefix else ''}{record.getMessage()}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def setup_logging():
+    """
+    Configure the "goldilocks" logger: records are filtered and queued on the
+    calling thread and formatted/written by a QueueListener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if config.LOG_FILE:
+        output = logging.FileHandler(config.LOG_FILE)
+    else:
+        output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLE_RATE))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger("goldilocks")
+    root.setLevel(config.LOG_LEVEL)
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+setup_logging()
@@ -0,0 +1,190 @@
+"""
+Event-loop lag monitor for the Goldilocks DeFi bot.
+The cycles run in one event loop, but sending transactions, the logic
+modules' RPC reads and the Discord webhook are synchronous calls made from
+coroutines; while one of them runs, every other wallet's cycle waits.
+
+A heartbeat task measures how late the loop wakes it (the lag). A watchdog
+thread samples the loop thread's stack while the heartbeat is overdue, so a
+lag above LOOP_LAG_THRESHOLD is charged to the bot's code line that was
+blocking (e.g. web3_utils.py:310 in send_tx). The full stack is logged the
+first time a line blocks, and the lines with the most blocked time are
+reported every LOOP_LAG_REPORT_INTERVAL seconds, worst first.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+_PATH = os.path.abspath(__file__)
+SRC_DIR = os.path.dirname(_PATH)
+UNKNOWN_SITE = "unknown"
+
+
+def callsite(frame, roots=(SRC_DIR,)):
+    """
+    Innermost frame of the bot's own code in a stack.
+
+    Args:
+        frame: Innermost frame of the stack
+        roots: Directories of the code to charge blocking to
+
+    Returns:
+        "file.py:line function", or UNKNOWN_SITE when no frame is in roots
+    """
+    while frame is not None:
+        path = os.path.abspath(frame.f_code.co_filename)
+        if path != _PATH and any(path.startswith(root + os.sep) for root in roots):
+            return f"{os.path.basename(path)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return UNKNOWN_SITE
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and charges blocked time to callsites.
+    """
+
+    def __init__(self, threshold, interval=None, report_interval=600, roots=(SRC_DIR,), top=10):
+        """
+        Args:
+            threshold: Seconds of lag counted as a blocking call
+            interval: Seconds between heartbeats and stack samples (default a quarter of the threshold)
+            report_interval: Seconds between reports of the worst callsites (0: only on log_report())
+            roots: Directories of the code to charge blocking to
+            top: Callsites per report
+        """
+        self.threshold = threshold
+        self.interval = interval or threshold / 4
+        self.report_interval = report_interval
+        self.roots = tuple(os.path.abspath(root) for root in roots)
+        self.top = top
+        self.sites = {}  # callsite -> [blocks, blocked seconds, longest block]
+        self.beats = 0
+        self.max_lag = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+        self._samples = {}  # callsite -> samples taken since the last heartbeat
+        self._stacks = {}  # callsite -> stack of the first sample
+        self._due = None
+        self._thread_id = None
+        self._stopped = threading.Event()
+
+    async def run(self):
+        """Heartbeat task; starts the watchdog thread and runs until cancelled."""
+        self._thread_id = threading.get_ident()
+        self._due = time.monotonic() + self.interval
+        self._stopped.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        watchdog.start()
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self.beat(now - self._due)
+                self._due = now + self.interval
+                if self.report_interval and now >= next_report:
+                    self.log_report()
+                    next_report = now + self.report_interval
+        finally:
+            self._stopped.set()
+
+    def _watch(self):
+        """Watchdog thread: sample the loop thread's stack while the heartbeat is overdue."""
+        while not self._stopped.wait(self.interval):
+            due = self._due
+            if due is None or time.monotonic() <= due + self.interval:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            site = callsite(frame, self.roots)
+            with self._lock:
+                self._samples[site] = self._samples.get(site, 0) + 1
+                if site not in self._stacks and site not in self.sites:
+                    self._stacks[site] = "".join(traceback.format_stack(frame))
+            del frame
+
+    def beat(self, lag):
+        """
+        Account for a heartbeat that woke up lag seconds late.
+        A lag above the threshold is split between the callsites sampled
+        during it; a shorter one only counts towards the lag statistics.
+
+        Args:
+            lag: Seconds the heartbeat was late
+        """
+        with self._lock:
+            samples, self._samples = self._samples, {}
+            stacks, self._stacks = self._stacks, {}
+        self.beats += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+        self.blocked += lag
+        total = sum(samples.values())
+        for site, count in (samples.items() if total else [(UNKNOWN_SITE, 1)]):
+            seconds = lag * count / (total or 1)
+            stats = self.sites.setdefault(site, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            if site in stacks:
+                logger.warning("Event loop blocked %.3f s at %s:\n%s", lag, site, stacks[site].rstrip(),
+                               extra={"callsite": site, "blocked_s": round(lag, 3)})
+
+    def worst(self, n=None):
+        """
+        Callsites by blocked time.
+
+        Args:
+            n: Number of callsites (default all)
+
+        Returns:
+            List of (callsite, blocks, blocked seconds, longest block), worst first
+        """
+        ranked = sorted(((site, *stats) for site, stats in self.sites.items()), key=lambda row: -row[2])
+        return ranked[:n]
+
+    def log_report(self):
+        """Log the lag statistics and the callsites that blocked the loop the longest."""
+        logger.info("Event loop: %s heartbeats, max lag %.3f s, %.2f s blocked at %s callsites",
+                    self.beats, self.max_lag, self.blocked, len(self.sites),
+                    extra={"max_lag_s": round(self.max_lag, 3), "blocked_s": round(self.blocked, 3)})
+        for site, blocks, seconds, longest in self.worst(self.top):
+            logger.info("Blocked %.2f s in %s calls (longest %.3f s) at %s", seconds, blocks, longest, site,
+                        extra={"callsite": site, "blocked_s": round(seconds, 3), "blocks": blocks})
+
+
+_monitor = None
+_task = None
+
+
+def start(threshold, report_interval):
+    """
+    Start monitoring the running event loop.
+
+    Args:
+        threshold: Seconds of lag counted as a blocking call
+        report_interval: Seconds between reports
+
+    Returns:
+        Heartbeat task
+    """
+    global _monitor, _task
+    _monitor = LoopMonitor(threshold, report_interval=report_interval)
+    _task = asyncio.create_task(_monitor.run())
+    return _task
+
+
+def log_report():
+    """Log the report of the running monitor, e.g. on shutdown."""
+    if _monitor is not None:
+        _monitor.log_report()
@@ -3,170 +3,596 @@ Main execution module for the Goldilocks DeFi bot.
 Coordinates the protocol interaction cycle.
 """
 import asyncio
+import contextlib
 import sys
 
 import config
-from web3_utils import ACCOUNT
+from deployments import data_dir, default_deployment, load_deployments, use_deployment, wallet_key
+from logger import get_logger, bind
+from web3_utils import ACCOUNT, get_account, record_samples, recording_cycle, resync_position, use_account, w3
+from subscriptions import start_stream, get_stream
 from honey_logic import get_honey_balance
 from locks_logic import swap_honey_to_locks
 from porridge_logic import (
-    borrow_if_possible, 
-    claim_porridge, 
-    stir_porridge, 
+    schedule_cycle,
+    borrow_if_possible,
+    claim_porridge,
+    stir_porridge,
     stake_all_locks
 )
 from notifications import send_discord_message, EventMessageCollector
+from tracing import span, set_attributes
+from compounding import next_cycle_in, reset_wallets
+from budget import BudgetExceeded, CycleBudget, defer_step, has_deferred, reset_deferred, take_deferred
+import leader
+import ledger
+import loop_monitor
+import memory_guard
+import wallet_settings
+from planner import settings_from_config
+from position import get_position, reset_positions
+from simulation import simulate_wallet
+from scanner import FleetScanner, load_accounts
+
+logger = get_logger(__name__)
 
 
 async def run_protocol_cycle():
     """
     Run a single protocol cycle: borrow → claim → stir → swap → stake.
+    With compound_optimizer the cycle first checks that it is worth its gas.
 
     Returns:
         Success status
     """
     event_collector = EventMessageCollector()
+    budget = CycleBudget(config.CYCLE_BUDGET, config.STEP_BUDGETS)
+
+    # Steps the previous cycle ran out of time for
+    deferred = take_deferred(get_account().address)
+    if deferred:
+        # Their transactions may have been mined after the steps were cancelled
+        resync_position(get_account().address)
+    if "swap" in deferred:
+        borrowed, used = deferred["swap"]
+        # Clamped to the balance in case the cancelled swap went through after all
+        await swap_step(budget, event_collector, min(borrowed - used, get_honey_balance()), 0)
+    if deferred:
+        await stake_step(budget, event_collector)  # also stakes the LOCKS of a deferred swap
+
+    # Step 0: Skip the cycle while its gas exceeds the compounding gain
+    borrow_threshold = None
+    settings = wallet_settings.current()
+    if settings.compound_optimizer:
+        with bind(step="schedule"), span("schedule_cycle"):
+            decision = schedule_cycle()
+            set_attributes(run=decision.run, claimable=decision.claimable, threshold=decision.threshold,
+                           gas_cost=decision.gas_cost)
+        if not decision.run:
+            if deferred:
+                event_collector.send()
+            return False
+        borrow_threshold = 1  # The computed threshold replaces BORROW_THRESHOLD
+
+    # Leave out the steps whose transactions would revert
+    skipped = {}
+    if config.SIMULATE_CYCLE:
+        skipped = simulate_step(borrow_threshold)
+        if "borrow" in skipped:
+            if deferred:
+                event_collector.send()
+            return False
+        for step, reason in skipped.items():
+            event_collector.add_warning(f"{step.capitalize()} skipped, its simulation reverted: {reason[:100]}")
 
     # Step 1: Borrow if possible
-    can_borrow, borrowed_amount = await borrow_if_possible()
+    with bind(step="borrow"), span("borrow_if_possible"):
+        try:
+            can_borrow, borrowed_amount = await budget.run("borrow", borrow_if_possible(borrow_threshold))
+        except BudgetExceeded as e:
+            logger.warning("Borrow cancelled: %s", e)
+            can_borrow, borrowed_amount = False, 0
+        set_attributes(can_borrow=can_borrow, borrowed=borrowed_amount)
     if not can_borrow:
+        if deferred:
+            event_collector.send()
         return False  # Skip the rest of the cycle
 
     event_collector.add_success(f"Borrowed {borrowed_amount / 10 ** 18:.4f} HONEY")
 
     # Step 2: Claim PORRIDGE
-    try:
-        claimed_amount = await claim_porridge()
-        if claimed_amount > 0:
-            event_collector.add_success(f"Claimed {claimed_amount / 10 ** 18:.4f} PORRIDGE")
-        else:
-            event_collector.add_info("No PORRIDGE to claim")
-    except Exception as e:
-        print(f"Error claiming PORRIDGE: {e}")
-        event_collector.add_error(f"Claim PORRIDGE failed: {str(e)[:100]}")
+    if "claim" not in skipped:
+        with bind(step="claim"):
+            try:
+                with span("claim_porridge"):
+                    claimed_amount = await budget.run("claim", claim_porridge())
+                    set_attributes(claimed=claimed_amount)
+                if claimed_amount > 0:
+                    event_collector.add_success(f"Claimed {claimed_amount / 10 ** 18:.4f} PORRIDGE")
+                else:
+                    event_collector.add_info("No PORRIDGE to claim")
+            except Exception as e:
+                logger.error("Error claiming PORRIDGE: %s", e)
+                event_collector.add_error(f"Claim PORRIDGE failed: {str(e)[:100]}")
 
     # Step 3: Stir PORRIDGE
     honey_used = 0  # Track how much HONEY was used for stirring
-    try:
-        stir_ok, leftover_prg, honey_used, stir_percentage = await stir_porridge(borrowed_amount)
-        if stir_ok:
-            if stir_percentage == 100:
-                event_collector.add_success(f"Stirred 100% of PORRIDGE using {honey_used / 10 ** 18:.4f} HONEY")
-            else:
-                event_collector.add_warning(
-                    f"Stirred ~{stir_percentage}% of PORRIDGE using {honey_used / 10 ** 18:.4f} HONEY")
-        else:
-            event_collector.add_error("Not enough HONEY to stir PORRIDGE")
-    except Exception as e:
-        print(f"Error stirring PORRIDGE: {e}")
-        event_collector.add_error(f"Stir transaction failed: {str(e)[:100]}")
+    if "stir" not in skipped:
+        with bind(step="stir"):
+            try:
+                with span("stir_porridge"):
+                    stir_ok, leftover_prg, honey_used, stir_percentage = await budget.run(
+                        "stir", stir_porridge(borrowed_amount))
+                    set_attributes(stir_ok=stir_ok, honey_used=honey_used, stir_percentage=stir_percentage)
+                if stir_ok:
+                    if stir_percentage == 100:
+                        event_collector.add_success(f"Stirred 100% of PORRIDGE using {honey_used / 10 ** 18:.4f} HONEY")
+                    else:
+                        event_collector.add_warning(
+                            f"Stirred ~{stir_percentage}% of PORRIDGE using {honey_used / 10 ** 18:.4f} HONEY")
+                else:
+                    event_collector.add_error("Not enough HONEY to stir PORRIDGE")
+            except Exception as e:
+                logger.error("Error stirring PORRIDGE: %s", e)
+                event_collector.add_error(f"Stir transaction failed: {str(e)[:100]}")
 
     # Step 4: Swap leftover HONEY (if enabled)
-    if config.SWAP_LEFTOVER_HONEY:
+    if settings.swap_leftover_honey and "swap" not in skipped:
+        await swap_step(budget, event_collector, borrowed_amount, honey_used)
+
+    # Step 5: Stake LOCKS
+    if "stake" not in skipped:
+        await stake_step(budget, event_collector)
+
+    # Send cycle summary to Discord
+    event_collector.send()
+
+    return True
+
+
+def simulate_step(borrow_threshold):
+    """
+    Simulate the cycle's transactions before any of them is signed.
+
+    Args:
+        borrow_threshold: Threshold of the optimizer, None for the wallet's borrow_threshold
+
+    Returns:
+        Dict of step to revert reason for the steps to leave out (empty when the simulation failed)
+    """
+    settings = settings_from_config()
+    if borrow_threshold is not None:
+        settings = settings._replace(borrow_threshold=borrow_threshold)
+    with bind(step="simulate"), span("simulate_cycle"):
         try:
-            swapped = await swap_honey_to_locks(borrowed_amount, honey_used)
+            cycle = simulate_wallet(w3, get_account().address, settings)
+        except Exception as e:
+            logger.warning("Cycle simulation failed, running the cycle unsimulated: %s", e)
+            return {}
+        set_attributes(actions=len(cycle.actions), skipped=",".join(cycle.skipped))
+    return cycle.skipped
+
+
+async def swap_step(budget, event_collector, borrowed_amount, honey_used):
+    """
+    Swap leftover HONEY to LOCKS; left for the next cycle when out of time.
+
+    Args:
+        budget: CycleBudget of the cycle
+        event_collector: EventMessageCollector of the cycle
+        borrowed_amount: HONEY borrowed in the cycle
+        honey_used: HONEY used for stirring in the cycle
+    """
+    with bind(step="swap"):
+        try:
+            with span("swap_honey_to_locks"):
+                swapped = await budget.run("swap", swap_honey_to_locks(borrowed_amount, honey_used))
+                set_attributes(swapped=swapped)
             if swapped > 0:
                 event_collector.add_success(f"Swapped leftover {swapped / 10 ** 18:.4f} HONEY to LOCKS")
+        except BudgetExceeded as e:
+            logger.warning("Swap left for the next cycle: %s", e)
+            defer_step(get_account().address, "swap", borrowed_amount, honey_used)
+            event_collector.add_warning("HONEY swap left for the next cycle (time budget)")
         except Exception as e:
-            print(f"Error swapping HONEY: {e}")
+            logger.error("Error swapping HONEY: %s", e)
             event_collector.add_error(f"HONEY swap failed: {str(e)[:100]}")
 
-    # Step 5: Stake LOCKS
-    try:
-        staked = await stake_all_locks()
-        if staked:
-            event_collector.add_success("Staked LOCKS")
-    except Exception as e:
-        print(f"Error staking LOCKS: {e}")
-        event_collector.add_error(f"Staking failed: {str(e)[:100]}")
 
-    # Send cycle summary to Discord
-    event_collector.send()
+async def stake_step(budget, event_collector):
+    """
+    Stake all LOCKS; left for the next cycle when out of time.
 
-    return True
+    Args:
+        budget: CycleBudget of the cycle
+        event_collector: EventMessageCollector of the cycle
+    """
+    with bind(step="stake"):
+        try:
+            with span("stake_all_locks"):
+                staked = await budget.run("stake", stake_all_locks())
+                set_attributes(staked=staked)
+            if staked:
+                event_collector.add_success("Staked LOCKS")
+        except BudgetExceeded as e:
+            logger.warning("Stake left for the next cycle: %s", e)
+            defer_step(get_account().address, "stake")
+            event_collector.add_warning("Staking left for the next cycle (time budget)")
+        except Exception as e:
+            logger.error("Error staking LOCKS: %s", e)
+            event_collector.add_error(f"Staking failed: {str(e)[:100]}")
 
 
-async def main_loop():
+def cycle_wait(wallet):
     """
-    Main bot loop. Runs protocol cycles at specified intervals.
+    Seconds until a wallet's next cycle: longer while compounding is
+    deferred, at most DEFERRED_STEP_RETRY while steps wait for it.
+
+    Args:
+        wallet: Wallet address
+
+    Returns:
+        Seconds to wait
     """
-    print(f"Bot starting with account {ACCOUNT.address}")
-    print(f"BORROW_THRESHOLD: {config.BORROW_THRESHOLD / 10 ** 18:.4f} HONEY")
-    print(f"ALLOW_WALLET_HONEY: {config.ALLOW_WALLET_HONEY}")
-    print(f"SWAP_LEFTOVER_HONEY: {config.SWAP_LEFTOVER_HONEY}")
-    print(f"SWAP_ALL_WALLET_HONEY: {config.SWAP_ALL_WALLET_HONEY}")
-    print(f"CYCLE_INTERVAL: {config.CYCLE_INTERVAL} seconds")
+    interval = next_cycle_in(wallet, wallet_settings.settings_for(wallet).cycle_interval)
+    if has_deferred(wallet):
+        return min(interval, config.DEFERRED_STEP_RETRY)
+    return interval
 
-    # Initial notification
-    send_discord_message(f"🤖 Goldilocks bot started with account {ACCOUNT.address[:6]}...{ACCOUNT.address[-4:]}")
 
-    while True:
+_recorded_settings = {}
+
+
+def record_settings(wallet, settings):
+    """
+    Store the settings a wallet runs with next to its ledger on the current deployment when they changed.
+
+    Args:
+        wallet: Checksummed wallet address
+        settings: wallet_settings.WalletSettings
+    """
+    key = wallet_key(wallet)
+    if _recorded_settings.get(key) != settings:
+        # Lets analytics.py compare wallets by the settings they run with
+        ledger.write_settings(data_dir(config.LEDGER_DIR), wallet, settings._asdict())
+        _recorded_settings[key] = settings
+
+
+def reset_wallet_state():
+    """Forget everything kept per wallet (position models, deferred steps, compounding), e.g. after switching chains."""
+    reset_positions()
+    reset_deferred()
+    reset_wallets()
+    _recorded_settings.clear()
+
+
+async def run_wallet_cycle(cycle):
+    """
+    Run one cycle of the current account with its settings, log context,
+    and recording; errors are logged and reported, not raised.
+
+    Args:
+        cycle: Cycle number of the account
+
+    Returns:
+        Success status
+    """
+    account = get_account()
+    # Changed settings apply from the wallet's next cycle on, never in the middle of one
+    wallet_settings.refresh()
+    settings = wallet_settings.settings_for(account.address)
+    if config.LEDGER_DIR:
+        record_settings(account.address, settings)
+    with wallet_settings.use_settings(settings), bind(wallet=account.address, cycle=cycle), \
+            recording_cycle(cycle):
         try:
-            print(f"\n--- New cycle starting ---")
+            logger.info("New cycle starting")
 
             # Run protocol cycle
-            success = await run_protocol_cycle()
+            with span("cycle", wallet=account.address, cycle=cycle):
+                success = await run_protocol_cycle()
+                set_attributes(success=success)
 
             # If cycle was skipped, log reason
             if not success:
-                print(f"Cycle skipped. Waiting {config.CYCLE_INTERVAL} seconds...")
+                logger.info("Cycle skipped. Waiting %s seconds...", settings.cycle_interval)
             else:
-                print(f"Cycle complete. Waiting {config.CYCLE_INTERVAL} seconds...")
+                logger.info("Cycle complete. Waiting %s seconds...", settings.cycle_interval)
+            return success
 
         except Exception as e:
             error_msg = f"❌ Main loop error: {str(e)[:200]}"
-            print(error_msg)
+            logger.exception(error_msg)
             send_discord_message(error_msg)
+            return False
 
-        # Wait for next cycle
-        await asyncio.sleep(config.CYCLE_INTERVAL)
 
+async def fleet_step(scanner, wallet_cycle):
+    """
+    Scan the fleet once and run the due cycles.
 
-if __name__ == "__main__":
+    Args:
+        scanner: FleetScanner
+        wallet_cycle: Coroutine function running one account's cycle
+
+    Returns:
+        Number of cycles run
+    """
+    wallet_settings.refresh()
     try:
-        # Check initial balances
-        get_honey_balance()
-        
-        # Run main loop
-        asyncio.run(main_loop())
-    except KeyboardInterrupt:
-        print("Bot stopped by user")
-        send_discord_message("🛑 Bot stopped by user")
+        due = scanner.due(w3.eth.block_number)
     except Exception as e:
-        error_msg = f"❌ Critical error: {str(e)}"
-        print(error_msg)
-        send_discord_message(error_msg)
-        sys.exit(1)
+        logger.warning("Fleet scan failed: %s", e)
+        return 0
+    await asyncio.gather(*(wallet_cycle(account) for account in due))
+    return len(due)
+
+
+async def fleet_loop(accounts):
+    """
+    Fleet loop: scan all wallets on every block and run the cycles of those
+    with work, FLEET_CONCURRENCY at a time. A wallet rests for its cycle
+    interval after its cycle.
+
+    Args:
+        accounts: LocalAccounts of the fleet
+    """
+    scanner = FleetScanner(w3, accounts, wake=has_deferred)
+    semaphore = asyncio.Semaphore(config.FLEET_CONCURRENCY)
+    cycles = {}
+
+    async def wallet_cycle(account):
+        async with semaphore:
+            with use_account(account):
+                cycles[account.address] = cycles.get(account.address, 0) + 1
+                await run_wallet_cycle(cycles[account.address])
+        scanner.rest(account.address, cycle_wait(account.address))
+
+    while True:
+        await fleet_step(scanner, wallet_cycle)
+        stream = get_stream()
+        if stream:
+            await stream.wait_for_block(config.FLEET_SCAN_INTERVAL)
+        else:
+            await asyncio.sleep(config.FLEET_SCAN_INTERVAL)
+
+
+def load_assignments():
+    """
+    Load the wallets of each deployment the bot runs.
+
+    Returns:
+        List of (Deployment, LocalAccounts): the deployments of DEPLOYMENTS_FILE, or the
+        default deployment with the fleet of FLEET_KEYS_FILE or the account of PRIVATE_KEY.
+        A wallet may run on several deployments; its state is kept per deployment.
+    """
+    targets = load_deployments(config.DEPLOYMENTS_FILE) if config.DEPLOYMENTS_FILE else [default_deployment()]
+    return [(deployment, load_accounts(deployment.keys_file) if deployment.keys_file else [ACCOUNT])
+            for deployment in targets]
+
+
 async def main_loop():
     """
-    Main bot loop. Runs protocol cycles at specified intervals.
+    Main bot loop. Runs protocol cycles at specified intervals, for the
+    account of PRIVATE_KEY, the fleet of FLEET_KEYS_FILE or the deployments
+    of DEPLOYMENTS_FILE.
     """
-    print(f"Bot starting with account {ACCOUNT.address}")
-    print(f"BORROW_THRESHOLD: {config.BORROW_THRESHOLD / 10**18:.4f} HONEY")
-    print(f"ALLOW_WALLET_HONEY: {config.ALLOW_WALLET_HONEY}")
-    print(f"SWAP_LEFTOVER_HONEY: {config.SWAP_LEFTOVER_HONEY}")
-    print(f"CYCLE_INTERVAL: {config.CYCLE_INTERVAL} seconds")
+    assignments = load_assignments()
+    accounts = [account for _, deployment_accounts in assignments for account in deployment_accounts]
+    if config.DEPLOYMENTS_FILE:
+        logger.info("Bot starting with %s deployments: %s", len(assignments),
+                    ", ".join(f"{deployment.name} ({len(wallets)} accounts)" for deployment, wallets in assignments))
+    elif config.FLEET_KEYS_FILE:
+        logger.info("Bot starting with a fleet of %s accounts", len(accounts))
+    else:
+        logger.info("Bot starting with account %s", ACCOUNT.address)
+    logger.info("BORROW_THRESHOLD: %.4f HONEY", config.BORROW_THRESHOLD / 10 ** 18)
+    logger.info("ALLOW_WALLET_HONEY: %s", config.ALLOW_WALLET_HONEY)
+    logger.info("SWAP_LEFTOVER_HONEY: %s", config.SWAP_LEFTOVER_HONEY)
+    logger.info("SWAP_ALL_WALLET_HONEY: %s", config.SWAP_ALL_WALLET_HONEY)
+    logger.info("CYCLE_INTERVAL: %s seconds", config.CYCLE_INTERVAL)
+    logger.info("COMPOUND_OPTIMIZER: %s", config.COMPOUND_OPTIMIZER)
+    if config.COMPOUND_OPTIMIZER and config.GAS_TOKEN_PRICE <= 0:
+        logger.warning("GAS_TOKEN_PRICE not set, the compounding optimizer treats gas as free")
+    if config.LOOP_LAG_THRESHOLD > 0:
+        loop_monitor.start(config.LOOP_LAG_THRESHOLD, config.LOOP_LAG_REPORT_INTERVAL)
+    if config.MEMORY_SNAPSHOT_INTERVAL > 0:
+        memory_guard.start(config.MEMORY_SNAPSHOT_INTERVAL, config.MEMORY_TRACE_FRAMES, config.MEMORY_DUMP_DIR)
+    if config.WALLET_SETTINGS:
+        logger.info("WALLET_SETTINGS: %s", config.WALLET_SETTINGS)
+        wallet_settings.set_store(wallet_settings.make_store(config.WALLET_SETTINGS))
+        wallet_settings.refresh()
+    if config.LEDGER_DIR:
+        for deployment, deployment_accounts in assignments:
+            with use_deployment(deployment):
+                for account in deployment_accounts:
+                    record_settings(account.address, wallet_settings.settings_for(account.address))
+
+    # Push-based block and log events replace receipt polling and the fixed sleep
+    if config.SUBSCRIPTION_URL and config.DEPLOYMENTS_FILE:
+        logger.warning("SUBSCRIPTION_URL is not used with DEPLOYMENTS_FILE, the deployments poll their RPCs")
+    elif config.SUBSCRIPTION_URL:
+        await start_stream(
+            config.SUBSCRIPTION_URL,
+            [config.HONEY_ADDRESS, config.LOCKS_ADDRESS, config.PORRIDGE_ADDRESS],
+            [account.address for account in accounts],
+        )
 
     # Initial notification
-    send_discord_message(f"🤖 Goldilocks bot started with account {ACCOUNT.address[:6]}...{ACCOUNT.address[-4:]}")
+    if config.DEPLOYMENTS_FILE:
+        send_discord_message(f"🤖 Goldilocks bot started with {len(accounts)} accounts on {len(assignments)} deployments")
+    elif config.FLEET_KEYS_FILE:
+        send_discord_message(f"🤖 Goldilocks bot started with {len(accounts)} accounts")
+    else:
+        send_discord_message(f"🤖 Goldilocks bot started with account {ACCOUNT.address[:6]}...{ACCOUNT.address[-4:]}")
 
-    while True:
-        try:
-            print(f"\n--- New cycle starting ---")
+    if config.LEADER_LEASE:
+        await leader_loop(assignments, leader.make_lease(config.LEADER_LEASE, config.LEADER_LEASE_TTL))
+    else:
+        await bot_loop(assignments)
 
-            # Run protocol cycle
-            success = await run_protocol_cycle()
 
-            # If cycle was skipped, log reason
-            if not success:
-                print(f"Cycle skipped. Waiting {config.CYCLE_INTERVAL} seconds...")
+async def bot_loop(assignments):
+    """
+    Run cycles forever: a fleet loop per deployment, the fleet loop, or the
+    loop of the single account. With TIMESERIES_DIR, the wallets are sampled
+    on every block meanwhile.
+
+    Args:
+        assignments: List of (Deployment, LocalAccounts) from load_assignments()
+    """
+    samplers = [asyncio.create_task(sample_loop(deployment, accounts))
+                for deployment, accounts in assignments] if config.TIMESERIES_DIR else []
+    try:
+        if config.DEPLOYMENTS_FILE:
+            await asyncio.gather(*(deployment_loop(deployment, accounts) for deployment, accounts in assignments))
+            return
+        if config.FLEET_KEYS_FILE:
+            await fleet_loop(assignments[0][1])
+            return
+
+        cycle = 0
+        while True:
+            cycle += 1
+            await run_wallet_cycle(cycle)
+
+            # Wait for next cycle (longer while compounding is deferred, shorter while steps wait)
+            interval = cycle_wait(ACCOUNT.address)
+            stream = get_stream()
+            if stream:
+                await stream.wait_for_cycle(interval)
+            else:
+                await asyncio.sleep(interval)
+    finally:
+        for sampler in samplers:
+            sampler.cancel()
+
+
+async def sample_loop(deployment, accounts):
+    """
+    Record a time series sample of every wallet of a deployment once per
+    block. Runs only alongside the cycles, so a standby never writes the files.
+
+    Args:
+        deployment: Deployment
+        accounts: LocalAccounts assigned to it
+    """
+    wallets = [account.address for account in accounts]
+    last_block = None
+    with use_deployment(deployment):
+        while True:
+            stream = get_stream()
+            try:
+                block = stream.latest_block if stream and stream.latest_block else w3.eth.block_number
+                if block != last_block:
+                    record_samples(wallets, block)
+                    last_block = block
+            except Exception as e:
+                logger.warning("Failed to store time series samples: %s", e)
+            if stream:
+                await stream.wait_for_block(config.TIMESERIES_POLL_INTERVAL)
             else:
-                print(f"Cycle complete. Waiting {config.CYCLE_INTERVAL} seconds...")
+                await asyncio.sleep(config.TIMESERIES_POLL_INTERVAL)
 
+
+async def deployment_loop(deployment, accounts):
+    """
+    Fleet loop of one deployment. Runs as its own task, so the deployment
+    applies to all of its cycles without affecting the other deployments.
+
+    Args:
+        deployment: Deployment
+        accounts: LocalAccounts assigned to it
+    """
+    with use_deployment(deployment), bind(deployment=deployment.name):
+        await fleet_loop(accounts)
+
+
+def warm_standby(assignments):
+    """
+    Keep a standby ready to take over: the RPC connections open and the
+    position models synced.
+
+    Args:
+        assignments: List of (Deployment, LocalAccounts) of the leader
+    """
+    for deployment, accounts in assignments:
+        with use_deployment(deployment):
+            w3.eth.block_number
+            if config.POSITION_MODEL:
+                for account in accounts:
+                    position = get_position(account.address)
+                    if position.needs_sync():
+                        position.sync(w3)
+
+
+def take_over(assignments):
+    """
+    Start leading: pick up the positions the previous leader left on chain.
+    Nonces need nothing, send_tx() reads the pending nonce from the chain.
+
+    Args:
+        assignments: List of (Deployment, LocalAccounts) of the leader
+    """
+    if config.POSITION_MODEL:
+        try:
+            for deployment, accounts in assignments:
+                with use_deployment(deployment):
+                    for account in accounts:
+                        get_position(account.address).sync(w3)
         except Exception as e:
-            error_msg = f"❌ Main loop error: {str(e)[:200]}"
-            print(error_msg)
-            send_discord_message(error_msg)
+            logger.warning("Position sync on takeover failed, models are rebuilt on first use: %s", e)
+            reset_positions()
+    logger.info("Took over the leader lease %s", config.LEADER_LEASE)
+    send_discord_message("👑 This instance now holds the leader lease")
 
-        # Wait for next cycle
-        await asyncio.sleep(config.CYCLE_INTERVAL)
\ No newline at end of file
+
+async def leader_loop(assignments, lease):
+    """
+    Hot standby: run the cycles only while holding the leader lease, and keep
+    warm until it can be taken over otherwise.
+
+    Args:
+        assignments: List of (Deployment, LocalAccounts) from load_assignments()
+        lease: leader.FileLease or leader.SqliteLease
+    """
+    leader.set_lease(lease)
+    interval = config.LEADER_LEASE_TTL / 3
+    try:
+        while True:
+            logger.info("Standing by for the leader lease %s", config.LEADER_LEASE)
+            await leader.wait_for_lease(lease, interval, warm=lambda: warm_standby(assignments))
+            take_over(assignments)
+            cycles = asyncio.create_task(bot_loop(assignments))
+            renewals = asyncio.create_task(leader.keep_lease(lease, interval))
+            await asyncio.wait({cycles, renewals}, return_when=asyncio.FIRST_COMPLETED)
+            if cycles.done():
+                renewals.cancel()
+                cycles.result()  # raises what ended the loop
+                return
+            # Lost the lease: stop before the next transaction (send_tx checks it as well)
+            cycles.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await cycles
+            logger.warning("Leader lease lost, standing by")
+            send_discord_message("⚠️ Leader lease lost, this instance is standing by")
+    finally:
+        lease.release()
+
+
+if __name__ == "__main__":
+    try:
+        # Check initial balances
+        get_honey_balance()
+
+        # Run main loop
+        asyncio.run(main_loop())
+    except KeyboardInterrupt:
+        loop_monitor.log_report()
+        logger.info("Bot stopped by user")
+        send_discord_message("🛑 Bot stopped by user")
+    except Exception as e:
+        error_msg = f"❌ Critical error: {str(e)}"
+        logger.critical(error_msg)
+        send_discord_message(error_msg)
+        sys.exit(1)
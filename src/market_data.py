@@ -0,0 +1,211 @@
+"""
+Market data broadcaster for the Goldilocks DeFi bot.
+Floor price, market price and the other protocol-global values are the same
+for every wallet, yet each worker read them every cycle. One broadcaster
+process reads them once per block in a single Multicall3 call and publishes
+them in a small memory-mapped file; bot workers (MARKET_DATA_FILE) read the
+file instead of the chain and fall back to the chain only when it is stale.
+
+Usage:
+    python market_data.py                 # publish to MARKET_DATA_FILE
+    python market_data.py --print         # show what is published
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import clock
+import config
+from abi_tables import get_tables
+from logger import get_logger
+from multicall import aggregate, contract_call
+from status import contract_addresses
+
+logger = get_logger(__name__)
+
+MAGIC = b"GLMD"
+FORMAT_VERSION = 1
+
+# (field, contract, function) of the protocol-global reads
+MARKET_READS = [
+    ("floor_price", "locks", "floorPrice"),
+    ("market_price", "locks", "marketPrice"),
+    ("fsl", "locks", "fsl"),
+    ("psl", "locks", "psl"),
+    ("target_ratio", "locks", "targetRatio"),
+    ("annual_prg_emissions", "porridge", "annualPrgEmissions"),
+    ("claimable_prg_per_locks", "porridge", "claimablePrgPerLocksStored"),
+]
+FIELDS = tuple(field for field, _, _ in MARKET_READS)
+
+# Header: magic, version, sequence (odd while a write is in progress), block, unix time of the read
+HEADER = struct.Struct("<4sIQQd")
+# Values as exact uint256 (32 bytes big-endian each), all-ones when the read failed
+VALUE_SIZE = 32
+MISSING = b"\xff" * VALUE_SIZE
+FILE_SIZE = HEADER.size + len(FIELDS) * VALUE_SIZE
+
+MarketData = namedtuple("MarketData", ("block", "updated_at") + FIELDS)
+
+_SEQ_OFFSET = 8
+_U64 = struct.Struct("<Q")
+
+
+class MarketBoard:
+    """
+    Latest protocol-global values in a memory-mapped file.
+    One writer (the broadcaster); any number of reading workers.
+    """
+
+    def __init__(self, path, readonly=False):
+        """
+        Open or create a board file.
+
+        Args:
+            path: File path
+            readonly: Map the file read-only, for workers
+        """
+        self.path = path
+        if not readonly and not os.path.exists(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0.0) + MISSING * len(FIELDS))
+            os.replace(tmp, path)
+        with open(path, "rb" if readonly else "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+        magic, version = HEADER.unpack_from(self._mmap, 0)[:2]
+        if magic != MAGIC or version != FORMAT_VERSION or len(self._mmap) != FILE_SIZE:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} market data file")
+
+    def publish(self, block, values, updated_at=None):
+        """
+        Publish the values read at a block.
+
+        Args:
+            block: Block number of the reads
+            values: Dict of FIELDS names to wei values (None when a read failed)
+            updated_at: Unix time of the reads (default: now)
+        """
+        data = b"".join(MISSING if values.get(field) is None else values[field].to_bytes(VALUE_SIZE, "big")
+                        for field in FIELDS)
+        seq = _U64.unpack_from(self._mmap, _SEQ_OFFSET)[0]
+        _U64.pack_into(self._mmap, _SEQ_OFFSET, seq + 1)
+        HEADER.pack_into(self._mmap, 0, MAGIC, FORMAT_VERSION, seq + 1, block,
+                         clock.time() if updated_at is None else updated_at)
+        self._mmap[HEADER.size:] = data
+        _U64.pack_into(self._mmap, _SEQ_OFFSET, seq + 2)
+
+    def read(self):
+        """
+        Copy the published values.
+
+        Returns:
+            MarketData; None before the first publish
+        """
+        while True:
+            raw = self._mmap[:]
+            _, _, seq, block, updated_at = HEADER.unpack_from(raw, 0)
+            if seq % 2 or _U64.unpack_from(self._mmap, _SEQ_OFFSET)[0] != seq:
+                time.sleep(0)
+                continue
+            if seq == 0:
+                return None
+            values = [raw[HEADER.size + i * VALUE_SIZE:HEADER.size + (i + 1) * VALUE_SIZE] for i in range(len(FIELDS))]
+            return MarketData(block, updated_at, *(None if v == MISSING else int.from_bytes(v, "big") for v in values))
+
+    def close(self):
+        self._mmap.close()
+
+
+def read_market(w3, block="latest"):
+    """
+    Read all protocol-global values in one Multicall3 call.
+
+    Args:
+        w3: Web3 instance
+        block: Block number or tag
+
+    Returns:
+        Dict of FIELDS names to wei values (None where a read failed)
+    """
+    tables = get_tables()
+    addresses = contract_addresses()
+    calls = [contract_call(tables[contract], addresses[contract], fn) for _, contract, fn in MARKET_READS]
+    return dict(zip(FIELDS, aggregate(w3, calls, block)))
+
+
+_boards = {}
+
+
+def published_value(field, max_age, path=None):
+    """
+    Get a value from a board, if it is fresh.
+
+    Args:
+        field: One of FIELDS
+        max_age: Seconds after which published values are ignored
+        path: Board file (default MARKET_DATA_FILE)
+
+    Returns:
+        Value in wei, or None when the board is missing, stale or lacks the value
+    """
+    path = path or config.MARKET_DATA_FILE
+    if path not in _boards:
+        if not os.path.exists(path):
+            return None
+        _boards[path] = MarketBoard(path, readonly=True)
+    data = _boards[path].read()
+    if data is None or clock.time() - data.updated_at > max_age:
+        return None
+    return getattr(data, field)
+
+
+def broadcast(w3, board, interval, stop=None):
+    """
+    Publish the values of every new block until stopped.
+
+    Args:
+        w3: Web3 instance
+        board: Writable MarketBoard
+        interval: Seconds between block number polls
+        stop: threading.Event ending the loop (default: run forever)
+    """
+    last_block = None
+    while stop is None or not stop.is_set():
+        try:
+            block = w3.eth.block_number
+            if block != last_block:
+                board.publish(block, read_market(w3, block))
+                last_block = block
+        except Exception as e:
+            logger.warning("Market data read failed: %s", e)
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish protocol-global market data for bot workers")
+    parser.add_argument("--file", default=config.MARKET_DATA_FILE, help="board file (default MARKET_DATA_FILE)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between block checks")
+    parser.add_argument("--print", action="store_true", help="print the published values and exit")
+    args = parser.parse_args()
+    if not args.file:
+        parser.error("set MARKET_DATA_FILE or pass --file")
+
+    if args.print:
+        data = MarketBoard(args.file, readonly=True).read()
+        print(data._asdict() if data else "nothing published yet")
+        return
+
+    from rpc import make_provider, make_web3
+    w3 = make_web3(make_provider(config.RPC_URL))
+    logger.info("Publishing market data of every block to %s", args.file)
+    broadcast(w3, MarketBoard(args.file), args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Memory leak guard for the Goldilocks DeFi bot.
+The bot runs for weeks and creates contract function objects, receipts and
+message lists every cycle; anything a cycle leaves reachable adds up. With
+MEMORY_SNAPSHOT_INTERVAL set, tracemalloc traces the allocations, and a
+snapshot is taken and compared with the previous one at that interval. The
+allocation sites that grew the most are logged together with the bot's own
+line that led to them (e.g. porridge_logic.py:240).
+
+Tracing makes allocations slower, so this is a diagnostics mode, off by
+default. SIGUSR2 dumps the current snapshot to MEMORY_DUMP_DIR, and two dumps
+can be compared offline:
+    python memory_guard.py memory-dumps/memory-1700000000.snapshot memory-dumps/memory-1700086400.snapshot
+"""
+import argparse
+import asyncio
+import os
+import signal
+import time
+import tracemalloc
+from collections import namedtuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Allocations of the import machinery and of tracemalloc itself are no leaks
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+Growth = namedtuple("Growth", "site callsite size_diff count_diff size")
+
+
+def bot_frame(traceback, roots=(SRC_DIR,)):
+    """
+    Innermost frame of the bot's own code in an allocation traceback.
+
+    Args:
+        traceback: tracemalloc.Traceback
+        roots: Directories of the bot's code
+
+    Returns:
+        "file.py:line", or "" when the traceback has no frame in roots
+    """
+    for frame in reversed(traceback):
+        if frame.filename.startswith("<"):
+            continue
+        path = os.path.abspath(frame.filename)
+        if any(path.startswith(root + os.sep) for root in roots):
+            return f"{os.path.basename(path)}:{frame.lineno}"
+    return ""
+
+
+def top_growth(new, old, n=10, roots=(SRC_DIR,)):
+    """
+    Allocation sites that grew between two snapshots.
+
+    Args:
+        new: Later tracemalloc.Snapshot
+        old: Earlier tracemalloc.Snapshot
+        n: Number of sites
+        roots: Directories of the bot's code
+
+    Returns:
+        List of Growth, largest growth first
+    """
+    stats = [stat for stat in new.filter_traces(IGNORED).compare_to(old.filter_traces(IGNORED), "traceback")
+             if stat.size_diff > 0]
+    stats.sort(key=lambda stat: -stat.size_diff)
+    growth = []
+    for stat in stats[:n]:
+        frame = stat.traceback[-1]  # the allocating line
+        growth.append(Growth(f"{frame.filename}:{frame.lineno}", bot_frame(stat.traceback, roots),
+                             stat.size_diff, stat.count_diff, stat.size))
+    return growth
+
+
+def rss_bytes():
+    """Resident set size of the process, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class MemoryGuard:
+    """
+    Periodic tracemalloc snapshots and their growth reports.
+    """
+
+    def __init__(self, interval, frames=10, top=10, dump_dir="memory-dumps", roots=(SRC_DIR,)):
+        """
+        Args:
+            interval: Seconds between snapshots
+            frames: Frames kept per allocation; enough to reach the bot's code from library internals
+            top: Allocation sites per report
+            dump_dir: Directory for snapshots dumped on SIGUSR2
+            roots: Directories of the bot's code
+        """
+        self.interval = interval
+        self.frames = frames
+        self.top = top
+        self.dump_dir = dump_dir
+        self.roots = roots
+        self.previous = None
+
+    def start(self):
+        """Start tracing allocations and take the first snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.previous = tracemalloc.take_snapshot()
+
+    def stop(self):
+        tracemalloc.stop()
+        self.previous = None
+
+    def check(self):
+        """
+        Take a snapshot, log the sites that grew since the previous one and keep it for the next check.
+
+        Returns:
+            List of Growth
+        """
+        snapshot = tracemalloc.take_snapshot()
+        growth = top_growth(snapshot, self.previous, self.top, self.roots)
+        self.previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        rss = rss_bytes()
+        logger.info("Traced memory %.1f MiB (peak %.1f MiB), RSS %s, %+.1f KiB in the top %s growing sites",
+                    current / 2 ** 20, peak / 2 ** 20, f"{rss / 2 ** 20:.1f} MiB" if rss else "unknown",
+                    sum(g.size_diff for g in growth) / 1024, len(growth),
+                    extra={"traced_bytes": current, "rss_bytes": rss})
+        for g in growth:
+            logger.info("Memory grew %+.1f KiB (%+d blocks, %.1f KiB total) at %s%s", g.size_diff / 1024,
+                        g.count_diff, g.size / 1024, g.site, f" via {g.callsite}" if g.callsite else "",
+                        extra={"site": g.site, "callsite": g.callsite, "growth_bytes": g.size_diff})
+        return growth
+
+    def dump(self):
+        """
+        Dump the current snapshot for offline comparison.
+
+        Returns:
+            Path of the dump
+        """
+        os.makedirs(self.dump_dir, exist_ok=True)
+        path = os.path.join(self.dump_dir, f"memory-{int(time.time())}.snapshot")
+        tracemalloc.take_snapshot().dump(path)
+        logger.info("Memory snapshot dumped to %s", path)
+        return path
+
+    async def run(self):
+        """Check every interval until cancelled; SIGUSR2 dumps a snapshot meanwhile."""
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, "SIGUSR2"):
+            loop.add_signal_handler(signal.SIGUSR2, self.dump)
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.warning("Memory snapshot failed: %s", e)
+        finally:
+            if hasattr(signal, "SIGUSR2"):
+                loop.remove_signal_handler(signal.SIGUSR2)
+
+
+_task = None
+
+
+def start(interval, frames, dump_dir):
+    """
+    Start the leak guard in the running event loop.
+
+    Args:
+        interval: Seconds between snapshots
+        frames: Frames kept per allocation
+        dump_dir: Directory for snapshots dumped on SIGUSR2
+
+    Returns:
+        Task of the periodic checks
+    """
+    global _task
+    guard = MemoryGuard(interval, frames, dump_dir=dump_dir)
+    guard.start()
+    logger.info("Tracing memory allocations, snapshot every %s seconds; SIGUSR2 dumps one to %s", interval, dump_dir)
+    _task = asyncio.create_task(guard.run())
+    return _task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the allocation sites that grew between two dumped snapshots")
+    parser.add_argument("old", help="earlier snapshot dumped on SIGUSR2")
+    parser.add_argument("new", help="later snapshot")
+    parser.add_argument("--top", type=int, default=20, help="number of sites")
+    args = parser.parse_args()
+
+    old, new = tracemalloc.Snapshot.load(args.old), tracemalloc.Snapshot.load(args.new)
+    print(f"{'growth KiB':>11} {'blocks':>8} {'total KiB':>10}  site")
+    for g in top_growth(new, old, args.top):
+        print(f"{g.size_diff / 1024:>+11.1f} {g.count_diff:>+8} {g.size / 1024:>10.1f}  {g.site}"
+              + (f" (via {g.callsite})" if g.callsite else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Multicall module for the Goldilocks DeFi bot.
+Batches read-only contract calls into Multicall3 aggregate3 requests, so a
+snapshot of many views (and many wallets) costs one eth_call pinned to one
+block instead of one round trip per value.
+"""
+from collections import namedtuple
+
+from eth_abi.abi import default_codec
+from eth_utils import keccak
+
+import config
+
+AGGREGATE3 = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+GET_ETH_BALANCE = keccak(text="getEthBalance(address)")[:4]
+
+CALLS_TYPES = ["(address,bool,bytes)[]"]
+RESULTS_TYPES = ["(bool,bytes)[]"]
+
+# One read: target contract, calldata and how to turn the return data into a value
+Call = namedtuple("Call", "target data decode")
+
+
+def contract_call(tables, target, name, *args):
+    """
+    Build a Call for a function of a contract interface.
+
+    Args:
+        tables: ContractTables of the contract (see abi_tables.get_tables())
+        target: Contract address
+        name: Function name
+        *args: Function arguments
+
+    Returns:
+        Call whose result is decoded with the function's output types
+    """
+    return Call(target, tables.encode_call(name, *args), lambda data: tables.decode_output(name, data))
+
+
+def eth_balance_call(address, multicall_address=None):
+    """Call reading the native balance of an address through Multicall3."""
+    data = GET_ETH_BALANCE + default_codec.encode(["address"], [address])
+    return Call(multicall_address or config.MULTICALL_ADDRESS, data,
+                lambda result: default_codec.decode(["uint256"], result)[0])
+
+
+def aggregate(w3, calls, block="latest", chunk_size=500, multicall_address=None):
+    """
+    Execute calls through Multicall3 aggregate3, all against the same block.
+
+    Args:
+        w3: Web3 instance
+        calls: List of Call
+        block: Block number or tag every chunk is pinned to
+        chunk_size: Calls per eth_call; keeps requests under provider gas and size caps
+        multicall_address: Multicall3 address (default MULTICALL_ADDRESS)
+
+    Returns:
+        List of decoded values in call order; None where a call reverted or returned nothing
+    """
+    address = multicall_address or config.MULTICALL_ADDRESS
+    values = []
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start:start + chunk_size]
+        data = AGGREGATE3 + default_codec.encode(CALLS_TYPES, [[(c.target, True, c.data) for c in chunk]])
+        raw = w3.eth.call({"to": address, "data": data}, block)
+        [results] = default_codec.decode(RESULTS_TYPES, bytes(raw))
+        values.extend(c.decode(result) if ok and result else None for c, (ok, result) in zip(chunk, results))
+    return values
+
+
+def aggregate_as(w3, sender, calls, code, block="latest"):
+    """
+    Execute calls in order from an account, through Multicall3 aggregate3
+    run as that account's code (eth_call state override). Unlike aggregate(),
+    the calls may change state: each one sees the effects of the calls before
+    it, and nothing is kept after the eth_call.
+
+    Args:
+        w3: Web3 instance
+        sender: Address the calls are made from
+        calls: List of Call
+        code: Runtime code of Multicall3 (eth_getCode of MULTICALL_ADDRESS)
+        block: Block number or tag
+
+    Returns:
+        List of (success, return or revert data) in call order
+    """
+    data = AGGREGATE3 + default_codec.encode(CALLS_TYPES, [[(c.target, True, c.data) for c in calls]])
+    raw = w3.eth.call({"from": sender, "to": sender, "data": data}, block, {sender: {"code": code}})
+    [results] = default_codec.decode(RESULTS_TYPES, bytes(raw))
+    return [(ok, bytes(result)) for ok, result in results]
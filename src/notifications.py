@@ -4,6 +4,9 @@ Handles sending notifications to Discord.
 """
 from discord_webhook import DiscordWebhook
 import config
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def send_discord_message(msg: str):
@@ -16,12 +19,16 @@ def send_discord_message(msg: str):
     Returns:
         None
     """
+    if config.RPC_REPLAY_FILE:
+        # Replays run offline
+        logger.info("Replay, not sending Discord message: %s", msg)
+        return
     try:
         webhook = DiscordWebhook(url=config.WEBHOOK_URL, content=msg)
         webhook.execute()
-        print(f"Discord message sent: {msg}")
+        logger.info("Discord message sent: %s", msg)
     except Exception as e:
-        print(f"Failed to send Discord message: {e}")
+        logger.warning("Failed to send Discord message: %s", e)
 
 
 class EventMessageCollector:
@@ -0,0 +1,224 @@
+"""
+Cycle planner for the Goldilocks DeFi bot.
+Pure decision logic of the protocol cycle: given a state snapshot and the
+settings, plan_cycle() returns the exact transactions (with amounts) the
+cycle would send, without any I/O. The live step functions use the same
+helpers, so a dry run or a what-if simulation plans what the bot would do.
+
+Usage (dry run, read-only):
+    python planner.py 0xWallet1 0xWallet2
+"""
+import argparse
+from collections import namedtuple
+
+PRECISION = 10 ** 18
+
+Action = namedtuple("Action", "contract function args")
+Settings = namedtuple("Settings", "borrow_threshold allow_wallet_honey swap_leftover_honey swap_all_wallet_honey")
+StirPlan = namedtuple("StirPlan", "amount honey_used percentage needed_honey using_wallet_honey")
+
+# Snapshot fields plan_cycle() reads (status.snapshot() wallet fields plus the prices)
+STATE_FIELDS = ("borrow_limit", "claimable_prg", "honey_balance", "prg_balance", "locks_balance",
+                "floor_price", "market_price", "honey_allowance_porridge", "prg_allowance_porridge",
+                "honey_allowance_locks", "locks_allowance_porridge")
+
+
+def settings_from_config():
+    """
+    Build the planner settings from config, with the overrides of the current
+    wallet's cycle (see wallet_settings.py).
+
+    Returns:
+        Settings
+    """
+    import wallet_settings
+    settings = wallet_settings.current()
+    return Settings(settings.borrow_threshold, settings.allow_wallet_honey,
+                    settings.swap_leftover_honey, settings.swap_all_wallet_honey)
+
+
+def wallet_state(status, wallet):
+    """
+    Flatten a status.snapshot() into the state of one wallet.
+
+    Args:
+        status: Dict returned by status.snapshot()
+        wallet: Checksummed wallet address
+
+    Returns:
+        Dict with STATE_FIELDS
+    """
+    return {**status["wallets"][wallet], "floor_price": status["floor_price"], "market_price": status["market_price"]}
+
+
+def stirable_porridge(honey_amount, floor_price):
+    """PRG that can be stirred with an amount of HONEY at the floor price."""
+    if floor_price == 0:
+        return 0
+    return (honey_amount * PRECISION) // floor_price
+
+
+def honey_for_stir(needed_amount, borrowed_amount, honey_balance, allow_wallet_honey):
+    """
+    Decide how much HONEY to use for stirring.
+
+    Args:
+        needed_amount: HONEY needed for a full stir
+        borrowed_amount: HONEY borrowed in this cycle
+        honey_balance: Wallet HONEY balance
+        allow_wallet_honey: Whether wallet HONEY beyond the borrowed amount may be used
+
+    Returns:
+        (honey_to_use, can_stir_full, using_wallet_honey)
+    """
+    if borrowed_amount >= needed_amount:
+        return needed_amount, True, False
+    if not allow_wallet_honey:
+        honey_available = min(honey_balance, borrowed_amount)
+    else:
+        honey_available = honey_balance
+    return honey_available, False, allow_wallet_honey and honey_available > borrowed_amount
+
+
+def plan_stir(prg_balance, floor_price, honey_balance, borrowed_amount, allow_wallet_honey):
+    """
+    Decide how much PRG to stir.
+
+    Args:
+        prg_balance: Wallet PRG balance
+        floor_price: LOCKS floor price
+        honey_balance: Wallet HONEY balance
+        borrowed_amount: HONEY borrowed in this cycle
+        allow_wallet_honey: Whether wallet HONEY beyond the borrowed amount may be used
+
+    Returns:
+        StirPlan; amount 0 means no stir (honey_used 0: no HONEY available at all)
+    """
+    needed_honey = (floor_price * prg_balance) // PRECISION
+    honey_to_use, can_stir_full, using_wallet_honey = honey_for_stir(
+        needed_honey, borrowed_amount, honey_balance, allow_wallet_honey)
+    if honey_to_use == 0:
+        return StirPlan(0, 0, 0, needed_honey, using_wallet_honey)
+    if can_stir_full:
+        return StirPlan(prg_balance, needed_honey, 100, needed_honey, using_wallet_honey)
+    stir_amount = min(stirable_porridge(honey_to_use, floor_price), prg_balance)
+    if stir_amount == 0:
+        # Not enough HONEY for 1 wei of PRG; the full need is reported as used, so nothing is left to swap
+        return StirPlan(0, needed_honey, 0, needed_honey, using_wallet_honey)
+    honey_used = (floor_price * stir_amount) // PRECISION
+    return StirPlan(stir_amount, honey_used, (stir_amount * 100) // prg_balance, needed_honey, using_wallet_honey)
+
+
+def swap_honey_amount(borrowed_amount, honey_used, honey_balance, swap_all_wallet_honey):
+    """
+    Decide how much HONEY to swap to LOCKS.
+
+    Args:
+        borrowed_amount: HONEY borrowed in this cycle
+        honey_used: HONEY used for stirring in this cycle
+        honey_balance: Wallet HONEY balance after stirring (only used with swap_all_wallet_honey)
+        swap_all_wallet_honey: Swap 95% of the wallet instead of the leftover borrowed HONEY
+
+    Returns:
+        HONEY to swap; <= 0 means no swap
+    """
+    if swap_all_wallet_honey:
+        return int(honey_balance * 0.95)  # Leave 5% buffer
+    return max(0, borrowed_amount - honey_used)
+
+
+def locks_for_honey(honey_amount, market_price):
+    """LOCKS to buy with an amount of HONEY at the market price, with 5% slippage."""
+    return int((honey_amount * PRECISION) / market_price * 0.95)
+
+
+def plan_cycle(state, settings, skip=()):
+    """
+    Plan a protocol cycle: borrow → claim → stir → swap → stake.
+
+    Args:
+        state: Dict with STATE_FIELDS (see wallet_state())
+        settings: Settings
+        skip: Steps to leave out ("claim", "stir", "swap", "stake"), e.g. after a failed simulation
+
+    Returns:
+        List of Action in sending order; empty when the cycle is skipped
+    """
+    limit = state["borrow_limit"]
+    if limit < settings.borrow_threshold:
+        return []
+
+    honey = state["honey_balance"] + limit
+    prg = state["prg_balance"]
+    locks = state["locks_balance"]
+    allowances = {
+        ("honey", "porridge"): state["honey_allowance_porridge"],
+        ("porridge", "porridge"): state["prg_allowance_porridge"],
+        ("honey", "locks"): state["honey_allowance_locks"],
+        ("locks", "porridge"): state["locks_allowance_porridge"],
+    }
+    actions = [Action("porridge", "borrow", (limit,))]
+
+    def spend(token, spender, amount):
+        # approve_if_needed() approves the exact amount when the allowance is short
+        if allowances[(token, spender)] < amount:
+            actions.append(Action(token, "approve", (spender, amount)))
+            allowances[(token, spender)] = amount
+        allowances[(token, spender)] -= amount
+
+    if state["claimable_prg"] > 0 and "claim" not in skip:
+        actions.append(Action("porridge", "claim", ()))
+        prg += state["claimable_prg"]
+
+    honey_used = 0
+    if prg > 0 and "stir" not in skip:
+        stir = plan_stir(prg, state["floor_price"], honey, limit, settings.allow_wallet_honey)
+        honey_used = stir.honey_used
+        if stir.amount > 0:
+            spend("honey", "porridge", stir.honey_used)
+            spend("porridge", "porridge", stir.amount)
+            actions.append(Action("porridge", "stir", (stir.amount,)))
+            honey -= stir.honey_used
+            prg -= stir.amount
+            locks += stir.amount
+
+    if settings.swap_leftover_honey and "swap" not in skip:
+        honey_in = swap_honey_amount(limit, honey_used, honey, settings.swap_all_wallet_honey)
+        if honey_in > 0:
+            locks_out = locks_for_honey(honey_in, state["market_price"])
+            spend("honey", "locks", honey_in)
+            actions.append(Action("locks", "buy", (locks_out, honey_in)))
+            locks += locks_out
+
+    if locks > 0 and "stake" not in skip:
+        spend("locks", "porridge", locks)
+        actions.append(Action("porridge", "stake", (locks,)))
+    return actions
+
+
+def format_action(action):
+    """One-line description of an action, amounts in tokens."""
+    args = ", ".join(f"{a / PRECISION:.4f}" if isinstance(a, int) else str(a) for a in action.args)
+    return f"{action.contract}.{action.function}({args})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the transactions the next cycle would send, without sending them")
+    parser.add_argument("wallets", nargs="+", help="wallet addresses")
+    args = parser.parse_args()
+
+    import config
+    from rpc import make_provider, make_web3
+    from status import snapshot
+
+    status = snapshot(make_web3(make_provider(config.RPC_URL)), args.wallets)
+    settings = settings_from_config()
+    for wallet in status["wallets"]:
+        actions = plan_cycle(wallet_state(status, wallet), settings)
+        print(f"{wallet} (block {status['block']}): " + ("skip, borrow limit below threshold" if not actions else ""))
+        for action in actions:
+            print(f"  {format_action(action)}")
+
+
+if __name__ == "__main__":
+    main()
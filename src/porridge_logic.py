@@ -3,10 +3,16 @@ PORRIDGE token logic for the Goldilocks DeFi bot.
 Handles PORRIDGE token and staking/borrowing operations.
 """
 import config
-from web3_utils import ACCOUNT, send_tx, approve_if_needed, format_amount
+import compounding
+import wallet_settings
+from logger import get_logger, SAMPLED
+from web3_utils import w3, get_account, send_tx, approve_if_needed, format_amount, position_value
 from contracts import porridge_contract
-from honey_logic import check_honey_for_stir
-from locks_logic import get_floor_price, calculate_stirable_porridge
+from honey_logic import get_honey_balance
+from locks_logic import get_floor_price, get_market_price, get_locks_balance
+from planner import plan_stir
+
+logger = get_logger(__name__)
 
 
 def get_porridge_balance():
@@ -16,8 +22,10 @@ def get_porridge_balance():
     Returns:
         Current PORRIDGE balance
     """
-    balance = porridge_contract.functions.balanceOf(ACCOUNT.address).call()
-    print(f"PORRIDGE balance: {format_amount(balance)} PORRIDGE")
+    balance = position_value("prg_balance")
+    if balance is None:
+        balance = porridge_contract.functions.balanceOf(get_account().address).call()
+    logger.info("PORRIDGE balance: %s PORRIDGE", format_amount(balance), extra=SAMPLED)
     return balance
 
 
@@ -28,8 +36,8 @@ def get_claimable_porridge():
     Returns:
         Amount of claimable PORRIDGE
     """
-    claimable = porridge_contract.functions.userClaimablePrg(ACCOUNT.address).call()
-    print(f"Claimable PORRIDGE: {format_amount(claimable)} PORRIDGE")
+    claimable = porridge_contract.functions.userClaimablePrg(get_account().address).call()
+    logger.info("Claimable PORRIDGE: %s PORRIDGE", format_amount(claimable), extra=SAMPLED)
     return claimable
 
 
@@ -40,8 +48,8 @@ def get_borrow_limit():
     Returns:
         Current borrow limit
     """
-    limit = porridge_contract.functions.userBorrowLimit(ACCOUNT.address).call()
-    print(f"User borrow limit: {format_amount(limit)} HONEY")
+    limit = porridge_contract.functions.userBorrowLimit(get_account().address).call()
+    logger.info("User borrow limit: %s HONEY", format_amount(limit), extra=SAMPLED)
     return limit
 
 
@@ -52,8 +60,10 @@ def get_borrowed_honey():
     Returns:
         Amount of borrowed HONEY
     """
-    borrowed = porridge_contract.functions.userBorrowedHoney(ACCOUNT.address).call()
-    print(f"Borrowed HONEY: {format_amount(borrowed)} HONEY")
+    borrowed = position_value("borrowed_honey")
+    if borrowed is None:
+        borrowed = porridge_contract.functions.userBorrowedHoney(get_account().address).call()
+    logger.info("Borrowed HONEY: %s HONEY", format_amount(borrowed), extra=SAMPLED)
     return borrowed
 
 
@@ -64,29 +74,65 @@ def get_staked_locks():
     Returns:
         Amount of staked LOCKS
     """
-    staked = porridge_contract.functions.userStakedLocks(ACCOUNT.address).call()
-    print(f"Staked LOCKS: {format_amount(staked)} LOCKS")
+    staked = position_value("staked_locks")
+    if staked is None:
+        staked = porridge_contract.functions.userStakedLocks(get_account().address).call()
+    logger.info("Staked LOCKS: %s LOCKS", format_amount(staked), extra=SAMPLED)
     return staked
 
 
-async def borrow_if_possible():
+def schedule_cycle():
+    """
+    Decide with the gas-aware compounding model whether this cycle is worth its gas.
+
+    Returns:
+        compounding.Decision
+    """
+    wallet = get_account().address
+    claimable = get_claimable_porridge()
+    accrual_rate = compounding.observe_claimable(wallet, claimable)
+    decision = compounding.decide(
+        claimable, get_staked_locks(), get_floor_price(), get_market_price(),
+        int(w3.eth.gas_price * 1.2),  # what send_tx pays
+        config.GAS_TOKEN_PRICE, accrual_rate,
+        gas_units=compounding.cycle_gas(compounding.cycle_txs(wallet_settings.current().swap_leftover_honey)),
+        max_defer=config.COMPOUND_MAX_DEFER)
+    compounding.record_decision(wallet, decision)
+
+    if decision.run:
+        logger.info("Compounding: claimable %s PRG above threshold %s PRG (cycle gas %s HONEY)",
+                    format_amount(decision.claimable), format_amount(decision.threshold), format_amount(decision.gas_cost))
+    elif decision.threshold is None:
+        logger.info("Compounding deferred: %s", decision.reason)
+    else:
+        logger.info("Compounding deferred: claimable %s PRG below threshold %s PRG (cycle gas %s HONEY)%s",
+                    format_amount(decision.claimable), format_amount(decision.threshold), format_amount(decision.gas_cost),
+                    f", next check in {decision.defer:.0f} s" if decision.defer else "")
+    return decision
+
+
+async def borrow_if_possible(threshold=None):
     """
     Check borrowing limit and borrow if above threshold.
-    
+
+    Args:
+        threshold: Minimum borrow limit in wei (default: BORROW_THRESHOLD)
+
     Returns:
         (success, borrowed_amount)
     """
+    threshold = wallet_settings.current().borrow_threshold if threshold is None else threshold
     try:
         # Check user's borrow limit
         limit = get_borrow_limit()
 
         # Skip if below threshold
-        if limit < config.BORROW_THRESHOLD:
-            print(f"Borrow limit below threshold ({format_amount(config.BORROW_THRESHOLD)} HONEY), skipping this cycle")
+        if limit < threshold:
+            logger.info("Borrow limit below threshold (%s HONEY), skipping this cycle", format_amount(threshold))
             return False, 0
 
         # Execute borrow
-        print(f"Borrowing {format_amount(limit)} HONEY")
+        logger.info("Borrowing %s HONEY", format_amount(limit))
         receipt = await send_tx(porridge_contract.functions.borrow(limit))
 
         # Get the borrowed amount from the receipt events
@@ -104,10 +150,10 @@ async def borrow_if_possible():
         if borrowed_amount == 0:
             borrowed_amount = limit
 
-        print(f"Successfully borrowed {format_amount(borrowed_amount)} HONEY")
+        logger.info("Successfully borrowed %s HONEY", format_amount(borrowed_amount))
         return True, borrowed_amount
     except Exception as e:
-        print(f"Error in borrow_if_possible: {e}")
+        logger.error("Error in borrow_if_possible: %s", e)
         raise
 
 
@@ -123,10 +169,10 @@ async def claim_porridge():
         claimable = get_claimable_porridge()
 
         if claimable == 0:
-            print("No PORRIDGE to claim")
+            logger.info("No PORRIDGE to claim")
             return 0
 
-        print("Claiming PORRIDGE rewards")
+        logger.info("Claiming PORRIDGE rewards")
         receipt = await send_tx(porridge_contract.functions.claim())
 
         # Get the claimed amount from receipt events
@@ -142,11 +188,12 @@ async def claim_porridge():
         # If we couldn't get from events, use the claimable as approximation
         if claimed_amount == 0:
             claimed_amount = claimable
+        compounding.reset_claimable(get_account().address)
 
-        print(f"Successfully claimed {format_amount(claimed_amount)} PORRIDGE")
+        logger.info("Successfully claimed %s PORRIDGE", format_amount(claimed_amount))
         return claimed_amount
     except Exception as e:
-        print(f"Error in claim_porridge: {e}")
+        logger.error("Error in claim_porridge: %s", e)
         raise
 
 
@@ -164,47 +211,33 @@ async def stir_porridge(borrowed_honey):
         # Get current balances
         prg_balance = get_porridge_balance()
         if prg_balance == 0:
-            print("No PORRIDGE to stir")
+            logger.info("No PORRIDGE to stir")
             return False, 0, 0, 0
 
-        # Calculate HONEY needed for stirring all PORRIDGE
+        # Decide how much to stir with the available HONEY
         floor_price = get_floor_price()
-        needed_honey_full = (floor_price * prg_balance) // (10 ** 18)
-        print(f"Needed HONEY for full stir: {format_amount(needed_honey_full)} HONEY")
-
-        # Check HONEY availability and determine strategy
-        honey_to_use, can_stir_full, using_wallet_honey = check_honey_for_stir(needed_honey_full, borrowed_honey)
-
-        if honey_to_use == 0:
-            print("No HONEY available for stirring")
-            return False, prg_balance, 0, 0
-
-        # Determine how much to stir
-        if can_stir_full:
-            # Can stir all PORRIDGE
-            stir_amount = prg_balance
-            honey_used = needed_honey_full
-            stir_percentage = 100
-        else:
-            # Calculate how much PORRIDGE can be stirred with available HONEY
-            stirable_prg = calculate_stirable_porridge(honey_to_use, floor_price)
+        stir = plan_stir(prg_balance, floor_price, get_honey_balance(), borrowed_honey,
+                         wallet_settings.current().allow_wallet_honey)
+        logger.info("Needed HONEY for full stir: %s HONEY", format_amount(stir.needed_honey))
 
-            if stirable_prg == 0:
-                print("Not enough HONEY to stir even 1 PORRIDGE")
-                return False, prg_balance, needed_honey_full, 0
+        if stir.amount == 0:
+            if stir.honey_used == 0:
+                logger.info("No HONEY available for stirring")
+                return False, prg_balance, 0, 0
+            logger.info("Not enough HONEY to stir even 1 PORRIDGE")
+            return False, prg_balance, stir.honey_used, 0
 
-            stir_amount = min(stirable_prg, prg_balance)
-            honey_used = (floor_price * stir_amount) // (10 ** 18)
-            stir_percentage = (stir_amount * 100) // prg_balance
+        stir_amount, honey_used, stir_percentage, using_wallet_honey = \
+            stir.amount, stir.honey_used, stir.percentage, stir.using_wallet_honey
 
         # Print strategy details
         wallet_msg = " (including wallet HONEY)" if using_wallet_honey else ""
-        print(f"Stirring {format_amount(stir_amount)} PORRIDGE ({stir_percentage}%) "
-              f"using {format_amount(honey_used)} HONEY{wallet_msg}")
+        logger.info("Stirring %s PORRIDGE (%s%%) using %s HONEY%s",
+                    format_amount(stir_amount), stir_percentage, format_amount(honey_used), wallet_msg)
 
         # Approve tokens for stirring
-        await approve_if_needed(honey_contract, config.PORRIDGE_ADDRESS, honey_used)
-        await approve_if_needed(porridge_contract, config.PORRIDGE_ADDRESS, stir_amount)
+        await approve_if_needed(honey_contract, porridge_contract.address, honey_used)
+        await approve_if_needed(porridge_contract, porridge_contract.address, stir_amount)
 
         # Execute stir
         receipt = await send_tx(porridge_contract.functions.stir(stir_amount))
@@ -220,15 +253,15 @@ async def stir_porridge(borrowed_honey):
                 continue
 
         if stirred_amount > 0:
-            print(f"Successfully stirred {format_amount(stirred_amount)} PORRIDGE")
+            logger.info("Successfully stirred %s PORRIDGE", format_amount(stirred_amount))
         else:
-            print(f"Stir transaction confirmed, but couldn't verify amount from events")
+            logger.warning("Stir transaction confirmed, but couldn't verify amount from events")
 
         # Return success, leftover PORRIDGE, honey used, and stir percentage
         leftover_prg = prg_balance - stir_amount
         return True, leftover_prg, honey_used, stir_percentage
     except Exception as e:
-        print(f"Error in stir_porridge: {e}")
+        logger.error("Error in stir_porridge: %s", e)
         raise
 
 
@@ -240,15 +273,15 @@ async def stake_all_locks():
         Success status
     """
     try:
-        locks_balance = locks_contract.functions.balanceOf(ACCOUNT.address).call()
+        locks_balance = get_locks_balance()
         if locks_balance == 0:
-            print("No LOCKS to stake")
+            logger.info("No LOCKS to stake")
             return False
 
-        print(f"Staking {format_amount(locks_balance)} LOCKS")
+        logger.info("Staking %s LOCKS", format_amount(locks_balance))
 
         # Approve LOCKS for porridge contract
-        await approve_if_needed(locks_contract, config.PORRIDGE_ADDRESS, locks_balance)
+        await approve_if_needed(locks_contract, porridge_contract.address, locks_balance)
 
         # Execute stake
         receipt = await send_tx(porridge_contract.functions.stake(locks_balance))
@@ -264,13 +297,13 @@ async def stake_all_locks():
                 continue
 
         if staked_amount > 0:
-            print(f"Successfully staked {format_amount(staked_amount)} LOCKS")
+            logger.info("Successfully staked %s LOCKS", format_amount(staked_amount))
         else:
-            print(f"Stake transaction confirmed, but couldn't verify amount from events")
+            logger.warning("Stake transaction confirmed, but couldn't verify amount from events")
 
         return True
     except Exception as e:
-        print(f"Error in stake_all_locks: {e}")
+        logger.error("Error in stake_all_locks: %s", e)
         raise
 
 
@@ -0,0 +1,195 @@
+"""
+Position model for the Goldilocks DeFi bot.
+Keeps each wallet's token balances, staked LOCKS and borrowed HONEY in
+memory and updates them from the events of the bot's own receipts
+(Transfer, Borrow, Repay, Stake, Unstake), so the cycle does not have to
+re-read them after every transaction. The model is checked against a full
+Multicall3 snapshot periodically and whenever it cannot account for a change.
+"""
+from eth_abi.abi import default_codec
+from web3 import Web3
+
+import clock
+import config
+from abi_tables import get_tables
+from deployments import wallet_key
+from logger import get_logger
+from status import contract_addresses, snapshot
+
+logger = get_logger(__name__)
+
+# Snapshot fields the model tracks (see status.WALLET_READS)
+TRACKED = ("honey_balance", "locks_balance", "prg_balance", "staked_locks", "borrowed_honey")
+BALANCE_FIELDS = {"honey": "honey_balance", "locks": "locks_balance", "porridge": "prg_balance"}
+
+# Position events of the wallet and the field they move
+POSITION_EVENTS = {
+    "Borrow": ("borrowed_honey", 1),
+    "Repay": ("borrowed_honey", -1),
+    "Stake": ("staked_locks", 1),
+    "Unstake": ("staked_locks", -1),
+}
+
+
+def event_index():
+    """Map (contract address, topic0) to (contract name, event) for the three contracts of the current deployment."""
+    addresses = contract_addresses()
+    index = {}
+    for name, tables in get_tables().items():
+        for event in tables.events.values():
+            index[(addresses[name], bytes(event.topic))] = (name, event)
+    return index
+
+
+def decode_log(index, log):
+    """
+    Decode a receipt log of one of the three contracts.
+
+    Args:
+        index: Mapping from event_index()
+        log: Receipt log
+
+    Returns:
+        (contract name, event name, {argument: value}) or None for foreign logs
+    """
+    if not log["topics"]:
+        return None
+    key = (Web3.to_checksum_address(log["address"]), bytes(log["topics"][0]))
+    if key not in index:
+        return None
+    contract, event = index[key]
+    indexed = [(name, typ) for name, typ, is_indexed in event.inputs if is_indexed]
+    data = [(name, typ) for name, typ, is_indexed in event.inputs if not is_indexed]
+    args = {name: default_codec.decode([typ], bytes(topic))[0] for (name, typ), topic in zip(indexed, log["topics"][1:])}
+    args.update(zip((name for name, _ in data), default_codec.decode([typ for _, typ in data], bytes(log["data"]))))
+    return contract, event.name, args
+
+
+class Position:
+    """
+    Event-sourced view of one wallet's balances and protocol position.
+    """
+
+    def __init__(self, wallet, verify_interval=None):
+        """
+        Initialize an empty model; it is filled by the first sync().
+
+        Args:
+            wallet: Checksummed wallet address
+            verify_interval: Seconds between snapshot checks (default POSITION_VERIFY_INTERVAL)
+        """
+        self.wallet = wallet
+        self.verify_interval = config.POSITION_VERIFY_INTERVAL if verify_interval is None else verify_interval
+        self.values = {}
+        self.synced_at = None
+        self.synced_block = None
+        self.applied = 0
+        self.drift_count = 0
+        self._index = None
+
+    def needs_sync(self):
+        """True before the first snapshot, after an unexplained change, or when a check is due."""
+        return self.synced_at is None or clock.monotonic() - self.synced_at >= self.verify_interval
+
+    def sync(self, w3):
+        """
+        Replace the model with a snapshot, logging any drift from it.
+
+        Args:
+            w3: Web3 instance
+        """
+        status = snapshot(w3, [self.wallet])
+        fresh = {field: status["wallets"][self.wallet][field] for field in TRACKED}
+        drift = {field: (self.values[field], fresh[field]) for field in TRACKED
+                 if field in self.values and self.values[field] != fresh[field]}
+        if drift:
+            self.drift_count += 1
+            logger.warning("Position model drifted from chain state after %s receipts: %s", self.applied,
+                           ", ".join(f"{field} {old} -> {new}" for field, (old, new) in drift.items()))
+        self.values = fresh
+        self.synced_at = clock.monotonic()
+        self.synced_block = status["block"]
+        self.applied = 0
+
+    def invalidate(self):
+        """Resync before the next read, e.g. after a transaction whose receipt could not be applied."""
+        self.synced_at = None
+
+    def disable(self):
+        """Drop the model until the next check is due, e.g. when no snapshot could be taken."""
+        self.values = {}
+        self.synced_at = clock.monotonic()
+
+    def get(self, field):
+        """
+        Get a tracked value.
+
+        Args:
+            field: One of TRACKED
+
+        Returns:
+            Value in wei, or None when the model does not know it
+        """
+        return self.values.get(field)
+
+    def apply_receipt(self, receipt):
+        """
+        Apply the events of one of the wallet's receipts.
+
+        Args:
+            receipt: Transaction receipt
+        """
+        if self._index is None:
+            self._index = event_index()
+        for log in receipt["logs"]:
+            decoded = decode_log(self._index, log)
+            if decoded is None:
+                continue
+            contract, event, args = decoded
+            if event == "Transfer":
+                field = BALANCE_FIELDS[contract]
+                if Web3.to_checksum_address(args["from"]) == self.wallet:
+                    self._add(field, -args["amount"])
+                if Web3.to_checksum_address(args["to"]) == self.wallet:
+                    self._add(field, args["amount"])
+            elif event in POSITION_EVENTS and contract == "porridge" \
+                    and Web3.to_checksum_address(args["user"]) == self.wallet:
+                field, sign = POSITION_EVENTS[event]
+                self._add(field, sign * args["amount"])
+        self.applied += 1
+
+    def _add(self, field, amount):
+        if field not in self.values:
+            return
+        value = self.values[field] + amount
+        if value < 0:
+            # Something moved that the receipts did not show; resync before the next read
+            logger.warning("Position model lost track of %s, resyncing", field)
+            self.values = {}
+            self.synced_at = None
+            return
+        self.values[field] = value
+
+
+_positions = {}
+
+
+def get_position(wallet):
+    """
+    Get the position model of a wallet on the current deployment, creating it on first use.
+
+    Args:
+        wallet: Checksummed wallet address
+
+    Returns:
+        Position instance
+    """
+    key = wallet_key(wallet)
+    if key not in _positions:
+        _positions[key] = Position(wallet)
+    return _positions[key]
+
+
+def reset_positions():
+    """Forget all models, e.g. after switching chains."""
+    _positions.clear()
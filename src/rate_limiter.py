@@ -0,0 +1,233 @@
+"""
+RPC rate limiting module for the Goldilocks DeFi bot.
+Per-endpoint token buckets shared by priority classes, installed as web3
+middleware so every request of the bot goes through them.
+"""
+import contextlib
+import contextvars
+import threading
+from enum import IntEnum
+
+import requests
+from web3.middleware import Web3Middleware
+
+import clock
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    RPC priority classes, most urgent first.
+    """
+    BROADCAST = 0  # eth_sendRawTransaction: never throttled
+    RECEIPT = 1    # receipt checks of transactions already in flight
+    READ = 2       # contract state reads of the protocol cycle
+    BULK = 3       # indexing, analytics and other background reads
+
+
+# Fraction of the bucket a class must leave for the classes above it
+RESERVED_SHARE = {
+    Priority.BROADCAST: 0.0,
+    Priority.RECEIPT: 0.1,
+    Priority.READ: 0.25,
+    Priority.BULK: 0.5,
+}
+
+METHOD_PRIORITY = {
+    "eth_sendRawTransaction": Priority.BROADCAST,
+    "eth_sendTransaction": Priority.BROADCAST,
+    "eth_getTransactionReceipt": Priority.RECEIPT,
+    "eth_getTransactionByHash": Priority.RECEIPT,
+}
+
+# JSON-RPC error codes/messages providers use for request caps
+RATE_LIMIT_CODES = {-32005, -32029, 429}
+
+_priority_override = contextvars.ContextVar("rpc_priority", default=None)
+
+
+@contextlib.contextmanager
+def rpc_priority(priority):
+    """
+    Run the enclosed reads at another priority class, e.g. Priority.BULK for analytics.
+
+    Args:
+        priority: Priority applied to requests that are not broadcasts or receipts
+    """
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def priority_for(method):
+    """
+    Classify a JSON-RPC method.
+
+    Args:
+        method: JSON-RPC method name
+
+    Returns:
+        Priority of the request
+    """
+    if method in METHOD_PRIORITY:
+        return METHOD_PRIORITY[method]
+    priority = _priority_override.get()
+    # Priority.BROADCAST is 0, so only None means no override
+    return Priority.READ if priority is None else priority
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket for one endpoint.
+    Broadcasts always pass (the bucket may go into debt); every other class
+    only takes a token while the bucket holds more than its reserved share.
+    After a 429 the lower classes pause with an adaptive, growing backoff
+    that decays again on successful requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Sustained requests per second allowed by the provider
+            burst: Bucket size (defaults to one second worth of requests)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self.tokens = self.burst
+        self.penalty = 1.0
+        self._updated = clock.monotonic()
+        self._paused_until = {p: 0.0 for p in Priority}
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, priority):
+        """
+        Take a token if the priority class may use one now.
+
+        Args:
+            priority: Priority of the request
+
+        Returns:
+            0 if a token was taken, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = clock.monotonic()
+            self._refill(now)
+            if priority == Priority.BROADCAST:
+                self.tokens -= 1
+                return 0
+            if now < self._paused_until[priority]:
+                return self._paused_until[priority] - now
+            reserve = min(self.burst - 1, RESERVED_SHARE[priority] * self.burst * self.penalty)
+            if self.tokens - 1 >= reserve:
+                self.tokens -= 1
+                return 0
+            return (reserve + 1 - self.tokens) / self.rate
+
+    def acquire(self, priority):
+        """
+        Block until the priority class may send a request.
+
+        Args:
+            priority: Priority of the request
+        """
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                return
+            clock.sleep(min(wait, 0.25))
+
+    def on_throttled(self):
+        """Back off the non-broadcast classes after the provider rejected a request."""
+        with self._lock:
+            self.penalty = min(self.penalty * 2, 8.0)
+            now = clock.monotonic()
+            for priority in Priority:
+                if priority != Priority.BROADCAST:
+                    pause = 0.25 * self.penalty * priority
+                    self._paused_until[priority] = max(self._paused_until[priority], now + pause)
+            # Whatever the bucket believed, the provider says we're out
+            self.tokens = min(self.tokens, 0)
+        logger.warning("RPC rate limited by provider, backing off lower priorities (penalty x%s)", self.penalty)
+
+    def on_success(self):
+        """Let the backoff decay again."""
+        if self.penalty > 1.0:
+            with self._lock:
+                self.penalty = max(1.0, self.penalty - 0.05)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(endpoint, rate, burst=None):
+    """
+    Get the shared limiter of an endpoint, creating it on first use.
+
+    Args:
+        endpoint: Endpoint URI or IPC path
+        rate: Requests per second
+        burst: Bucket size
+
+    Returns:
+        PriorityRateLimiter for the endpoint
+    """
+    with _limiters_lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = PriorityRateLimiter(rate, burst)
+        return _limiters[endpoint]
+
+
+def is_rate_limit_response(response):
+    """Whether a JSON-RPC response is a provider rate-limit error."""
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error:
+        return False
+    return error.get("code") in RATE_LIMIT_CODES or "rate limit" in str(error.get("message", "")).lower()
+
+
+def rate_limit_middleware(rate, burst=None):
+    """
+    Build a web3 middleware class limiting requests to `rate` per second per endpoint.
+
+    Args:
+        rate: Requests per second
+        burst: Bucket size
+
+    Returns:
+        Web3Middleware subclass to inject into a Web3 instance
+    """
+
+    class RateLimitMiddleware(Web3Middleware):
+        def wrap_make_request(self, make_request):
+            provider = self._w3.provider
+            endpoint = getattr(provider, "endpoint_uri", None) or getattr(provider, "ipc_path", None) or repr(provider)
+            limiter = get_limiter(str(endpoint), rate, burst)
+
+            def middleware(method, params):
+                limiter.acquire(priority_for(method))
+                try:
+                    response = make_request(method, params)
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 429:
+                        limiter.on_throttled()
+                    raise
+                if is_rate_limit_response(response):
+                    limiter.on_throttled()
+                else:
+                    limiter.on_success()
+                return response
+
+            return middleware
+
+    return RateLimitMiddleware
@@ -0,0 +1,219 @@
+"""
+RPC resilience module for the Goldilocks DeFi bot.
+Retries transient RPC failures with jittered exponential backoff and stops
+hammering an endpoint that keeps failing with a per-endpoint circuit breaker.
+Installed as web3 middleware, so contract reads, receipt checks and sends
+all get the same treatment.
+"""
+import random
+import threading
+
+import requests
+from eth_utils import keccak
+from web3.middleware import Web3Middleware
+
+import clock
+from logger import get_logger
+from tracing import set_attributes
+
+logger = get_logger(__name__)
+
+# Never retried: the node would sign and send a second transaction
+UNSAFE_METHODS = {"eth_sendTransaction", "eth_sign", "eth_signTransaction"}
+
+# JSON-RPC error codes that say "try again" rather than "your request is wrong"
+TRANSIENT_CODES = {-32005, -32029, -32603, 429}
+TRANSIENT_MESSAGES = ("rate limit", "timeout", "timed out", "header not found", "try again", "busy")
+
+# sendRawTransaction errors meaning an earlier attempt already reached the node
+KNOWN_TX_MESSAGES = ("already known", "known transaction", "already imported")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+    Opens after `threshold` failures in a row, rejects requests for
+    `reset_timeout` seconds, then lets a single trial request through
+    (half-open) which either closes the circuit or opens it again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return "closed"
+        if clock.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        """
+        Check whether a request may be sent now.
+
+        Returns:
+            True if the request may go ahead
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("RPC endpoint recovered, closing circuit")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = clock.monotonic()
+                logger.warning("RPC endpoint failed %s times in a row, opening circuit for %ss",
+                               self.failures, self.reset_timeout)
+            self._trial_running = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint, threshold=5, reset_timeout=30.0):
+    """
+    Get the shared circuit breaker of an endpoint, creating it on first use.
+
+    Args:
+        endpoint: Endpoint URI or IPC path
+        threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds before a trial request is let through
+
+    Returns:
+        CircuitBreaker for the endpoint
+    """
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(threshold, reset_timeout)
+        return _breakers[endpoint]
+
+
+def backoff_delay(attempt, base=0.05, cap=2.0):
+    """
+    Full-jitter exponential backoff.
+
+    Args:
+        attempt: Number of the retry, starting at 0
+        base: Delay ceiling of the first retry in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Seconds to sleep before the retry
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_transient_error(exc):
+    """Whether an exception raised by the provider is worth retrying."""
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return status is None or status == 429 or status >= 500
+    # Connection errors and timeouts of requests, sockets and IPC are all OSErrors
+    return isinstance(exc, OSError)
+
+
+def is_transient_response(response):
+    """Whether a JSON-RPC error response is worth retrying."""
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error:
+        return False
+    message = str(error.get("message", "")).lower()
+    return error.get("code") in TRANSIENT_CODES or any(m in message for m in TRANSIENT_MESSAGES)
+
+
+def _is_known_tx_response(response):
+    error = response.get("error") if isinstance(response, dict) else None
+    return bool(error) and any(m in str(error.get("message", "")).lower() for m in KNOWN_TX_MESSAGES)
+
+
+def resilience_middleware(retries=3, base_delay=0.05, max_delay=2.0, breaker_threshold=5, breaker_reset=30.0):
+    """
+    Build a web3 middleware class retrying transient RPC failures.
+
+    Reads and receipt checks are retried as they are. A raw transaction is
+    retried too: its hash is fixed by the signed bytes, so when a retry finds
+    the node already knows it, the hash is returned instead of an error.
+
+    Args:
+        retries: Retries after the first attempt
+        base_delay: Backoff ceiling of the first retry in seconds
+        max_delay: Maximum backoff in seconds
+        breaker_threshold: Consecutive failures that open the endpoint's circuit
+        breaker_reset: Seconds the circuit stays open
+
+    Returns:
+        Web3Middleware subclass to inject into a Web3 instance
+    """
+
+    class ResilienceMiddleware(Web3Middleware):
+        def wrap_make_request(self, make_request):
+            provider = self._w3.provider
+            endpoint = getattr(provider, "endpoint_uri", None) or getattr(provider, "ipc_path", None) or repr(provider)
+            breaker = get_breaker(str(endpoint), breaker_threshold, breaker_reset)
+
+            def middleware(method, params):
+                attempts = 1 if method in UNSAFE_METHODS else retries + 1
+                for attempt in range(attempts):
+                    if not breaker.allow():
+                        raise CircuitOpenError(f"Circuit open for {endpoint}, not sending {method}")
+                    last = attempt == attempts - 1
+                    if attempt:
+                        set_attributes(**{"rpc.attempts": attempt + 1})
+                    try:
+                        response = make_request(method, params)
+                    except Exception as e:
+                        if not is_transient_error(e):
+                            # The endpoint answered, the request itself is at fault
+                            breaker.record_success()
+                            raise
+                        breaker.record_failure()
+                        if last:
+                            raise
+                        reason = e
+                    else:
+                        if attempt and method == "eth_sendRawTransaction" and _is_known_tx_response(response):
+                            breaker.record_success()
+                            return {"jsonrpc": "2.0", "id": response.get("id"),
+                                    "result": "0x" + keccak(hexstr=params[0]).hex()}
+                        if not is_transient_response(response):
+                            breaker.record_success()
+                            return response
+                        breaker.record_failure()
+                        if last:
+                            return response
+                        reason = response["error"].get("message")
+
+                    delay = backoff_delay(attempt, base_delay, max_delay)
+                    logger.debug("Retrying %s in %.0f ms (attempt %s/%s): %s",
+                                 method, delay * 1000, attempt + 2, attempts, reason)
+                    clock.sleep(delay)
+
+            return middleware
+
+    return ResilienceMiddleware
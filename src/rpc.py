@@ -0,0 +1,53 @@
+"""
+RPC connection module for the Goldilocks DeFi bot.
+Builds providers and Web3 instances with the bot's RPC layers (tracing,
+retries, rate limiting), for the bot as well as the read-only tools.
+"""
+from web3 import Web3
+
+import config
+from rate_limiter import rate_limit_middleware
+from resilience import resilience_middleware
+from tracing import tracing_middleware
+
+
+def make_provider(uri):
+    """
+    Build a synchronous provider for an HTTP(S) URL or a local IPC socket path.
+
+    Args:
+        uri: RPC endpoint URL or IPC path
+
+    Returns:
+        Provider instance for Web3
+    """
+    if uri.startswith(("http://", "https://")):
+        # Retries are handled by the resilience middleware, which also covers sends
+        return Web3.HTTPProvider(uri, request_kwargs={"timeout": config.RPC_TIMEOUT},
+                                 exception_retry_configuration=None)
+    if uri.startswith(("ws://", "wss://")):
+        raise ValueError("RPC_URL must be an HTTP(S) URL or an IPC path, use SUBSCRIPTION_URL for WebSockets")
+    return Web3.IPCProvider(uri, timeout=config.RPC_TIMEOUT)
+
+
+def make_web3(provider):
+    """
+    Create a Web3 instance with the tracing, retry and rate limit middleware.
+
+    Args:
+        provider: Provider from make_provider() (or a recording/replay wrapper)
+
+    Returns:
+        Web3 instance
+    """
+    w3 = Web3(provider)
+    # Outermost of the RPC layers, so a span covers retries and rate limit waits
+    w3.middleware_onion.inject(tracing_middleware(), "tracing", layer=0)
+    w3.middleware_onion.inject(
+        resilience_middleware(config.RPC_RETRIES, breaker_threshold=config.RPC_BREAKER_THRESHOLD,
+                              breaker_reset=config.RPC_BREAKER_RESET),
+        "resilience", layer=0)
+    if config.RPC_RATE_LIMIT > 0:
+        # Innermost layer, below the retries, so every attempt is counted
+        w3.middleware_onion.inject(rate_limit_middleware(config.RPC_RATE_LIMIT, config.RPC_BURST), "rate_limit", layer=0)
+    return w3
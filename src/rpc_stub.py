@@ -0,0 +1,798 @@
+"""
+Local JSON-RPC stand-in for the Goldilocks contracts.
+Emulates HONEY/LOCKS/PORRIDGE state (balances, allowances, borrow limits,
+claimable PRG, prices) and the borrow/claim/stir/stake/buy effects, so the
+bot can run end to end on a laptop without a node or a funded key.
+
+Usage:
+    python rpc_stub.py --port 8545 --block-time 2 --latency 0.02 --error-rate 0.01
+
+Point RPC_URL at http://127.0.0.1:8545 and WEBHOOK_URL at
+http://127.0.0.1:8545/webhook; the contract addresses match env-demo.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import (
+    event_abi_to_log_topic,
+    function_abi_to_4byte_selector,
+    keccak,
+    to_checksum_address,
+)
+
+ABI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ABIs")
+
+CHAIN_ID = 31337
+HONEY_ADDRESS = to_checksum_address("0xfcbd14dc51f0a4d49d5e53c2e0950e0bc26d0dce")
+LOCKS_ADDRESS = to_checksum_address("0xb7e448e5677d212b8c8da7d6312e8afc49800466")
+PORRIDGE_ADDRESS = to_checksum_address("0xbf2e152f460090ace91a456e3dee5acf703f27ad")
+ZERO_ADDRESS = "0x" + "00" * 20
+MULTICALL3_ADDRESS = to_checksum_address("0xca11bde05977b3631167028862be2a173976ca11")
+# Stand-in runtime code of Multicall3; an eth_call overriding an account's code with it runs
+# aggregate3 from that account (see simulation.py)
+MULTICALL3_CODE = "0x" + keccak(text="Multicall3").hex()
+
+TOKEN_INFO = {
+    HONEY_ADDRESS: ("honey", "Honey", "HONEY"),
+    LOCKS_ADDRESS: ("locks", "Goldilocks DAO", "LOCKS"),
+    PORRIDGE_ADDRESS: ("porridge", "Porridge Token", "PRG"),
+}
+
+# Gas charged per emulated function; anything else costs DEFAULT_GAS
+GAS_COSTS = {
+    "approve": 46000,
+    "transfer": 52000,
+    "transferFrom": 60000,
+    "borrow": 140000,
+    "claim": 95000,
+    "stir": 170000,
+    "stake": 120000,
+    "buy": 160000,
+}
+DEFAULT_GAS = 60000
+MULTICALL3_AGGREGATE3 = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+MULTICALL3_GET_ETH_BALANCE = keccak(text="getEthBalance(address)")[:4]
+ERROR_SELECTOR = keccak(text="Error(string)")[:4]
+SECONDS_PER_YEAR = 365 * 24 * 3600
+PRECISION = 10 ** 18
+
+
+class Revert(Exception):
+    """Raised by contract handlers when the emulated call reverts."""
+
+
+class InjectedError(Exception):
+    """Raised when error injection decides to fail a request."""
+
+
+def _load_abis():
+    """
+    Build the selector and event tables from the full ABI files.
+
+    Returns:
+        (functions, events) where functions maps (address, selector) to the
+        function ABI and events maps (address, name) to (topic, event ABI)
+    """
+    functions = {}
+    events = {}
+    for address, (name, _, _) in TOKEN_INFO.items():
+        with open(os.path.join(ABI_DIR, f"abi_{name}.json")) as f:
+            abi = json.load(f)
+        for entry in abi:
+            if entry["type"] == "function":
+                functions[(address, function_abi_to_4byte_selector(entry))] = entry
+            elif entry["type"] == "event":
+                events[(address, entry["name"])] = (event_abi_to_log_topic(entry), entry)
+    return functions, events
+
+
+def _abi_types(params):
+    """Canonical ABI type strings for a list of ABI parameters."""
+    types = []
+    for param in params:
+        if param["type"].startswith("tuple"):
+            types.append("(" + ",".join(_abi_types(param["components"])) + ")" + param["type"][5:])
+        else:
+            types.append(param["type"])
+    return types
+
+
+def _hex(value):
+    """Hex-encode ints and bytes the way JSON-RPC expects."""
+    if isinstance(value, int):
+        return hex(value)
+    return "0x" + bytes(value).hex()
+
+
+def _decode_raw_transaction(raw):
+    """
+    Decode a signed legacy or typed transaction.
+
+    Returns:
+        dict with sender, nonce, to, data, gas, gas_price, value and hash
+    """
+    sender = Account.recover_transaction(raw)
+    if raw[0] <= 0x7f:
+        fields = TypedTransaction.from_bytes(raw).as_dict()
+        gas_price = fields.get("gasPrice", fields.get("maxFeePerGas", 0))
+    else:
+        nonce, gas_price, gas, to, value, data = rlp.decode(raw)[:6]
+        fields = {
+            "nonce": int.from_bytes(nonce, "big"),
+            "gas": int.from_bytes(gas, "big"),
+            "to": to,
+            "value": int.from_bytes(value, "big"),
+            "data": data,
+        }
+        gas_price = int.from_bytes(gas_price, "big")
+    return {
+        "sender": sender,
+        "nonce": fields["nonce"],
+        "to": to_checksum_address(fields["to"]) if fields["to"] else None,
+        "data": bytes(fields["data"]),
+        "gas": fields["gas"],
+        "gas_price": gas_price,
+        "value": fields["value"],
+        "hash": keccak(raw),
+    }
+
+
+class _Call:
+    """Execution context of one emulated call."""
+
+    def __init__(self, sender, dry):
+        self.sender = sender
+        self.dry = dry
+        self.logs = []
+
+
+class StubChain:
+    """
+    In-memory chain state plus the JSON-RPC methods the bot uses.
+    """
+
+    def __init__(self, block_time=0, latency=0.0, error_rate=0.0, error_kind="rpc",
+                 floor_price=PRECISION, market_price=2 * PRECISION, prg_apr=0.5,
+                 gas_price=10 ** 9, clock=time.time, seed=0):
+        """
+        Initialize the chain.
+
+        Args:
+            block_time: Seconds per block; 0 mines every transaction immediately
+            latency: Seconds added to every request
+            error_rate: Probability that a request fails
+            error_kind: "rpc" for a JSON-RPC error, "http" for an HTTP 429
+            floor_price: LOCKS floor price in HONEY (18 decimals)
+            market_price: LOCKS market price in HONEY (18 decimals)
+            prg_apr: PRG accrued per staked LOCKS per year
+            gas_price: Gas price reported by eth_gasPrice
+            clock: Time source in seconds
+            seed: Seed for error injection
+        """
+        self.block_time = block_time
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_kind = error_kind
+        self.floor_price = floor_price
+        self.market_price = market_price
+        self.prg_apr_ppm = int(prg_apr * 1_000_000)
+        self.gas_price = gas_price
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._functions, self._events = _load_abis()
+
+        self.balances = {token: defaultdict(int) for token in TOKEN_INFO}
+        self.allowances = {token: defaultdict(int) for token in TOKEN_INFO}
+        self.staked = defaultdict(int)
+        self.borrowed = defaultdict(int)
+        self.claimable = defaultdict(int)
+        self.accrued_at = {}
+        self.fsl = 1_000_000 * PRECISION
+        self.psl = 250_000 * PRECISION
+
+        # Contract state an eth_call with overrides may change; restored afterwards
+        self._state_fields = ("balances", "allowances", "staked", "borrowed", "claimable", "accrued_at", "fsl", "psl")
+
+        self.nonces = defaultdict(int)
+        self.pending = []
+        self.receipts = {}
+        self.block_txs = defaultdict(list)
+        self.genesis_time = clock()
+        self._automine_block = 0
+        self._automine_times = {}
+
+        self.request_count = 0
+        self.method_counts = Counter()
+        self.webhook_messages = []
+
+    # -- seeding -- #
+
+    def fund(self, address, honey=0, locks=0, porridge=0, staked=0, borrowed=0):
+        """Give an account balances and a staked/borrowed position."""
+        address = to_checksum_address(address)
+        with self._lock:
+            self.balances[HONEY_ADDRESS][address] += honey
+            self.balances[LOCKS_ADDRESS][address] += locks
+            self.balances[PORRIDGE_ADDRESS][address] += porridge
+            self._accrue(address)
+            self.staked[address] += staked
+            self.borrowed[address] += borrowed
+
+    # -- blocks -- #
+
+    def block_number(self):
+        """Current block number."""
+        if self.block_time:
+            return int((self.clock() - self.genesis_time) // self.block_time)
+        return self._automine_block
+
+    def block_timestamp(self, number):
+        """Timestamp of a block."""
+        if self.block_time:
+            return int(self.genesis_time + number * self.block_time)
+        return int(self._automine_times.get(number, self.genesis_time))
+
+    def _advance(self):
+        """Mine pending transactions whose block has been reached."""
+        if not self.pending:
+            return
+        current = self.block_number()
+        ready = [tx for tx in self.pending if tx["block"] <= current]
+        if ready:
+            self.pending = [tx for tx in self.pending if tx["block"] > current]
+            for tx in ready:
+                self._mine(tx, tx["block"])
+
+    def _mine(self, tx, number):
+        """Execute a transaction and store its receipt."""
+        self.nonces[tx["sender"]] += 1
+        ctx = _Call(tx["sender"], dry=False)
+        status, gas_used = 1, DEFAULT_GAS
+        try:
+            gas_used = self._gas_for(tx["to"], tx["data"])
+            if tx["gas"] < gas_used:
+                raise Revert("out of gas")
+            # Dry run first so a revert never leaves half-applied state behind
+            self._execute(_Call(tx["sender"], dry=True), tx["to"], tx["data"])
+            self._execute(ctx, tx["to"], tx["data"])
+        except Revert:
+            status, ctx.logs = 0, []
+        index = len(self.block_txs[number])
+        self.block_txs[number].append(tx["hash"])
+        block_hash = keccak(number.to_bytes(32, "big"))
+        logs = []
+        for log_index, (address, topics, data) in enumerate(ctx.logs):
+            logs.append({
+                "address": address,
+                "topics": [_hex(t) for t in topics],
+                "data": _hex(data),
+                "blockNumber": hex(number),
+                "blockHash": _hex(block_hash),
+                "transactionHash": _hex(tx["hash"]),
+                "transactionIndex": hex(index),
+                "logIndex": hex(log_index),
+                "removed": False,
+            })
+        self.receipts[tx["hash"]] = {
+            "transactionHash": _hex(tx["hash"]),
+            "transactionIndex": hex(index),
+            "blockHash": _hex(block_hash),
+            "blockNumber": hex(number),
+            "from": tx["sender"],
+            "to": tx["to"],
+            "cumulativeGasUsed": hex(gas_used),
+            "gasUsed": hex(gas_used),
+            "effectiveGasPrice": hex(tx["gas_price"]),
+            "contractAddress": None,
+            "logs": logs,
+            "logsBloom": "0x" + "00" * 256,
+            "status": hex(status),
+            "type": "0x0",
+        }
+
+    # -- JSON-RPC -- #
+
+    def handle(self, request):
+        """
+        Handle a decoded JSON-RPC request or batch.
+
+        Args:
+            request: dict or list of dicts
+
+        Returns:
+            Response dict or list of dicts
+        """
+        if isinstance(request, list):
+            return [self.handle(item) for item in request]
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.request_count += 1
+            self.method_counts[request["method"]] += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                if self.error_kind == "http":
+                    raise InjectedError("injected HTTP 429")
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32005, "message": "injected: request rate exceeded"}}
+            self._advance()
+            try:
+                method = getattr(self, "rpc_" + request["method"])
+            except AttributeError:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32601, "message": f"method not found: {request['method']}"}}
+            try:
+                result = method(*request.get("params", []))
+            except Revert as e:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": 3, "message": f"execution reverted: {e}", "data": "0x"}}
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32000, "message": str(e)}}
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def rpc_web3_clientVersion(self):
+        return "goldilocks-rpc-stub/1.0"
+
+    def rpc_net_version(self):
+        return str(CHAIN_ID)
+
+    def rpc_eth_chainId(self):
+        return hex(CHAIN_ID)
+
+    def rpc_eth_blockNumber(self):
+        return hex(self.block_number())
+
+    def rpc_eth_gasPrice(self):
+        return hex(self.gas_price)
+
+    def rpc_eth_maxPriorityFeePerGas(self):
+        return hex(self.gas_price // 10)
+
+    def rpc_eth_getBalance(self, address, block="latest"):
+        return hex(self._native_balance())
+
+    def rpc_eth_getCode(self, address, block="latest"):
+        address = to_checksum_address(address)
+        if address == MULTICALL3_ADDRESS:
+            return MULTICALL3_CODE
+        return "0x01" if address in TOKEN_INFO else "0x"
+
+    def rpc_eth_getTransactionCount(self, address, block="latest"):
+        address = to_checksum_address(address)
+        count = self.nonces[address]
+        if block == "pending":
+            count += sum(1 for tx in self.pending if tx["sender"] == address)
+        return hex(count)
+
+    def rpc_eth_getBlockByNumber(self, block, full=False):
+        if block == "earliest":
+            number = 0
+        elif block in ("latest", "pending", "safe", "finalized"):
+            number = self.block_number()
+        else:
+            number = int(block, 16)
+        return {
+            "number": hex(number),
+            "hash": _hex(keccak(number.to_bytes(32, "big"))),
+            "parentHash": _hex(keccak(max(number - 1, 0).to_bytes(32, "big"))),
+            "timestamp": hex(self.block_timestamp(number)),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "baseFeePerGas": hex(self.gas_price),
+            "miner": ZERO_ADDRESS,
+            "difficulty": "0x0",
+            "totalDifficulty": "0x0",
+            "extraData": "0x",
+            "logsBloom": "0x" + "00" * 256,
+            "nonce": "0x0000000000000000",
+            "mixHash": "0x" + "00" * 32,
+            "sha3Uncles": "0x" + "00" * 32,
+            "receiptsRoot": "0x" + "00" * 32,
+            "stateRoot": "0x" + "00" * 32,
+            "transactionsRoot": "0x" + "00" * 32,
+            "size": "0x0",
+            "uncles": [],
+            "transactions": [_hex(h) for h in self.block_txs.get(number, [])],
+        }
+
+    def rpc_eth_call(self, call, block="latest", state_overrides=None):
+        ctx = _Call(to_checksum_address(call.get("from") or ZERO_ADDRESS), dry=True)
+        to = to_checksum_address(call["to"])
+        data = bytes.fromhex(call.get("data", call.get("input", "0x"))[2:])
+        if state_overrides:
+            # Only code overrides with Multicall3 are emulated: the calls then run from that account, in order
+            overrides = {to_checksum_address(address): override for address, override in state_overrides.items()}
+            if any(set(o) != {"code"} or o["code"].lower() != MULTICALL3_CODE for o in overrides.values()):
+                raise ValueError("state override not emulated")
+            if to in overrides:
+                with self._scratch():
+                    return _hex(self._multicall(_Call(to, dry=False), data))
+        if to == MULTICALL3_ADDRESS:
+            return _hex(self._multicall(ctx, data))
+        return _hex(self._execute(ctx, to, data))
+
+    def rpc_eth_estimateGas(self, call, block="latest"):
+        to = to_checksum_address(call["to"])
+        data = bytes.fromhex(call.get("data", call.get("input", "0x"))[2:])
+        self._execute(_Call(to_checksum_address(call.get("from") or ZERO_ADDRESS), dry=True), to, data)
+        return hex(self._gas_for(to, data))
+
+    def rpc_eth_sendRawTransaction(self, raw):
+        tx = _decode_raw_transaction(bytes.fromhex(raw[2:]))
+        if tx["hash"] in self.receipts or any(p["hash"] == tx["hash"] for p in self.pending):
+            raise ValueError("already known")
+        expected = int(self.rpc_eth_getTransactionCount(tx["sender"], "pending"), 16)
+        if tx["nonce"] < expected:
+            raise ValueError("nonce too low")
+        if tx["nonce"] > expected:
+            raise ValueError("nonce too high")
+        if self.block_time:
+            tx["block"] = self.block_number() + 1
+            self.pending.append(tx)
+        else:
+            self._automine_block += 1
+            self._automine_times[self._automine_block] = self.clock()
+            self._mine(tx, self._automine_block)
+        return _hex(tx["hash"])
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash):
+        return self.receipts.get(bytes.fromhex(tx_hash[2:]))
+
+    # -- contract emulation -- #
+
+    def _gas_for(self, to, data):
+        fn = self._functions.get((to, data[:4]))
+        return GAS_COSTS.get(fn["name"], DEFAULT_GAS) if fn else DEFAULT_GAS
+
+    def _execute(self, ctx, to, data):
+        """Dispatch calldata to the emulated contract function."""
+        fn = self._functions.get((to, data[:4]))
+        if fn is None:
+            raise Revert("unknown function selector")
+        args = decode(_abi_types(fn["inputs"]), data[4:])
+        args = [to_checksum_address(a) if p["type"] == "address" else a for p, a in zip(fn["inputs"], args)]
+        handler = getattr(self, f"_{TOKEN_INFO[to][0]}_{fn['name']}", None) or getattr(self, f"_token_{fn['name']}", None)
+        if handler is None:
+            if fn["stateMutability"] not in ("view", "pure"):
+                raise Revert(f"{fn['name']} not emulated")
+            # Unemulated views answer with zero values of their output types
+            result = [0 if t.startswith(("uint", "int")) else False if t == "bool" else
+                      ZERO_ADDRESS if t == "address" else "" if t == "string" else b"\0" * 32
+                      for t in _abi_types(fn["outputs"])]
+        else:
+            result = handler(ctx, to, *args)
+            if not isinstance(result, (list, tuple)):
+                result = [result] if fn["outputs"] else []
+        return encode(_abi_types(fn["outputs"]), result)
+
+    def _multicall(self, ctx, data):
+        """Emulate Multicall3 aggregate3 and getEthBalance."""
+        if data[:4] == MULTICALL3_AGGREGATE3:
+            [calls] = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, allow_failure, calldata in calls:
+                target = to_checksum_address(target)
+                try:
+                    if target == MULTICALL3_ADDRESS:
+                        results.append((True, self._multicall(ctx, calldata)))
+                    else:
+                        if not ctx.dry:
+                            # Dry run first so a failed call leaves no half-applied state behind
+                            self._execute(_Call(ctx.sender, dry=True), target, calldata)
+                        results.append((True, self._execute(ctx, target, calldata)))
+                except Revert as e:
+                    if not allow_failure:
+                        raise Revert("Multicall3: call failed")
+                    results.append((False, ERROR_SELECTOR + encode(["string"], [str(e)])))
+            return encode(["(bool,bytes)[]"], [results])
+        if data[:4] == MULTICALL3_GET_ETH_BALANCE:
+            return encode(["uint256"], [self._native_balance()])
+        raise Revert("unknown function selector")
+
+    @contextmanager
+    def _scratch(self):
+        """Undo all contract state changes made inside the block."""
+        saved = copy.deepcopy({name: getattr(self, name) for name in self._state_fields})
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                setattr(self, name, value)
+
+    def _native_balance(self):
+        return 1000 * PRECISION
+
+    def _emit(self, ctx, address, name, *values):
+        """Record an event log on the call context."""
+        topic, event = self._events[(address, name)]
+        topics = [topic]
+        data_types, data_values = [], []
+        for param, value in zip(event["inputs"], values):
+            if param["indexed"]:
+                topics.append(encode([param["type"]], [value]))
+            else:
+                data_types.append(param["type"])
+                data_values.append(value)
+        ctx.logs.append((address, topics, encode(data_types, data_values)))
+
+    def _move(self, ctx, token, sender, recipient, amount):
+        """Transfer tokens (zero address mints/burns) with balance checks."""
+        if sender != ZERO_ADDRESS and self.balances[token][sender] < amount:
+            raise Revert(f"{TOKEN_INFO[token][2]}: insufficient balance")
+        if ctx.dry:
+            return
+        if sender != ZERO_ADDRESS:
+            self.balances[token][sender] -= amount
+        if recipient != ZERO_ADDRESS:
+            self.balances[token][recipient] += amount
+        self._emit(ctx, token, "Transfer", sender, recipient, amount)
+
+    def _spend_allowance(self, ctx, token, owner, spender, amount):
+        if self.allowances[token][(owner, spender)] < amount:
+            raise Revert(f"{TOKEN_INFO[token][2]}: insufficient allowance")
+        if not ctx.dry and self.allowances[token][(owner, spender)] != 2 ** 256 - 1:
+            self.allowances[token][(owner, spender)] -= amount
+
+    def _now(self):
+        return self.block_timestamp(self.block_number())
+
+    def _accrue(self, user):
+        """Checkpoint the PRG accrued by a user's staked LOCKS."""
+        now = self._now()
+        self.claimable[user] = self._claimable(user)
+        self.accrued_at[user] = now
+
+    def _claimable(self, user):
+        elapsed = max(0, self._now() - self.accrued_at.get(user, self._now()))
+        return self.claimable[user] + self.staked[user] * self.prg_apr_ppm * elapsed // (SECONDS_PER_YEAR * 1_000_000)
+
+    def _borrow_limit(self, user):
+        return max(0, self.staked[user] * self.floor_price // PRECISION - self.borrowed[user])
+
+    # ERC20 functions shared by all three tokens
+
+    def _token_name(self, ctx, token):
+        return TOKEN_INFO[token][1]
+
+    def _token_symbol(self, ctx, token):
+        return TOKEN_INFO[token][2]
+
+    def _token_decimals(self, ctx, token):
+        return 18
+
+    def _token_totalSupply(self, ctx, token):
+        return sum(self.balances[token].values()) + (sum(self.staked.values()) if token == LOCKS_ADDRESS else 0)
+
+    def _token_balanceOf(self, ctx, token, owner):
+        return self.balances[token][owner]
+
+    def _token_allowance(self, ctx, token, owner, spender):
+        return self.allowances[token][(owner, spender)]
+
+    def _token_approve(self, ctx, token, spender, amount):
+        if not ctx.dry:
+            self.allowances[token][(ctx.sender, spender)] = amount
+            self._emit(ctx, token, "Approval", ctx.sender, spender, amount)
+        return True
+
+    def _token_transfer(self, ctx, token, recipient, amount):
+        self._move(ctx, token, ctx.sender, recipient, amount)
+        return True
+
+    def _token_transferFrom(self, ctx, token, owner, recipient, amount):
+        self._spend_allowance(ctx, token, owner, ctx.sender, amount)
+        self._move(ctx, token, owner, recipient, amount)
+        return True
+
+    # LOCKS
+
+    def _locks_floorPrice(self, ctx, token):
+        return self.floor_price
+
+    def _locks_marketPrice(self, ctx, token):
+        return self.market_price
+
+    def _locks_fsl(self, ctx, token):
+        return self.fsl
+
+    def _locks_psl(self, ctx, token):
+        return self.psl
+
+    def _locks_targetRatio(self, ctx, token):
+        return 360 * 10 ** 15
+
+    def _locks_tradingActive(self, ctx, token):
+        return True
+
+    def _locks_honey(self, ctx, token):
+        return HONEY_ADDRESS
+
+    def _locks_buy(self, ctx, token, amount, max_amount):
+        cost = amount * self.market_price // PRECISION
+        if cost > max_amount:
+            raise Revert("slippage exceeded")
+        self._spend_allowance(ctx, HONEY_ADDRESS, ctx.sender, LOCKS_ADDRESS, cost)
+        self._move(ctx, HONEY_ADDRESS, ctx.sender, LOCKS_ADDRESS, cost)
+        if ctx.dry:
+            return
+        self.fsl += cost * self.floor_price // self.market_price
+        self.psl += cost - cost * self.floor_price // self.market_price
+        self._move(ctx, LOCKS_ADDRESS, ZERO_ADDRESS, ctx.sender, amount)
+        self._emit(ctx, LOCKS_ADDRESS, "Buy", ctx.sender, amount, self.fsl, self.psl,
+                   self._token_totalSupply(ctx, LOCKS_ADDRESS))
+
+    # PORRIDGE
+
+    def _porridge_honey(self, ctx, token):
+        return HONEY_ADDRESS
+
+    def _porridge_goldiswap(self, ctx, token):
+        return LOCKS_ADDRESS
+
+    def _porridge_annualPrgEmissions(self, ctx, token):
+        return sum(self.staked.values()) * self.prg_apr_ppm // 1_000_000
+
+    def _porridge_claimablePrgPerLocksStored(self, ctx, token):
+        elapsed = self._now() - self.genesis_time
+        return PRECISION * self.prg_apr_ppm * elapsed // (SECONDS_PER_YEAR * 1_000_000)
+
+    def _porridge_lastUpdateTime(self, ctx, token):
+        return self._now()
+
+    def _porridge_userClaimablePrg(self, ctx, token, user):
+        return self._claimable(user)
+
+    def _porridge_userBorrowLimit(self, ctx, token, user):
+        return self._borrow_limit(user)
+
+    def _porridge_userBorrowedHoney(self, ctx, token, user):
+        return self.borrowed[user]
+
+    _porridge_borrowedHoney = _porridge_userBorrowedHoney
+
+    def _porridge_userStakedLocks(self, ctx, token, user):
+        return self.staked[user]
+
+    _porridge_stakedLocks = _porridge_userStakedLocks
+
+    def _porridge_userLockedLocks(self, ctx, token, user):
+        return self.borrowed[user] * PRECISION // self.floor_price
+
+    def _porridge_borrow(self, ctx, token, amount):
+        if amount == 0 or amount > self._borrow_limit(ctx.sender):
+            raise Revert("insufficient borrow limit")
+        if ctx.dry:
+            return
+        self.borrowed[ctx.sender] += amount
+        self._emit(ctx, PORRIDGE_ADDRESS, "Borrow", ctx.sender, amount)
+        self._move(ctx, HONEY_ADDRESS, ZERO_ADDRESS, ctx.sender, amount)
+
+    def _porridge_claim(self, ctx, token):
+        amount = self._claimable(ctx.sender)
+        if ctx.dry:
+            return
+        self._accrue(ctx.sender)
+        self.claimable[ctx.sender] = 0
+        self._emit(ctx, PORRIDGE_ADDRESS, "Claim", ctx.sender, amount)
+        self._move(ctx, PORRIDGE_ADDRESS, ZERO_ADDRESS, ctx.sender, amount)
+
+    def _porridge_stir(self, ctx, token, amount):
+        cost = amount * self.floor_price // PRECISION
+        if self.balances[PORRIDGE_ADDRESS][ctx.sender] < amount:
+            raise Revert("insufficient PRG")
+        self._spend_allowance(ctx, HONEY_ADDRESS, ctx.sender, PORRIDGE_ADDRESS, cost)
+        self._move(ctx, HONEY_ADDRESS, ctx.sender, LOCKS_ADDRESS, cost)
+        if ctx.dry:
+            return
+        self.fsl += cost
+        self._move(ctx, PORRIDGE_ADDRESS, ctx.sender, ZERO_ADDRESS, amount)
+        self._move(ctx, LOCKS_ADDRESS, ZERO_ADDRESS, ctx.sender, amount)
+        self._emit(ctx, PORRIDGE_ADDRESS, "Stir", ctx.sender, amount)
+
+    def _porridge_stake(self, ctx, token, amount):
+        self._spend_allowance(ctx, LOCKS_ADDRESS, ctx.sender, PORRIDGE_ADDRESS, amount)
+        self._move(ctx, LOCKS_ADDRESS, ctx.sender, ZERO_ADDRESS, amount)
+        if ctx.dry:
+            return
+        self._accrue(ctx.sender)
+        self.staked[ctx.sender] += amount
+        self._emit(ctx, PORRIDGE_ADDRESS, "Stake", ctx.sender, amount)
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    HTTP front end for a StubChain. POSTs to / are JSON-RPC; POSTs to any other
+    path (e.g. /webhook) are recorded as Discord webhook messages.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, chain, host="127.0.0.1", port=0):
+        super().__init__((host, port), _StubRequestHandler)
+        self.chain = chain
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a daemon thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        chain = self.server.chain
+        if self.path.rstrip("/"):
+            content = body.get("content") if isinstance(body, dict) else body
+            chain.webhook_messages.append(content)
+            # Discord answers webhooks executed with wait=true with the created message
+            self._send_json({"id": str(len(chain.webhook_messages)), "type": 0, "content": content,
+                             "channel_id": "0", "timestamp": datetime.fromtimestamp(chain.clock(), timezone.utc).isoformat()})
+            return
+        try:
+            response = json.dumps(chain.handle(body)).encode()
+        except InjectedError:
+            self.send_response(429)
+            self.end_headers()
+            return
+        self._send_json(response)
+
+    def _send_json(self, response):
+        if not isinstance(response, bytes):
+            response = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON-RPC stand-in for the Goldilocks contracts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--block-time", type=float, default=0, help="seconds per block, 0 mines instantly")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a failed request")
+    parser.add_argument("--error-kind", choices=["rpc", "http"], default="rpc")
+    parser.add_argument("--fund", action="append", default=[],
+                        help="address to seed with 100 HONEY, 50 PRG and 1000 staked LOCKS (repeatable)")
+    args = parser.parse_args()
+
+    chain = StubChain(block_time=args.block_time, latency=args.latency,
+                      error_rate=args.error_rate, error_kind=args.error_kind)
+    for address in args.fund:
+        chain.fund(address, honey=100 * PRECISION, porridge=50 * PRECISION, staked=1000 * PRECISION)
+    server = StubServer(chain, args.host, args.port)
+    print(f"Goldilocks RPC stub listening on {server.url} (chain id {CHAIN_ID})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Fleet scanner for the Goldilocks DeFi bot.
+With many wallets, most of them are below BORROW_THRESHOLD on most blocks,
+and their cycles would read userBorrowLimit only to skip. The scanner reads
+the borrow limit, claimable PRG and token balances of the whole fleet in a
+few chunked Multicall3 calls per block, and only the wallets with work get a
+cycle (see main.fleet_loop).
+"""
+from eth_account import Account
+
+import clock
+import config
+import wallet_settings
+from abi_tables import get_tables
+from logger import get_logger
+from multicall import aggregate, contract_call
+from status import contract_addresses
+
+logger = get_logger(__name__)
+
+# (field, contract, function) read per wallet; the wallet is the only argument
+SCAN_READS = [
+    ("borrow_limit", "porridge", "userBorrowLimit"),
+    ("claimable_prg", "porridge", "userClaimablePrg"),
+    ("honey_balance", "honey", "balanceOf"),
+    ("prg_balance", "porridge", "balanceOf"),
+    ("locks_balance", "locks", "balanceOf"),
+]
+
+
+def load_accounts(path):
+    """
+    Load the fleet's accounts from a file with one private key per line.
+
+    Args:
+        path: Key file; empty lines and lines starting with # are skipped
+
+    Returns:
+        List of LocalAccount
+    """
+    with open(path) as f:
+        keys = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [Account.from_key(key) for key in keys]
+
+
+def build_calls(wallets):
+    """
+    Build the multicall batch of a scan.
+
+    Args:
+        wallets: Checksummed wallet addresses
+
+    Returns:
+        List of multicall.Call, SCAN_READS per wallet
+    """
+    tables = get_tables()
+    addresses = contract_addresses()
+    return [contract_call(tables[contract], addresses[contract], fn, wallet)
+            for wallet in wallets for _, contract, fn in SCAN_READS]
+
+
+def scan(w3, wallets, block="latest", chunk_wallets=100):
+    """
+    Read SCAN_READS for many wallets from one block.
+
+    Args:
+        w3: Web3 instance
+        wallets: Checksummed wallet addresses
+        block: Block number or tag
+        chunk_wallets: Wallets per eth_call
+
+    Returns:
+        Dict of wallet to {field: value}; None where a read failed
+    """
+    values = aggregate(w3, build_calls(wallets), block, chunk_size=chunk_wallets * len(SCAN_READS))
+    width = len(SCAN_READS)
+    return {wallet: {field: values[i * width + j] for j, (field, _, _) in enumerate(SCAN_READS)}
+            for i, wallet in enumerate(wallets)}
+
+
+def has_work(reading, threshold):
+    """
+    Whether a wallet's cycle would get past the borrow step.
+
+    Args:
+        reading: Values of one wallet from scan()
+        threshold: Minimum borrow limit in wei
+
+    Returns:
+        True when the borrow limit reaches the threshold, or could not be read
+    """
+    limit = reading["borrow_limit"]
+    return limit is None or limit >= threshold
+
+
+class FleetScanner:
+    """
+    Picks the wallets of a fleet that need a cycle on the current block.
+    A wallet that just ran a cycle rests for its cycle interval before it is
+    scanned again.
+    """
+
+    def __init__(self, w3, accounts, threshold=None, chunk_wallets=None, wake=None):
+        """
+        Args:
+            w3: Web3 instance
+            accounts: LocalAccounts of the fleet
+            threshold: Minimum borrow limit in wei (default: per wallet, its borrow_threshold or 1 with
+                compound_optimizer, see wallet_settings.py)
+            chunk_wallets: Wallets per eth_call (default FLEET_SCAN_CHUNK)
+            wake: Optional function of a wallet address returning True when it needs a cycle regardless of the scan
+        """
+        self.w3 = w3
+        self.accounts = {account.address: account for account in accounts}
+        self.threshold = threshold
+        self.chunk_wallets = chunk_wallets or config.FLEET_SCAN_CHUNK
+        self.wake = wake
+        self.resting = {}
+        self.readings = {}
+
+    def wallet_threshold(self, wallet):
+        """Minimum borrow limit in wei for a wallet to need a cycle."""
+        if self.threshold is not None:
+            return self.threshold
+        settings = wallet_settings.settings_for(wallet)
+        # The optimizer decides per wallet inside the cycle
+        return 1 if settings.compound_optimizer else settings.borrow_threshold
+
+    def rest(self, wallet, seconds, now=None):
+        """Leave a wallet out of the scans for a number of seconds, e.g. after its cycle."""
+        self.resting[wallet] = (clock.monotonic() if now is None else now) + seconds
+
+    def due(self, block="latest", now=None):
+        """
+        Scan the wallets that are not resting.
+
+        Args:
+            block: Block number or tag to read at
+            now: clock.monotonic() value (default: now)
+
+        Returns:
+            List of LocalAccounts with work
+        """
+        now = clock.monotonic() if now is None else now
+        wallets = [wallet for wallet in self.accounts if self.resting.get(wallet, 0) <= now]
+        if not wallets:
+            return []
+        self.readings = scan(self.w3, wallets, block, self.chunk_wallets)
+        due = [self.accounts[wallet] for wallet in wallets
+               if has_work(self.readings[wallet], self.wallet_threshold(wallet)) or (self.wake and self.wake(wallet))]
+        logger.info("Scanned %s wallets at block %s, %s with work", len(wallets), block, len(due))
+        return due
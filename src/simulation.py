@@ -0,0 +1,187 @@
+"""
+Cycle simulation for the Goldilocks DeFi bot.
+A reverted stir or buy still costs gas and a block. Before anything is
+signed, the transactions planned for the cycle (planner.plan_cycle) are
+simulated in one eth_call: the wallet's code is overridden with Multicall3's,
+so the calls run in order from the wallet and each one sees the effects of
+the ones before it. A step whose call would revert is left out and the rest
+of the cycle is planned and simulated again.
+
+Usage (read-only):
+    python simulation.py 0xWallet1 0xWallet2
+"""
+import argparse
+from collections import namedtuple
+
+from eth_abi.abi import default_codec
+from eth_utils import keccak
+from web3 import Web3
+
+import config
+from abi_tables import get_tables
+from logger import get_logger
+from multicall import Call, aggregate_as
+from planner import format_action, plan_cycle, settings_from_config, wallet_state
+from status import contract_addresses, snapshot
+
+logger = get_logger(__name__)
+
+# Cycle step of each action; approvals belong to the step spending the allowance
+ACTION_STEPS = {"borrow": "borrow", "claim": "claim", "stir": "stir", "buy": "swap", "stake": "stake"}
+APPROVAL_STEPS = {
+    ("honey", "porridge"): "stir",
+    ("porridge", "porridge"): "stir",
+    ("honey", "locks"): "swap",
+    ("locks", "porridge"): "stake",
+}
+
+ERROR_SELECTOR = keccak(text="Error(string)")[:4]
+PANIC_SELECTOR = keccak(text="Panic(uint256)")[:4]
+
+SimulatedCycle = namedtuple("SimulatedCycle", "actions skipped")
+
+
+def action_step(action):
+    """Cycle step ("borrow", "claim", "stir", "swap", "stake") a planned action belongs to."""
+    if action.function == "approve":
+        return APPROVAL_STEPS[(action.contract, action.args[0])]
+    return ACTION_STEPS[action.function]
+
+
+def revert_reason(data):
+    """
+    Readable reason of a revert.
+
+    Args:
+        data: Revert data of the call
+
+    Returns:
+        Error(string) message, Panic code or the raw data in hex
+    """
+    if data[:4] == ERROR_SELECTOR:
+        return default_codec.decode(["string"], data[4:])[0]
+    if data[:4] == PANIC_SELECTOR:
+        return f"panic 0x{default_codec.decode(['uint256'], data[4:])[0]:02x}"
+    return f"0x{data.hex()}" if data else "no reason given"
+
+
+def action_calls(actions):
+    """
+    Encode planned actions as calls.
+
+    Args:
+        actions: List of planner.Action
+
+    Returns:
+        List of multicall.Call
+    """
+    tables = get_tables()
+    addresses = contract_addresses()
+    calls = []
+    for action in actions:
+        args = action.args
+        if action.function == "approve":
+            args = (addresses[args[0]],) + args[1:]
+        data = tables[action.contract].encode_call(action.function, *args)
+        calls.append(Call(addresses[action.contract], data, None))
+    return calls
+
+
+_multicall_code = {}
+
+
+def multicall_code(w3):
+    """Runtime code of Multicall3, read once per process."""
+    if config.MULTICALL_ADDRESS not in _multicall_code:
+        _multicall_code[config.MULTICALL_ADDRESS] = Web3.to_hex(w3.eth.get_code(config.MULTICALL_ADDRESS))
+    return _multicall_code[config.MULTICALL_ADDRESS]
+
+
+def simulate(w3, wallet, actions, block="latest"):
+    """
+    Simulate actions in order from a wallet, in one eth_call.
+
+    Args:
+        w3: Web3 instance
+        wallet: Checksummed wallet address
+        actions: List of planner.Action
+        block: Block number or tag
+
+    Returns:
+        List of revert reasons in action order; None where the call succeeded
+    """
+    results = aggregate_as(w3, wallet, action_calls(actions), multicall_code(w3), block)
+    return [None if ok else revert_reason(data) for ok, data in results]
+
+
+def simulate_cycle(w3, wallet, state, settings, block="latest"):
+    """
+    Plan a cycle and drop the steps that would revert.
+    After the first failing call its step is skipped and the cycle planned
+    again (e.g. without the stir the whole borrow is swapped), until the
+    plan simulates cleanly. A failing borrow drops the whole cycle.
+
+    Args:
+        w3: Web3 instance
+        wallet: Checksummed wallet address
+        state: Wallet state at the block (see planner.wallet_state())
+        settings: planner.Settings
+        block: Block number the state was read at
+
+    Returns:
+        SimulatedCycle(actions, skipped) with the actions that simulate cleanly
+        and a dict of skipped step to revert reason
+    """
+    skipped = {}
+    while True:
+        actions = plan_cycle(state, settings, skip=tuple(skipped))
+        if not actions:
+            return SimulatedCycle(actions, skipped)
+        failed = next(((action, reason) for action, reason in zip(actions, simulate(w3, wallet, actions, block))
+                       if reason is not None), None)
+        if failed is None:
+            return SimulatedCycle(actions, skipped)
+        action, reason = failed
+        step = action_step(action)
+        logger.warning("Simulated %s reverted (%s), skipping %s", format_action(action), reason, step)
+        skipped[step] = reason
+        if step == "borrow":
+            return SimulatedCycle([], skipped)
+
+
+def simulate_wallet(w3, wallet, settings):
+    """
+    Simulate a wallet's next cycle on the latest block.
+
+    Args:
+        w3: Web3 instance
+        wallet: Checksummed wallet address
+        settings: planner.Settings
+
+    Returns:
+        SimulatedCycle
+    """
+    status = snapshot(w3, [wallet])
+    return simulate_cycle(w3, wallet, wallet_state(status, wallet), settings, status["block"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the next cycle's transactions without sending them")
+    parser.add_argument("wallets", nargs="+", help="wallet addresses")
+    args = parser.parse_args()
+
+    from rpc import make_provider, make_web3
+    w3 = make_web3(make_provider(config.RPC_URL))
+    settings = settings_from_config()
+    for wallet in args.wallets:
+        wallet = Web3.to_checksum_address(wallet)
+        cycle = simulate_wallet(w3, wallet, settings)
+        print(f"{wallet}:")
+        for action in cycle.actions:
+            print(f"  {format_action(action)}")
+        for step, reason in cycle.skipped.items():
+            print(f"  skipped {step}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
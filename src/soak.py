@@ -0,0 +1,152 @@
+"""
+Soak test entry point for the Goldilocks DeFi bot.
+Runs the bot's own loop (main.bot_loop, or main.fleet_loop for several
+wallets) for days of simulated time against the local JSON-RPC stand-in.
+The bot and the stand-in share a clock.VirtualClock, so cycle intervals,
+receipt waits, time budgets and retry backoffs pass instantly and a week of
+two-minute cycles takes only as long as the RPC work in it. The JSON report
+(cycles, RPC requests, transactions, errors, final positions, wall time) is
+meant for comparing runs across changes.
+
+Usage:
+    python soak.py --days 7 --cycle-interval 120 --output soak.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+
+import rpc_stub
+from clock import VirtualClock, run_virtual
+from loadtest import rss_bytes, synthetic_accounts
+
+PRECISION = 10 ** 18
+REPORT_VERSION = 1
+
+
+def fresh_chain(args, accounts, clock):
+    """Build a stub chain on the simulated clock where every wallet has staked LOCKS earning PRG."""
+    chain = rpc_stub.StubChain(block_time=args.block_time, error_rate=args.error_rate, clock=clock.time)
+    for account in accounts:
+        chain.fund(account.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+    return chain
+
+
+async def soak(bot, accounts, seconds):
+    """
+    Run the bot's loop until the simulated time is up.
+
+    Args:
+        bot: main module
+        accounts: LocalAccounts; one runs the single-account loop, more the fleet loop
+        seconds: Simulated seconds to run for
+
+    Returns:
+        Dict of cycles run and cycles that completed
+    """
+    from deployments import default_deployment
+
+    counts = {"cycles": 0, "completed": 0}
+    run_wallet_cycle = bot.run_wallet_cycle
+
+    async def counted_cycle(cycle):
+        counts["cycles"] += 1
+        success = await run_wallet_cycle(cycle)
+        counts["completed"] += bool(success)
+        return success
+
+    bot.run_wallet_cycle = counted_cycle
+    try:
+        if len(accounts) == 1:
+            loop = bot.bot_loop([(default_deployment(), accounts)])
+        else:
+            loop = bot.fleet_loop(accounts)
+        await asyncio.wait_for(loop, seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        bot.run_wallet_cycle = run_wallet_cycle
+    return counts
+
+
+def run(args):
+    """Start the stub, import the bot against it and run it in simulated time."""
+    clock = VirtualClock()
+    accounts = synthetic_accounts(args.wallets)
+    chain = fresh_chain(args, accounts, clock)
+    server = rpc_stub.StubServer(chain)
+    server.start()
+
+    # The bot modules connect at import time, so configure them first
+    os.environ.update({
+        "RPC_URL": server.url,
+        "PRIVATE_KEY": accounts[0].key.hex(),
+        "WEBHOOK_URL": f"{server.url}/webhook",
+        "HONEY_ADDRESS": rpc_stub.HONEY_ADDRESS,
+        "LOCKS_ADDRESS": rpc_stub.LOCKS_ADDRESS,
+        "PORRIDGE_ADDRESS": rpc_stub.PORRIDGE_ADDRESS,
+        "SUBSCRIPTION_URL": "",
+        "CYCLE_INTERVAL": str(args.cycle_interval),
+        "LOG_LEVEL": args.log_level,
+    })
+    import main as bot
+
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    counts = run_virtual(soak(bot, accounts, args.days * 86400), clock)
+    wall = time.perf_counter() - start
+    server.shutdown()
+
+    staked = [chain.staked[account.address] / PRECISION for account in accounts]
+    return {
+        "version": REPORT_VERSION,
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "params": {
+            "days": args.days,
+            "wallets": args.wallets,
+            "cycle_interval": args.cycle_interval,
+            "block_time": args.block_time,
+            "error_rate": args.error_rate,
+        },
+        "simulated_s": round(clock.elapsed),
+        "wall_s": round(wall, 3),
+        "speedup": round(clock.elapsed / wall) if wall else 0,
+        "cycles": counts["cycles"],
+        "cycles_completed": counts["completed"],
+        "rpc_requests": chain.request_count,
+        "rpc_requests_per_cycle": round(chain.request_count / counts["cycles"], 2) if counts["cycles"] else 0,
+        "transactions": len(chain.receipts),
+        "errors": sum(1 for message in chain.webhook_messages if message and message.startswith("❌")),
+        "staked_locks": {"min": round(min(staked), 4), "max": round(max(staked), 4)},
+        "rss_start_mb": round(rss_start / 2 ** 20, 1),
+        "rss_end_mb": round(rss_bytes() / 2 ** 20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot for days of simulated time against the local RPC stand-in")
+    parser.add_argument("--days", type=float, default=7, help="simulated days to run")
+    parser.add_argument("--wallets", type=int, default=1, help="number of synthetic wallets (more than 1 runs the fleet loop)")
+    parser.add_argument("--cycle-interval", type=int, default=120, help="CYCLE_INTERVAL of the bot")
+    parser.add_argument("--block-time", type=float, default=2, help="stub seconds per block")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub probability of a failed request")
+    parser.add_argument("--log-level", default="WARNING", help="bot log level during the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{report['simulated_s'] / 86400:.1f} days in {report['wall_s']} s: {report['cycles']} cycles, "
+          f"{report['transactions']} transactions, {report['errors']} errors", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Read-only status command for the Goldilocks DeFi bot.
+Prints each wallet's position (borrowed HONEY, borrow limit, staked and
+locked LOCKS, claimable PRG, vesting, balances, allowances) plus the LOCKS
+floor and market price. All values come from one Multicall3 snapshot pinned
+to a single block, and nothing of the transaction path (signing, nonces,
+notifications) is imported, so it is cheap enough to run from cron for a fleet.
+
+Usage:
+    python status.py                                  # wallet of PRIVATE_KEY
+    python status.py 0xWallet1 0xWallet2 --json
+    python status.py --wallets-file wallets.txt
+"""
+import argparse
+import json
+import sys
+
+from web3 import Web3
+
+import config
+import deployments
+from abi_tables import get_tables
+from multicall import aggregate, contract_call, eth_balance_call
+from rpc import make_provider, make_web3
+
+# (field, contract, function, spender) read per wallet; the wallet is the first argument
+WALLET_READS = [
+    ("honey_balance", "honey", "balanceOf", None),
+    ("locks_balance", "locks", "balanceOf", None),
+    ("prg_balance", "porridge", "balanceOf", None),
+    ("borrowed_honey", "porridge", "userBorrowedHoney", None),
+    ("borrow_limit", "porridge", "userBorrowLimit", None),
+    ("staked_locks", "porridge", "userStakedLocks", None),
+    ("locked_locks", "porridge", "userLockedLocks", None),
+    ("claimable_prg", "porridge", "userClaimablePrg", None),
+    ("vesting", "porridge", "userVestingCheck", None),
+    # The approvals the bot's cycle relies on
+    ("honey_allowance_locks", "honey", "allowance", "locks"),
+    ("honey_allowance_porridge", "honey", "allowance", "porridge"),
+    ("locks_allowance_porridge", "locks", "allowance", "porridge"),
+    ("prg_allowance_porridge", "porridge", "allowance", "porridge"),
+]
+MARKET_READS = [
+    ("floor_price", "locks", "floorPrice"),
+    ("market_price", "locks", "marketPrice"),
+]
+
+
+def contract_addresses():
+    """Addresses of the three contracts of the current deployment, keyed like abi_tables.get_tables()."""
+    return deployments.addresses()
+
+
+def build_calls(wallets):
+    """
+    Build the multicall batch for a snapshot.
+
+    Args:
+        wallets: Checksummed wallet addresses
+
+    Returns:
+        List of multicall.Call, market reads first, then per wallet
+        WALLET_READS followed by the native balance
+    """
+    tables = get_tables()
+    addresses = contract_addresses()
+    calls = [contract_call(tables[contract], addresses[contract], fn) for _, contract, fn in MARKET_READS]
+    for wallet in wallets:
+        for _, contract, fn, spender in WALLET_READS:
+            args = (wallet, addresses[spender]) if spender else (wallet,)
+            calls.append(contract_call(tables[contract], addresses[contract], fn, *args))
+        calls.append(eth_balance_call(wallet))
+    return calls
+
+
+def snapshot(w3, wallets, block=None):
+    """
+    Read the status of many wallets from one block.
+
+    Args:
+        w3: Web3 instance
+        wallets: Wallet addresses
+        block: Block number to read (default: latest)
+
+    Returns:
+        Dict with "block", the market prices and "wallets" mapping each
+        address to its fields (raw 18-decimal integers, None if a read reverted)
+    """
+    wallets = [Web3.to_checksum_address(w) for w in wallets]
+    if block is None:
+        block = w3.eth.block_number
+    values = aggregate(w3, build_calls(wallets), block)
+
+    status = {"block": block}
+    for (field, _, _), value in zip(MARKET_READS, values):
+        status[field] = value
+    status["wallets"] = {}
+    per_wallet = len(WALLET_READS) + 1
+    for i, wallet in enumerate(wallets):
+        start = len(MARKET_READS) + i * per_wallet
+        row = values[start:start + per_wallet]
+        fields = dict(zip((field for field, _, _, _ in WALLET_READS), row))
+        fields["native_balance"] = row[-1]
+        status["wallets"][wallet] = fields
+    return status
+
+
+def _fmt(amount):
+    return "n/a" if amount is None else f"{amount / config.TOKEN_PRECISION:.4f}"
+
+
+def format_status(status):
+    """
+    Render a snapshot as text.
+
+    Args:
+        status: Dict returned by snapshot()
+
+    Returns:
+        Multi-line string
+    """
+    lines = [f"Block {status['block']}: floor price {_fmt(status['floor_price'])} HONEY, "
+             f"market price {_fmt(status['market_price'])} HONEY per LOCKS"]
+    for wallet, f in status["wallets"].items():
+        lines.append("")
+        lines.append(wallet)
+        lines.append(f"  Borrowed HONEY:   {_fmt(f['borrowed_honey'])} / limit {_fmt(f['borrow_limit'])}")
+        lines.append(f"  Staked LOCKS:     {_fmt(f['staked_locks'])} (locked {_fmt(f['locked_locks'])})")
+        lines.append(f"  Claimable PRG:    {_fmt(f['claimable_prg'])} (vesting {_fmt(f['vesting'])})")
+        lines.append(f"  Balances:         {_fmt(f['honey_balance'])} HONEY, {_fmt(f['locks_balance'])} LOCKS, "
+                     f"{_fmt(f['prg_balance'])} PRG, {_fmt(f['native_balance'])} BERA")
+        lines.append(f"  Allowances:       HONEY→LOCKS {_fmt(f['honey_allowance_locks'])}, "
+                     f"HONEY→PORRIDGE {_fmt(f['honey_allowance_porridge'])}, "
+                     f"LOCKS→PORRIDGE {_fmt(f['locks_allowance_porridge'])}, "
+                     f"PRG→PORRIDGE {_fmt(f['prg_allowance_porridge'])}")
+    return "\n".join(lines)
+
+
+def _wallets_from_args(args):
+    wallets = list(args.wallets)
+    if args.wallets_file:
+        with open(args.wallets_file) as f:
+            wallets += [line.split("#")[0].strip() for line in f if line.split("#")[0].strip()]
+    if not wallets and config.PRIVATE_KEY:
+        from eth_account import Account
+        wallets = [Account.from_key(config.PRIVATE_KEY).address]
+    return wallets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show wallet positions from one read-only block snapshot")
+    parser.add_argument("wallets", nargs="*", help="wallet addresses (default: the PRIVATE_KEY wallet)")
+    parser.add_argument("--wallets-file", help="file with one wallet address per line")
+    parser.add_argument("--block", type=int, help="block number to read (default: latest)")
+    parser.add_argument("--json", action="store_true", help="print raw values as JSON")
+    args = parser.parse_args()
+
+    wallets = _wallets_from_args(args)
+    if not wallets:
+        parser.error("no wallets given and PRIVATE_KEY not set")
+
+    w3 = make_web3(make_provider(config.RPC_URL))
+    status = snapshot(w3, wallets, args.block)
+    if args.json:
+        json.dump(status, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_status(status))
+
+
+if __name__ == "__main__":
+    main()
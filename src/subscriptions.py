@@ -0,0 +1,244 @@
+"""
+Push-based chain event module for the Goldilocks DeFi bot.
+Subscribes to newHeads and protocol logs over a WebSocket or IPC connection
+so receipt checks and cycle triggers follow the chain instead of fixed sleeps.
+"""
+import asyncio
+
+from web3 import AsyncWeb3, WebSocketProvider, AsyncIPCProvider
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Stream used by web3_utils and main; None while running on HTTP polling
+_active_stream = None
+
+
+def get_stream():
+    """
+    Get the running chain event stream.
+
+    Returns:
+        Active ChainEventStream or None if push subscriptions are not enabled
+    """
+    return _active_stream
+
+
+def make_async_provider(uri):
+    """
+    Build a persistent-connection provider for a WebSocket URL or IPC socket path.
+
+    Args:
+        uri: ws:// or wss:// URL, or filesystem path to a node's IPC socket
+
+    Returns:
+        Provider instance for AsyncWeb3
+    """
+    if uri.startswith(("ws://", "wss://")):
+        return WebSocketProvider(uri)
+    if uri.startswith(("http://", "https://")):
+        raise ValueError("SUBSCRIPTION_URL must be a ws:// or wss:// URL or an IPC socket path")
+    return AsyncIPCProvider(uri)
+
+
+def address_topic(address):
+    """
+    Encode an address as a 32-byte log topic.
+
+    Args:
+        address: Checksum or hex address
+
+    Returns:
+        Hex string topic with the address left-padded to 32 bytes
+    """
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+class ChainEventStream:
+    """
+    Maintains newHeads and log subscriptions and exposes awaitable chain events.
+    """
+
+    def __init__(self, uri, contract_addresses, wallet_addresses):
+        """
+        Initialize the stream.
+
+        Args:
+            uri: WebSocket URL or IPC path of the node
+            contract_addresses: Contract addresses whose logs should be pushed
+            wallet_addresses: Wallet addresses the logs are filtered on
+        """
+        self.uri = uri
+        self.contract_addresses = list(contract_addresses)
+        self.wallet_addresses = list(wallet_addresses)
+        self.connected = False
+        self.latest_block = None
+        self._head_event = asyncio.Event()
+        self._activity_event = asyncio.Event()
+        self._tx_events = {}
+        self._own_tx_hashes = set()
+        self._task = None
+
+    def start(self):
+        """Start the background subscription task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background subscription task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        """Keep the subscriptions alive, reconnecting with backoff when the socket drops."""
+        backoff = 1
+        while True:
+            try:
+                async with AsyncWeb3(make_async_provider(self.uri)) as async_w3:
+                    await self._subscribe(async_w3)
+                    self.connected = True
+                    backoff = 1
+                    logger.info("Subscribed to newHeads and protocol logs via %s", self.uri)
+                    async for message in async_w3.socket.process_subscriptions():
+                        self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Subscription connection lost: %s. Reconnecting in %s seconds", e, backoff)
+            self.connected = False
+            # Wake anyone waiting on the stream so they fall back to polling
+            self._notify_head()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    async def _subscribe(self, async_w3):
+        """Create the newHeads subscription and the wallet-filtered log subscriptions."""
+        self._heads_id = await async_w3.eth.subscribe("newHeads")
+        wallet_topics = [address_topic(a) for a in self.wallet_addresses]
+        # Approval(owner), Transfer(from) and the protocol events all index the wallet first
+        self._logs_ids = {
+            await async_w3.eth.subscribe("logs", {
+                "address": self.contract_addresses,
+                "topics": [None, wallet_topics],
+            }),
+            # Transfer(to) carries the wallet in the second indexed slot
+            await async_w3.eth.subscribe("logs", {
+                "address": self.contract_addresses,
+                "topics": [None, None, wallet_topics],
+            }),
+        }
+
+    def _dispatch(self, message):
+        """Route a subscription message to the head or log handlers."""
+        result = message["result"]
+        if message["subscription"] == self._heads_id:
+            self.latest_block = result["number"]
+            self._notify_head()
+        elif message["subscription"] in self._logs_ids:
+            self._on_log(result)
+
+    def _notify_head(self):
+        """Release everyone waiting for the next block."""
+        event = self._head_event
+        self._head_event = asyncio.Event()
+        event.set()
+
+    def _on_log(self, log):
+        """Resolve receipt waiters for our transactions and flag external activity."""
+        tx_hash = bytes(log["transactionHash"])
+        tx_event = self._tx_events.get(tx_hash)
+        if tx_event is not None:
+            tx_event.set()
+        elif tx_hash not in self._own_tx_hashes:
+            self._activity_event.set()
+
+    async def wait_for_block(self, timeout):
+        """
+        Wait for the next pushed block header.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if a new block arrived, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self._head_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_tx(self, tx_hash, timeout):
+        """
+        Wait until a log of the transaction or the next block is pushed.
+
+        Args:
+            tx_hash: Hash of a transaction sent by the bot
+            timeout: Maximum time to wait in seconds
+        """
+        key = bytes(tx_hash)
+        self._own_tx_hashes.add(key)
+        # Fresh event per wait so a log already consumed doesn't spin the caller
+        tx_event = self._tx_events[key] = asyncio.Event()
+        head_wait = asyncio.ensure_future(self._head_event.wait())
+        tx_wait = asyncio.ensure_future(tx_event.wait())
+        try:
+            await asyncio.wait({head_wait, tx_wait}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            head_wait.cancel()
+            tx_wait.cancel()
+
+    def forget_tx(self, tx_hash):
+        """Drop the waiter of a resolved transaction."""
+        self._tx_events.pop(bytes(tx_hash), None)
+
+    async def wait_for_cycle(self, interval):
+        """
+        Wait until the next cycle should start.
+        Returns early when a log from somebody else's transaction touches one of
+        our wallets; otherwise starts on the first block after the interval.
+
+        Args:
+            interval: Cycle interval in seconds
+        """
+        self._activity_event.clear()
+        # Our own receipts are resolved by now, keep only the hashes for filtering
+        self._tx_events.clear()
+        try:
+            await asyncio.wait_for(self._activity_event.wait(), interval)
+            logger.info("Wallet activity pushed by node, starting cycle early")
+            return
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._own_tx_hashes.clear()
+        if self.connected:
+            # Align the cycle with a fresh block instead of the middle of a slot
+            await self.wait_for_block(interval)
+
+
+async def start_stream(uri, contract_addresses, wallet_addresses):
+    """
+    Start the chain event stream and register it as the active one.
+
+    Args:
+        uri: WebSocket URL or IPC path of the node
+        contract_addresses: Contract addresses whose logs should be pushed
+        wallet_addresses: Wallet addresses the logs are filtered on
+
+    Returns:
+        The started ChainEventStream
+    """
+    global _active_stream
+    stream = ChainEventStream(uri, contract_addresses, wallet_addresses)
+    stream.start()
+    _active_stream = stream
+    return stream
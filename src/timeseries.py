@@ -0,0 +1,174 @@
+"""
+Time series module for the Goldilocks DeFi bot.
+Keeps the floor price, market price, borrow limit and claimable PRG of a
+wallet, one record per block, in a fixed-size memory-mapped ring file per
+wallet. The bot samples every block with one Multicall3 read for all of its
+wallets (main.sample_loop). Other processes (analytics, dashboards) map the same file and
+read the history without touching the RPC; a sequence counter in the header
+lets them detect and retry reads that overlapped a write.
+
+Usage:
+    python timeseries.py ../timeseries/0xYourWallet.ts --last 20
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+MAGIC = b"GLTS"
+FORMAT_VERSION = 1
+
+FIELDS = ("floor_price", "market_price", "borrow_limit", "claimable_prg")
+
+# Header: magic, version, record size, capacity, sequence (odd while a write is in progress), records written
+HEADER = struct.Struct("<4sIIIQQ")
+HEADER_SIZE = 64
+# Record: block, unix timestamp, then FIELDS as float64 token amounts (NaN when a read failed)
+RECORD = struct.Struct("<QQ" + "d" * len(FIELDS))
+
+# numpy.dtype(DTYPE) describes the record region (np.frombuffer(ts.buffer, DTYPE, offset=HEADER_SIZE))
+DTYPE = [("block", "<u8"), ("timestamp", "<u8")] + [(name, "<f8") for name in FIELDS]
+
+Sample = namedtuple("Sample", ("block", "timestamp") + FIELDS)
+
+_SEQ_OFFSET = 16
+_COUNT_OFFSET = 24
+_U64 = struct.Struct("<Q")
+
+
+class TimeSeries:
+    """
+    Ring of fixed-width samples in a memory-mapped file.
+    One writer per file; any number of concurrent readers.
+    """
+
+    def __init__(self, path, capacity=100_000, readonly=False):
+        """
+        Open or create a ring file.
+
+        Args:
+            path: File path
+            capacity: Records kept when creating the file (an existing file keeps its own)
+            readonly: Map the file read-only, for readers in other processes
+        """
+        self.path = path
+        if not readonly and not os.path.exists(path):
+            self._create(path, capacity)
+        with open(path, "rb" if readonly else "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+        magic, version, record_size, self.capacity, _, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} time series file")
+        self.buffer = memoryview(self._mmap)
+
+    @staticmethod
+    def _create(path, capacity):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, capacity, 0, 0).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + capacity * RECORD.size)
+        os.replace(tmp, path)
+
+    def _u64(self, offset):
+        return _U64.unpack_from(self._mmap, offset)[0]
+
+    @property
+    def count(self):
+        """Records written since the file was created (may exceed capacity)."""
+        return self._u64(_COUNT_OFFSET)
+
+    def append(self, block, timestamp, values):
+        """
+        Write a sample. A sample for the block of the last record replaces it.
+
+        Args:
+            block: Block number the values were read at
+            timestamp: Unix time of the sample
+            values: Dict of FIELDS names to token amounts in wei; missing ones are stored as NaN
+        """
+        count = self.count
+        if count and self._record(count - 1)[0] == block:
+            count -= 1
+        record = RECORD.pack(block, int(timestamp), *(
+            values[name] / 10 ** 18 if values.get(name) is not None else math.nan for name in FIELDS))
+
+        seq = self._u64(_SEQ_OFFSET)
+        _U64.pack_into(self._mmap, _SEQ_OFFSET, seq + 1)
+        self._mmap[self._offset(count):self._offset(count) + RECORD.size] = record
+        _U64.pack_into(self._mmap, _COUNT_OFFSET, count + 1)
+        _U64.pack_into(self._mmap, _SEQ_OFFSET, seq + 2)
+
+    def _offset(self, index):
+        return HEADER_SIZE + (index % self.capacity) * RECORD.size
+
+    def _record(self, index):
+        return RECORD.unpack_from(self._mmap, self._offset(index))
+
+    def read(self, last=None):
+        """
+        Copy the newest samples, oldest first.
+
+        Args:
+            last: Number of samples (default: everything in the ring)
+
+        Returns:
+            List of Sample
+        """
+        while True:
+            seq = self._u64(_SEQ_OFFSET)
+            if seq % 2:
+                time.sleep(0)
+                continue
+            count = self.count
+            n = min(count, self.capacity, last if last is not None else count)
+            samples = [Sample(*self._record(i)) for i in range(count - n, count)]
+            if self._u64(_SEQ_OFFSET) == seq:
+                return samples
+
+    def close(self):
+        self.buffer.release()
+        self._mmap.close()
+
+
+_series = {}
+
+
+def get_series(directory, wallet, capacity=100_000):
+    """
+    Get the writer for a wallet's ring file, opening it once per process.
+
+    Args:
+        directory: Directory holding one <wallet>.ts file per wallet
+        wallet: Wallet address
+        capacity: Records kept when the file is created
+
+    Returns:
+        TimeSeries instance
+    """
+    path = os.path.join(directory, f"{wallet}.ts")
+    if path not in _series:
+        _series[path] = TimeSeries(path, capacity)
+    return _series[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the newest samples of a time series file")
+    parser.add_argument("path", help="ring file written with TIMESERIES_DIR")
+    parser.add_argument("--last", type=int, default=20, help="number of samples to show")
+    args = parser.parse_args()
+
+    series = TimeSeries(args.path, readonly=True)
+    print(f"{'block':>10} {'time':>19} " + " ".join(f"{name:>14}" for name in FIELDS))
+    for sample in series.read(args.last):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample.timestamp))
+        print(f"{sample.block:>10} {stamp:>19} " + " ".join(f"{getattr(sample, name):>14.4f}" for name in FIELDS))
+    series.close()
+
+
+if __name__ == "__main__":
+    main()
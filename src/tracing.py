@@ -0,0 +1,320 @@
+"""
+Tracing module for the Goldilocks DeFi bot.
+Records nested spans (cycle → step → RPC call / sign / broadcast / receipt
+wait) with attributes such as gas, nonce and block, and exports them as
+OTLP/JSON to a local file or an OTLP/HTTP collector from a background thread.
+"""
+import argparse
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+from web3.middleware import Web3Middleware
+
+import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# OTLP status codes and span kinds
+STATUS_OK = 1
+STATUS_ERROR = 2
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_exporter = None
+
+
+class Span:
+    """
+    One timed operation of a trace.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "events")
+
+    def __init__(self, name, parent=None, kind=KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ""
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.status_message = ""
+        self.events = []
+
+    def set_attributes(self, **attributes):
+        """Add attributes; None values are skipped."""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def record_exception(self, exc):
+        """Mark the span failed and attach the exception as an event."""
+        self.status = STATUS_ERROR
+        self.status_message = str(exc)[:200]
+        self.events.append({"name": "exception", "time_ns": time.time_ns(), "attributes": {
+            "exception.type": type(exc).__name__,
+            "exception.message": str(exc)[:1000],
+        }})
+
+    @property
+    def duration(self):
+        """Seconds from start to end (or to now while running)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self):
+        """Span in the OTLP/JSON encoding."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = [{"name": e["name"], "timeUnixNano": str(e["time_ns"]),
+                               "attributes": _otlp_attributes(e["attributes"])} for e in self.events]
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 in OTLP; token amounts and gas prices can exceed it
+        return {"intValue": str(value)} if -2 ** 63 <= value < 2 ** 63 else {"stringValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def current_span():
+    """
+    Get the innermost active span of the current task.
+
+    Returns:
+        Span, or None outside of spans or with tracing disabled
+    """
+    return _current_span.get()
+
+
+def set_attributes(**attributes):
+    """Add attributes to the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attributes(**attributes)
+
+
+@contextlib.contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Time the enclosed block as a span, nested below the current span.
+    A span without a parent starts a new trace. Yields None when tracing is disabled.
+
+    Args:
+        name: Span name, e.g. "cycle", "stir_porridge" or "eth_call"
+        kind: OTLP span kind
+        **attributes: Initial attributes
+    """
+    if _exporter is None:
+        yield None
+        return
+
+    s = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end_ns = time.time_ns()
+        _exporter.submit(s)
+
+
+class SpanExporter:
+    """
+    Batches finished spans and writes them from a background thread, either
+    as OTLP/JSON lines to a file or POSTed to an OTLP/HTTP collector.
+    """
+
+    def __init__(self, target, service_name, batch_size=512, interval=2.0):
+        """
+        Initialize the exporter and start its thread.
+
+        Args:
+            target: File path, or http(s) URL of a collector (/v1/traces is appended)
+            service_name: service.name resource attribute
+            batch_size: Spans per export request
+            interval: Seconds between exports of partial batches
+        """
+        self.target = target
+        self.url = target.rstrip("/") + "/v1/traces" if target.startswith(("http://", "https://")) else None
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=100_000)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, s):
+        try:
+            self.queue.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while True:
+            try:
+                item = self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                item = None
+            stop = item is self
+            if item is not None and not stop:
+                batch.append(item)
+            if batch and (item is None or stop or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.interval
+            if stop:
+                return
+
+    def _export(self, spans):
+        request = {"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "goldilocks"}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        body = json.dumps(request, separators=(",", ":"))
+        try:
+            if self.url:
+                req = urllib.request.Request(self.url, data=body.encode(), method="POST",
+                                             headers={"Content-Type": "application/json"})
+                urllib.request.urlopen(req, timeout=10).close()
+            else:
+                with open(self.target, "a") as f:
+                    f.write(body + "\n")
+        except Exception as e:
+            logger.warning("Failed to export %s spans: %s", len(spans), e)
+
+    def shutdown(self):
+        """Export what is queued and stop the thread."""
+        self.queue.put(self)
+        self._thread.join(timeout=10)
+
+
+def setup_tracing(target=None, service_name=None):
+    """
+    Enable tracing. Called at import with TRACE_EXPORT; without a target spans are no-ops.
+
+    Args:
+        target: File path or collector URL
+        service_name: service.name resource attribute
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+    if target:
+        _exporter = SpanExporter(target, service_name or config.TRACE_SERVICE_NAME)
+        atexit.register(_exporter.shutdown)
+
+
+def tracing_middleware():
+    """
+    Build a web3 middleware class wrapping every RPC request in a client span.
+
+    Returns:
+        Web3Middleware subclass to inject into a Web3 instance
+    """
+
+    class TracingMiddleware(Web3Middleware):
+        def wrap_make_request(self, make_request):
+            def middleware(method, params):
+                if _exporter is None:
+                    return make_request(method, params)
+                with span(method, kind=KIND_CLIENT, **{"rpc.system": "jsonrpc", "rpc.method": method}) as s:
+                    if method in ("eth_call", "eth_estimateGas") and params and isinstance(params[0], dict):
+                        s.set_attributes(**{"rpc.to": params[0].get("to"), "rpc.selector": str(params[0].get("data", ""))[:10]})
+                    response = make_request(method, params)
+                    if isinstance(response, dict) and response.get("error"):
+                        s.status = STATUS_ERROR
+                        s.status_message = str(response["error"].get("message", ""))[:200]
+                    return response
+
+            return middleware
+
+    return TracingMiddleware
+
+
+def slowest_traces(path, top=5):
+    """
+    Read an exported trace file and break down the slowest cycles.
+
+    Args:
+        path: OTLP/JSON lines file written by the exporter
+        top: Number of traces to return
+
+    Returns:
+        List of (root span, {span name: total seconds}) for the slowest root spans
+    """
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+
+    def seconds(s):
+        return (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e9
+
+    roots = sorted((s for s in spans if not s.get("parentSpanId")), key=seconds, reverse=True)[:top]
+    breakdown = []
+    for root in roots:
+        totals = {}
+        for s in spans:
+            if s["traceId"] == root["traceId"] and s is not root:
+                totals[s["name"]] = totals.get(s["name"], 0.0) + seconds(s)
+        breakdown.append((root, dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))))
+    return breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show where wall time went in the slowest traced cycles")
+    parser.add_argument("path", help="trace file written with TRACE_EXPORT=<file>")
+    parser.add_argument("--top", type=int, default=5, help="number of cycles to show")
+    args = parser.parse_args()
+
+    for root, totals in slowest_traces(args.path, args.top):
+        duration = (int(root["endTimeUnixNano"]) - int(root["startTimeUnixNano"])) / 1e9
+        attrs = {a["key"]: next(iter(a["value"].values())) for a in root["attributes"]}
+        print(f"{root['name']} {attrs.get('cycle', '')} trace {root['traceId']}: {duration:.3f} s")
+        for name, total in totals.items():
+            print(f"  {name:<24} {total:8.3f} s")
+
+
+setup_tracing(config.TRACE_EXPORT)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Per-wallet settings for the Goldilocks DeFi bot, changeable while it runs.
+The .env values of the settings below are the defaults; WALLET_SETTINGS
+points at a store of overrides for all wallets ("*") or single wallets. The
+store is checked for changes between cycles, and a wallet's cycle runs with
+the settings it had when the cycle started, so tuning the fleet needs no
+restart (and no reconnect, ABI reload or lost position models).
+
+WALLET_SETTINGS selects the backend:
+    wallet-settings.json           JSON object of wallet (or "*") to {setting: value}
+    sqlite:/var/lib/bot/settings.db  table wallet_settings(wallet, name, value)
+
+Usage:
+    python wallet_settings.py show
+    python wallet_settings.py set 0xWallet borrow_threshold 2000000000000000000
+    python wallet_settings.py set '*' cycle_interval 300
+    python wallet_settings.py unset 0xWallet borrow_threshold
+"""
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+from web3 import Web3
+
+import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+ALL_WALLETS = "*"
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _whole(value):
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise ValueError(f"not a whole number: {value!r}")
+
+
+def _seconds(value):
+    value = _whole(value)
+    if value == 0:
+        raise ValueError("must be at least 1 second")
+    return value
+
+
+# Setting name to the parser of its value (typed JSON value or text)
+FIELDS = {
+    "borrow_threshold": _whole,  # wei
+    "allow_wallet_honey": _flag,
+    "swap_leftover_honey": _flag,
+    "swap_all_wallet_honey": _flag,
+    "cycle_interval": _seconds,
+    "compound_optimizer": _flag,
+}
+
+WalletSettings = namedtuple("WalletSettings", list(FIELDS))
+
+
+def defaults():
+    """The settings of .env, for wallets without overrides."""
+    return WalletSettings(config.BORROW_THRESHOLD, config.ALLOW_WALLET_HONEY, config.SWAP_LEFTOVER_HONEY,
+                          config.SWAP_ALL_WALLET_HONEY, config.CYCLE_INTERVAL, config.COMPOUND_OPTIMIZER)
+
+
+def parse_value(name, value):
+    """
+    Check and convert the value of a setting.
+
+    Args:
+        name: One of FIELDS
+        value: Typed JSON value or text, e.g. "true" or "2000000000000000000"
+
+    Returns:
+        Value of the setting's type
+
+    Raises:
+        ValueError: Unknown setting or invalid value
+    """
+    if name not in FIELDS:
+        raise ValueError(f"unknown setting {name!r} (settings: {', '.join(FIELDS)})")
+    try:
+        return FIELDS[name](value)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}")
+
+
+def parse_overrides(entries):
+    """
+    Check and convert the contents of a store.
+
+    Args:
+        entries: Dict of wallet (or "*") to {setting: value}
+
+    Returns:
+        Dict of checksummed wallet (or "*") to {setting: typed value}
+
+    Raises:
+        ValueError: Invalid wallet, setting or value
+    """
+    overrides = {}
+    for wallet, values in entries.items():
+        if not isinstance(values, dict):
+            raise ValueError(f"settings of {wallet} are not an object")
+        key = wallet if wallet == ALL_WALLETS else Web3.to_checksum_address(wallet)
+        try:
+            overrides[key] = {name: parse_value(name, value) for name, value in values.items()}
+        except ValueError as e:
+            raise ValueError(f"{wallet}: {e}")
+    return overrides
+
+
+class FileSettingsStore:
+    """
+    Overrides kept in a JSON file, e.g. edited by hand or written by a deploy
+    tool. Changes are noticed through the file's modification time and size.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON file; a missing file means no overrides
+        """
+        self.path = path
+
+    def version(self):
+        """Changes whenever the file is written or replaced."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def load(self):
+        """Dict of wallet to {setting: value}, unchecked."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def set(self, wallet, name, value):
+        """
+        Store an override; replaces the file in one step so the bot never reads half of it.
+
+        Args:
+            wallet: Checksummed wallet address or "*"
+            name: One of FIELDS
+            value: Typed value, None to remove the override
+        """
+        entries = self.load()
+        values = entries.setdefault(wallet, {})
+        if value is None:
+            values.pop(name, None)
+        else:
+            values[name] = value
+        if not values:
+            del entries[wallet]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class SqliteSettingsStore:
+    """
+    Overrides kept as rows in an SQLite database, e.g. one written by a
+    dashboard. Changes are noticed through SQLite's data_version, which
+    moves when another connection commits.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Database file, created if missing
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS wallet_settings "
+                         "(wallet TEXT, name TEXT, value TEXT, PRIMARY KEY (wallet, name))")
+
+    def version(self):
+        """Changes whenever another connection commits to the database."""
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self):
+        """Dict of wallet to {setting: value as text}, unchecked."""
+        entries = {}
+        for wallet, name, value in self._db.execute("SELECT wallet, name, value FROM wallet_settings"):
+            entries.setdefault(wallet, {})[name] = value
+        return entries
+
+    def set(self, wallet, name, value):
+        """
+        Store an override.
+
+        Args:
+            wallet: Checksummed wallet address or "*"
+            name: One of FIELDS
+            value: Typed value, None to remove the override
+        """
+        if value is None:
+            self._db.execute("DELETE FROM wallet_settings WHERE wallet = ? AND name = ?", (wallet, name))
+        else:
+            self._db.execute("INSERT OR REPLACE INTO wallet_settings (wallet, name, value) VALUES (?, ?, ?)",
+                             (wallet, name, json.dumps(value)))
+
+
+def make_store(spec):
+    """
+    Build the store of a WALLET_SETTINGS value.
+
+    Args:
+        spec: "sqlite:<path>" or the path of a JSON file
+
+    Returns:
+        FileSettingsStore or SqliteSettingsStore
+    """
+    if spec.startswith("sqlite:"):
+        return SqliteSettingsStore(spec[len("sqlite:"):])
+    return FileSettingsStore(spec)
+
+
+class SettingsWatcher:
+    """
+    Keeps the overrides of a store, reloading them when the store changed.
+    An invalid store is reported and the previous overrides stay in use.
+    """
+
+    def __init__(self, store):
+        """
+        Args:
+            store: FileSettingsStore or SqliteSettingsStore
+        """
+        self.store = store
+        self.version = object()  # never equal to a store version, so the first refresh loads
+        self.overrides = {}
+
+    def refresh(self):
+        """
+        Reload the overrides if the store changed.
+
+        Returns:
+            Sorted list of the wallets (or "*") whose overrides changed
+        """
+        version = self.store.version()
+        if version == self.version:
+            return []
+        self.version = version
+        try:
+            overrides = parse_overrides(self.store.load())
+        except Exception as e:
+            logger.warning("Wallet settings not applied, keeping the previous ones: %s", e)
+            return []
+        changed = sorted(wallet for wallet in overrides.keys() | self.overrides.keys()
+                         if overrides.get(wallet) != self.overrides.get(wallet))
+        self.overrides = overrides
+        if changed:
+            logger.info("Wallet settings changed for %s", ", ".join(changed))
+        return changed
+
+    def settings_for(self, wallet):
+        """
+        Settings of a wallet: the defaults, then the overrides for all wallets, then its own.
+
+        Args:
+            wallet: Checksummed wallet address
+
+        Returns:
+            WalletSettings
+        """
+        settings = defaults()._replace(**self.overrides.get(ALL_WALLETS, {}))
+        return settings._replace(**self.overrides.get(wallet, {}))
+
+
+_watcher = None
+
+
+def set_store(store):
+    """Take overrides from a store (None: every wallet runs with the defaults)."""
+    global _watcher
+    _watcher = SettingsWatcher(store) if store is not None else None
+
+
+def refresh():
+    """
+    Pick up changes of the store; called between cycles.
+
+    Returns:
+        Sorted list of the wallets (or "*") whose overrides changed
+    """
+    return _watcher.refresh() if _watcher else []
+
+
+def settings_for(wallet):
+    """
+    Current settings of a wallet.
+
+    Args:
+        wallet: Checksummed wallet address
+
+    Returns:
+        WalletSettings
+    """
+    return _watcher.settings_for(wallet) if _watcher else defaults()
+
+
+# Settings of the cycle the current task runs; the defaults outside of cycles
+_current = contextvars.ContextVar("wallet_settings", default=None)
+
+
+def current():
+    """
+    Get the settings the current cycle runs with.
+
+    Returns:
+        WalletSettings
+    """
+    return _current.get() or defaults()
+
+
+@contextlib.contextmanager
+def use_settings(settings):
+    """
+    Run the enclosed block (and tasks created in it) with a wallet's settings.
+
+    Args:
+        settings: WalletSettings
+    """
+    token = _current.set(settings)
+    try:
+        yield settings
+    finally:
+        _current.reset(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or change the per-wallet settings of WALLET_SETTINGS")
+    parser.add_argument("--store", default=config.WALLET_SETTINGS, help="store (default WALLET_SETTINGS)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show", help="print the overrides and the settings they result in")
+    set_parser = commands.add_parser("set", help="override a setting")
+    unset_parser = commands.add_parser("unset", help="remove an override")
+    for command in (set_parser, unset_parser):
+        command.add_argument("wallet", help="wallet address or * for all wallets")
+        command.add_argument("name", choices=list(FIELDS))
+    set_parser.add_argument("value")
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("WALLET_SETTINGS is not set, pass --store")
+
+    store = make_store(args.store)
+    if args.command == "show":
+        watcher = SettingsWatcher(store)
+        watcher.refresh()
+        print(f"defaults: {defaults()._asdict()}")
+        for wallet, values in sorted(watcher.overrides.items()):
+            print(f"{wallet}: {values}")
+            if wallet != ALL_WALLETS:
+                print(f"  runs with {watcher.settings_for(wallet)._asdict()}")
+        return
+
+    try:
+        wallet = args.wallet if args.wallet == ALL_WALLETS else Web3.to_checksum_address(args.wallet)
+        value = parse_value(args.name, args.value) if args.command == "set" else None
+    except ValueError as e:
+        parser.error(str(e))
+    store.set(wallet, args.name, value)
+
+
+if __name__ == "__main__":
+    main()
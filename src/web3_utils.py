@@ -2,26 +2,231 @@
 Web3 utility functions for the Goldilocks DeFi bot.
 Handles Web3 connection, transaction sending, and receipt handling.
 """
-import time
 import asyncio
-from web3 import Web3
+import contextlib
+import contextvars
 from web3.exceptions import TransactionNotFound
 
+import clock
 import config
+import compounding
+import deployments
+from cassette import RECORDED_SETTINGS, Cassette, RecordingProvider, ReplayProvider, cycle_cassette_path, prune_cassettes
+import leader
+import ledger
+from logger import get_logger
+import market_data
+from position import decode_log, event_index, get_position
+from rpc import make_provider, make_web3
+from status import snapshot
+from subscriptions import get_stream
+import timeseries
+from tracing import span, set_attributes
+
+logger = get_logger(__name__)
+
+
+config.require("PRIVATE_KEY", "WEBHOOK_URL")
+
+
+def connect(deployment):
+    """
+    Create the Web3 instance of a deployment's RPC endpoint.
+
+    Args:
+        deployment: deployments.Deployment
+
+    Returns:
+        Connected Web3 instance
+    """
+    if config.RPC_REPLAY_FILE:
+        web3 = make_web3(ReplayProvider(Cassette.load(config.RPC_REPLAY_FILE)))
+    elif config.RPC_RECORD_DIR:
+        web3 = make_web3(RecordingProvider(make_provider(deployment.rpc_url)))
+    else:
+        web3 = make_web3(make_provider(deployment.rpc_url))
+    if not web3.is_connected():
+        raise Exception(f"Failed to connect to RPC of deployment {deployment.name}.")
+    return web3
+
+
+_connections = {}
+
+
+def get_web3(deployment=None):
+    """
+    Get the Web3 instance of a deployment, connecting on first use.
+
+    Args:
+        deployment: deployments.Deployment (default: the current task's)
+
+    Returns:
+        Web3 instance
+    """
+    deployment = deployment or deployments.current()
+    if deployment.name not in _connections:
+        _connections[deployment.name] = connect(deployment)
+    return _connections[deployment.name]
+
+
+class _CurrentWeb3:
+    """Stands for the Web3 instance of the current task's deployment (see deployments.use_deployment())."""
+
+    def __getattr__(self, name):
+        return getattr(get_web3(), name)
+
 
 # Initialize Web3
-w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
-if not w3.is_connected():
-    raise Exception("Failed to connect to RPC.")
+get_web3(deployments.default_deployment())
+w3 = _CurrentWeb3()
 
 # Setup account from private key
 ACCOUNT = w3.eth.account.from_key(config.PRIVATE_KEY)
-print(f"Connected to blockchain with account: {ACCOUNT.address}")
+logger.info("Connected to blockchain with account: %s", ACCOUNT.address)
+
+# Account the logic modules act for; ACCOUNT unless a task switched it with use_account()
+_current_account = contextvars.ContextVar("current_account", default=ACCOUNT)
+
+
+def get_account():
+    """
+    Get the account the current task acts for.
+
+    Returns:
+        LocalAccount used for reads and signing
+    """
+    return _current_account.get()
+
+
+@contextlib.contextmanager
+def use_account(account):
+    """
+    Run the enclosed block (and tasks created in it) on behalf of another account.
+
+    Args:
+        account: LocalAccount to read and sign for
+    """
+    token = _current_account.set(account)
+    try:
+        yield account
+    finally:
+        _current_account.reset(token)
+
+
+@contextlib.contextmanager
+def recording_cycle(cycle):
+    """
+    Save the RPC traffic of the enclosed cycle to a cassette in RPC_RECORD_DIR.
+    Does nothing unless recording is enabled.
+
+    Args:
+        cycle: Cycle number, used in the file name
+    """
+    recorder = w3.provider if isinstance(w3.provider, RecordingProvider) else None
+    if recorder is None:
+        yield
+        return
+
+    recorder.begin_cycle()
+    # A replay starts with an empty position model, so every cassette needs its own sync
+    resync_position(get_account().address)
+    try:
+        yield
+    finally:
+        path = cycle_cassette_path(config.RPC_RECORD_DIR, cycle)
+        meta = {
+            "wallet": get_account().address,
+            "cycle": cycle,
+            "recorded_at": int(clock.time()),
+            "settings": {name: str(getattr(config, name)) for name in RECORDED_SETTINGS},
+        }
+        try:
+            recorder.save_cycle(path, meta)
+            prune_cassettes(config.RPC_RECORD_DIR, config.RPC_RECORD_KEEP)
+            logger.debug("Cycle RPC traffic recorded to %s", path)
+        except OSError as e:
+            logger.warning("Failed to record cycle cassette: %s", e)
+
+
+def record_samples(wallets, block):
+    """
+    Store the prices and the wallets' borrow limits and claimable PRG at a
+    block as time series samples in TIMESERIES_DIR, from one Multicall3 snapshot.
+
+    Args:
+        wallets: Checksummed wallet addresses of the current deployment
+        block: Block number to read
+    """
+    status = snapshot(w3, wallets, block)
+    directory = deployments.data_dir(config.TIMESERIES_DIR)
+    now = clock.time()
+    for wallet in wallets:
+        # Prices are protocol-wide, the other fields per wallet
+        values = {field: status[field] if field in status else status["wallets"][wallet][field]
+                  for field in timeseries.FIELDS}
+        timeseries.get_series(directory, wallet, config.TIMESERIES_CAPACITY).append(block, now, values)
+
+
+def position_value(field):
+    """
+    Get a value of the current account's position model, syncing the model when a check is due.
+
+    Args:
+        field: Tracked field, e.g. "honey_balance" or "staked_locks"
+
+    Returns:
+        Value in wei, or None when the model is disabled or unavailable and the caller should read the chain
+    """
+    if not config.POSITION_MODEL:
+        return None
+    position = get_position(get_account().address)
+    if position.needs_sync():
+        try:
+            position.sync(w3)
+        except Exception as e:
+            logger.warning("Position snapshot failed, reading balances directly: %s", e)
+            position.disable()
+    return position.get(field)
+
+
+def resync_position(wallet):
+    """
+    Make the wallet's position model re-read the chain before its next value,
+    e.g. after a transaction whose receipt was not applied to it.
+
+    Args:
+        wallet: Checksummed wallet address
+    """
+    if config.POSITION_MODEL:
+        get_position(wallet).invalidate()
+
+
+def market_value(field):
+    """
+    Get a protocol-global value published by the market data broadcaster.
+
+    Args:
+        field: One of market_data.FIELDS, e.g. "floor_price"
+
+    Returns:
+        Value in wei, or None when the deployment has no board (MARKET_DATA_FILE) or it is stale
+        and the caller should read the chain
+    """
+    path = deployments.current().market_data_file
+    if not path:
+        return None
+    try:
+        return market_data.published_value(field, config.MARKET_DATA_MAX_AGE, path)
+    except Exception as e:
+        logger.warning("Market data unavailable, reading the chain: %s", e)
+        return None
 
 
 async def wait_for_receipt(tx_hash, timeout=120):
     """
     Wait for transaction receipt and return it.
+    With an active chain event stream the receipt is checked once per pushed
+    block (or as soon as one of its logs arrives) instead of every second.
     
     Args:
         tx_hash: Transaction hash
@@ -30,17 +235,51 @@ async def wait_for_receipt(tx_hash, timeout=120):
     Returns:
         Transaction receipt or raises an exception
     """
-    start = time.time()
-    while time.time() - start < timeout:
-        try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
-            if receipt:
-                if receipt.status == 1:
-                    return receipt
-                raise Exception(f"Transaction reverted: {tx_hash.hex()}")
-        except TransactionNotFound:
-            await asyncio.sleep(1)
-    raise Exception(f"Timed out waiting for receipt for tx: {tx_hash.hex()}")
+    start = clock.monotonic()
+    stream = get_stream()
+    with span("receipt_wait", tx_hash=f"0x{tx_hash.hex()}"):
+        while clock.monotonic() - start < timeout:
+            try:
+                receipt = w3.eth.get_transaction_receipt(tx_hash)
+                if receipt:
+                    if stream:
+                        stream.forget_tx(tx_hash)
+                    set_attributes(block=receipt.blockNumber, gas_used=receipt.gasUsed, status=receipt.status)
+                    if receipt.status == 1:
+                        return receipt
+                    raise Exception(f"Transaction reverted: {tx_hash.hex()}")
+            except TransactionNotFound:
+                if stream and stream.connected:
+                    await stream.wait_for_tx(tx_hash, timeout - (clock.monotonic() - start))
+                else:
+                    await asyncio.sleep(1)
+        raise Exception(f"Timed out waiting for receipt for tx: {tx_hash.hex()}")
+
+
+_ledger_indexes = {}  # event index per deployment
+
+
+def record_ledger(wallet, receipt):
+    """
+    Append what one of our transactions did to the wallet's ledger in
+    LEDGER_DIR, for analytics.py. Does nothing unless enabled.
+
+    Args:
+        wallet: Checksummed wallet address
+        receipt: Transaction receipt
+    """
+    if not config.LEDGER_DIR:
+        return
+    try:
+        name = deployments.current().name
+        if name not in _ledger_indexes:
+            _ledger_indexes[name] = event_index()
+        decoded = [decode_log(_ledger_indexes[name], log) for log in receipt["logs"]]
+        staked = get_position(wallet).get("staked_locks") if config.POSITION_MODEL else None
+        entries = ledger.entries_from_receipt(decoded, wallet, receipt, staked)
+        ledger.get_ledger(deployments.data_dir(config.LEDGER_DIR), wallet).append(receipt["blockNumber"], clock.time(), entries)
+    except Exception as e:
+        logger.warning("Failed to record ledger entry: %s", e)
 
 
 async def send_tx(func, value=0, fallback_gas=500000):
@@ -56,57 +295,80 @@ async def send_tx(func, value=0, fallback_gas=500000):
     Returns:
         Transaction receipt
     """
+    account = get_account()
+    tx_hash = None
     try:
-        nonce = w3.eth.get_transaction_count(ACCOUNT.address, 'pending')
-        tx_params = {
-            'from': ACCOUNT.address,
-            'nonce': nonce,
-            'gasPrice': int(w3.eth.gas_price * 1.2),  # Add 20% to gas price for faster confirmation
-            'value': value
-        }
+        with span("send_tx", function=func.fn_name, contract=func.address):
+            nonce = w3.eth.get_transaction_count(account.address, 'pending')
+            tx_params = {
+                'from': account.address,
+                'nonce': nonce,
+                'gasPrice': int(w3.eth.gas_price * 1.2),  # Add 20% to gas price for faster confirmation
+                'value': value
+            }
 
-        # Try to estimate gas, fall back to default if it fails
-        try:
-            gas_est = func.estimateGas(tx_params)
-            tx_params['gas'] = int(gas_est * 1.2)  # Add 20% buffer to gas limit
-        except Exception as gas_err:
-            print(f"Gas estimation failed: {gas_err}. Using fallback gas limit of {fallback_gas}")
-            tx_params['gas'] = fallback_gas
+            # Try to estimate gas, fall back to default if it fails
+            try:
+                gas_est = func.estimateGas(tx_params)
+                tx_params['gas'] = int(gas_est * 1.2)  # Add 20% buffer to gas limit
+            except Exception as gas_err:
+                logger.warning("Gas estimation failed: %s. Using fallback gas limit of %s", gas_err, fallback_gas)
+                tx_params['gas'] = fallback_gas
 
-        # Build, sign and send transaction
-        try:
-            tx = func.build_transaction(tx_params)
-        except Exception as build_err:
-            print(f"Transaction build failed: {build_err}. Trying manual encoding.")
-
-            # If buildTransaction fails, try manual encoding
-            # Extract contract and function details
-            contract_address = func.address
-            fn_name = func._function_identifier
-            args = func.args
-
-            # Manually create transaction
-            contract = func.contract
-            data = contract.encodeABI(fn_name=fn_name, args=args)
-
-            tx = {
-                'to': contract_address,
-                'from': ACCOUNT.address,
-                'data': data,
-                'gas': tx_params.get('gas', fallback_gas),
-                'gasPrice': tx_params['gasPrice'],
-                'nonce': tx_params['nonce'],
-                'value': tx_params['value']
-            }
+            # Build, sign and send transaction
+            with span("sign", nonce=nonce, gas=tx_params['gas'], gas_price=tx_params['gasPrice']):
+                try:
+                    tx = func.build_transaction(tx_params)
+                except Exception as build_err:
+                    logger.warning("Transaction build failed: %s. Trying manual encoding.", build_err)
+
+                    # If buildTransaction fails, try manual encoding
+                    # Extract contract and function details
+                    contract_address = func.address
+                    fn_name = func._function_identifier
+                    args = func.args
+
+                    # Manually create transaction
+                    contract = func.contract
+                    data = contract.encodeABI(fn_name=fn_name, args=args)
 
-        signed = ACCOUNT.sign_transaction(tx)
-        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+                    tx = {
+                        'to': contract_address,
+                        'from': account.address,
+                        'data': data,
+                        'gas': tx_params.get('gas', fallback_gas),
+                        'gasPrice': tx_params['gasPrice'],
+                        'nonce': tx_params['nonce'],
+                        'value': tx_params['value']
+                    }
 
-        tx_url = f"https://beratrail.io/tx/0x{tx_hash.hex()}"
-        print(f"Transaction sent: {tx_url}")
-        return await wait_for_receipt(tx_hash)
+                signed = account.sign_transaction(tx)
+
+            # A standby that took over the lease sends for the same wallets
+            leader.check()
+            with span("broadcast", nonce=nonce):
+                tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+                set_attributes(tx_hash=f"0x{tx_hash.hex()}")
+
+            tx_url = f"https://beratrail.io/tx/0x{tx_hash.hex()}"
+            logger.info("Transaction sent: %s", tx_url, extra={"tx_hash": f"0x{tx_hash.hex()}", "nonce": tx["nonce"]})
+            receipt = await wait_for_receipt(tx_hash)
+            compounding.record_gas(func.fn_name, receipt.gasUsed)
+            if config.POSITION_MODEL:
+                get_position(account.address).apply_receipt(receipt)
+            record_ledger(account.address, receipt)
+            return receipt
+    except asyncio.CancelledError:
+        if tx_hash is not None:
+            # E.g. a step out of its time budget; the transaction is out and may still be mined
+            logger.warning("Stopped waiting for the receipt of 0x%s, it may still be mined", tx_hash.hex())
+            resync_position(account.address)
+        raise
     except Exception as e:
-        print(f"Transaction error: {e}")
+        if tx_hash is not None:
+            # Reverted or unconfirmed: the model may be what made it fail, and may miss what it did
+            resync_position(account.address)
+        logger.error("Transaction error: %s", e)
         raise
 
 async def approve_if_needed(token_contract, spender, amount=2**256-1):
@@ -121,12 +383,12 @@ async def approve_if_needed(token_contract, spender, amount=2**256-1):
     Returns:
         True if approval was needed and executed, False otherwise
     """
-    current = token_contract.functions.allowance(ACCOUNT.address, spender).call()
+    current = token_contract.functions.allowance(get_account().address, spender).call()
     if current < amount:
-        print(f"Approving {token_contract.address} for {spender} with amount {amount}")
+        logger.info("Approving %s for %s with amount %s", token_contract.address, spender, amount)
         func = token_contract.functions.approve(spender, amount)
         await send_tx(func)
-        print(f"Approval successful")
+        logger.info("Approval successful")
         return True
     return False
 
@@ -0,0 +1,114 @@
+import importlib
+import os
+import sys
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+from dotenv import load_dotenv
+from web3 import Web3
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import rpc_stub  # noqa: E402  (no side effects; bot modules are imported by the fixtures)
+from cassette import Cassette, RecordingProvider, ReplayProvider  # noqa: E402
+
+# The contract suites replay tests/cassettes/<name>.rpc.gz by default.
+# CASSETTE_MODE=live runs them against RPC_URL, CASSETTE_MODE=record does so and re-records the cassettes.
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes")
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "replay")
+
+# Read before the stub fixtures point the environment at the local stand-in
+load_dotenv()
+LIVE_ENV = {name: os.getenv(name) for name in ("RPC_URL", "PRIVATE_KEY", "HONEY_ADDRESS", "LOCKS_ADDRESS", "PORRIDGE_ADDRESS")}
+
+ChainSession = namedtuple("ChainSession", "web3 account addresses")
+
+# Well-known development key (Hardhat account #0), only ever used against the local stub
+STUB_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+# Wei per token of the 18-decimal HONEY, LOCKS and PORRIDGE
+PRECISION = 10 ** 18
+
+
+def bot_module(name):
+    """
+    Make a fixture returning a bot module, imported once the stub configured
+    the environment (config, logging and the RPC connection are set up on import).
+
+    Usage in a test module:
+        budget = bot_module("budget")
+
+    Args:
+        name: Module name in src/
+
+    Returns:
+        Fixture of the same name
+    """
+    @pytest.fixture(name=name)
+    def fixture(stub_server):
+        return importlib.import_module(name)
+    return fixture
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    """Start the local JSON-RPC stand-in and point the bot's configuration at it"""
+    server = rpc_stub.StubServer(rpc_stub.StubChain())
+    server.start()
+    os.environ.update({
+        "RPC_URL": server.url,
+        "PRIVATE_KEY": STUB_PRIVATE_KEY,
+        "WEBHOOK_URL": f"{server.url}/webhook",
+        "HONEY_ADDRESS": rpc_stub.HONEY_ADDRESS,
+        "LOCKS_ADDRESS": rpc_stub.LOCKS_ADDRESS,
+        "PORRIDGE_ADDRESS": rpc_stub.PORRIDGE_ADDRESS,
+        "SUBSCRIPTION_URL": "",
+        "LOG_FORMAT": "text",
+    })
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def stub_chain(stub_server):
+    """Fresh emulated chain state for each test, with the clock frozen so no PRG accrues mid-test"""
+    chain = rpc_stub.StubChain(clock=lambda: 1_700_000_000)
+    stub_server.chain = chain
+    if "main" in sys.modules:
+        # Position models and deferred steps of the previous test describe the previous chain
+        sys.modules["main"].reset_wallet_state()
+    elif "position" in sys.modules:
+        sys.modules["position"].reset_positions()
+    return chain
+
+
+@pytest.fixture(scope="module")
+def chain_session(request):
+    """Web3 connection, account and contract addresses for a read-only contract suite"""
+    name = request.module.__name__.rsplit(".", 1)[-1].removeprefix("test_")
+    path = os.path.join(CASSETTE_DIR, f"{name}.rpc.gz")
+
+    if CASSETTE_MODE == "replay":
+        if not os.path.exists(path):
+            pytest.skip(f"No cassette at {path}, record one with CASSETTE_MODE=record")
+        cassette = Cassette.load(path)
+        yield ChainSession(Web3(ReplayProvider(cassette)), SimpleNamespace(address=cassette.meta["wallet"]),
+                           cassette.meta["addresses"])
+        return
+
+    if not (LIVE_ENV["RPC_URL"] and LIVE_ENV["PRIVATE_KEY"]):
+        pytest.skip("Missing RPC_URL or PRIVATE_KEY in environment")
+    provider = Web3.HTTPProvider(LIVE_ENV["RPC_URL"])
+    if CASSETTE_MODE == "record":
+        provider = RecordingProvider(provider)
+    w3 = Web3(provider)
+    if not w3.is_connected():
+        pytest.skip("Could not connect to Ethereum node")
+    account = w3.eth.account.from_key(LIVE_ENV["PRIVATE_KEY"])
+    addresses = {k: v for k, v in LIVE_ENV.items() if k.endswith("_ADDRESS")}
+    yield ChainSession(w3, account, addresses)
+
+    if CASSETTE_MODE == "record":
+        Cassette({"wallet": account.address, "addresses": addresses}, provider.interactions).save(path)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from web3 import Web3
+
+from tests.conftest import PRECISION, bot_module
+
+abi_tables = bot_module("abi_tables")
+
+
+class TestAbiTables:
+    """
+    Trimmed ABI extraction and the cached selector and type tables.
+    """
+
+    def test_admin_functions_trimmed(self, abi_tables):
+        tables = abi_tables.get_tables()
+        names = {entry.get("name") for entry in tables["porridge"].abi}
+        assert "stir" in names and "userVestingCheck" in names
+        assert not names & {"changePrgEmissions", "setGoldilendAddress", "upgradeToAndCall"}
+        assert "initializeProtocol" not in {entry.get("name") for entry in tables["locks"].abi}
+
+    def test_selectors_and_calldata_match_full_abi(self, abi_tables):
+        """Calldata from the tables equals web3's encoding with the full ABI"""
+        tables = abi_tables.get_tables()
+        with open(abi_tables.ABI_PATHS["porridge"]) as f:
+            full = Web3().eth.contract(abi=json.load(f))
+        wallet = "0x" + "ab" * 20
+
+        assert tables["porridge"].encode_call("stir", 5 * PRECISION) == bytes.fromhex(
+            full.functions.stir(5 * PRECISION)._encode_transaction_data()[2:])
+        assert tables["porridge"].encode_call("userBorrowLimit", wallet) == bytes.fromhex(
+            full.functions.userBorrowLimit(Web3.to_checksum_address(wallet))._encode_transaction_data()[2:])
+        assert tables["porridge"].events["Transfer"].topic == Web3.keccak(text="Transfer(address,address,uint256)")
+
+    def test_decode_output_against_stub(self, abi_tables, stub_chain):
+        from web3_utils import w3, ACCOUNT
+        import config
+
+        stub_chain.fund(ACCOUNT.address, porridge=7 * PRECISION)
+        porridge = abi_tables.get_tables()["porridge"]
+        data = w3.eth.call({"to": config.PORRIDGE_ADDRESS, "data": porridge.encode_call("balanceOf", ACCOUNT.address)})
+        assert porridge.decode_output("balanceOf", data) == 7 * PRECISION
+
+    def test_stale_artifact_rebuilt(self, abi_tables, tmp_path):
+        path = tmp_path / "bot_abis.pickle"
+        tables = abi_tables.build_tables()
+        tables["sources"] = {}
+        tables["contracts"] = {}
+        abi_tables.write_artifact(tables, path)
+
+        loaded = abi_tables.load_tables(path)
+        assert set(loaded["contracts"]) == {"honey", "locks", "porridge"}
+        assert abi_tables.load_tables(path) == loaded
+
+    def test_interface_change_rebuilds_artifact(self, abi_tables, tmp_path, monkeypatch):
+        """A cache built for another BOT_INTERFACE is not reused, without bumping ARTIFACT_VERSION"""
+        path = tmp_path / "bot_abis.pickle"
+        abi_tables.write_artifact(abi_tables.build_tables(), path)
+
+        interface = {**abi_tables.BOT_INTERFACE, "honey": {"functions": ["balanceOf"], "events": []}}
+        monkeypatch.setattr(abi_tables, "BOT_INTERFACE", interface)
+        assert set(abi_tables.load_tables(path)["contracts"]["honey"]["functions"]) == {"balanceOf"}
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
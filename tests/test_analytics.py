@@ -0,0 +1,87 @@
+import math
+import time
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+np = pytest.importorskip("numpy")
+
+YEAR = 365 * 86400
+T0 = 1_700_000_000
+
+analytics = bot_module("analytics")
+
+
+def write_ledger(directory, wallet, claimed, settings):
+    import ledger
+    book = ledger.Ledger(str(directory / f"{wallet}.ledger"))
+    book.append(10, T0, [("tx", 0, 0, 10 ** 16), ("stake", 100 * PRECISION, 0, 0), ("staked", 100 * PRECISION, 0, 0)])
+    book.append(12, T0 + YEAR // 2, [("tx", 0, 0, 10 ** 16), ("borrow", 3 * PRECISION, 0, 0),
+                                     ("claim", claimed, 0, 0), ("stir", PRECISION, PRECISION, 0),
+                                     ("staked", 100 * PRECISION, 0, 0)])
+    ledger.write_settings(str(directory), wallet, settings)
+
+
+class TestAnalytics:
+    """
+    Vectorized yield, debt, gas and stir analytics over the ledgers.
+    """
+
+    def test_wallet_summary(self, analytics, tmp_path):
+        import timeseries
+        write_ledger(tmp_path, "0xA", 5 * PRECISION, {})
+        prices = timeseries.TimeSeries(str(tmp_path / "0xA.ts"), capacity=8)
+        prices.append(11, T0, {"floor_price": PRECISION, "market_price": 2 * PRECISION})
+        prices.close()
+
+        summary = analytics.load_fleet(str(tmp_path), str(tmp_path), now=T0 + YEAR)["0xA"]
+        assert summary["prg_apr"] == pytest.approx(0.05)
+        assert summary["staked_avg"] == pytest.approx(100)
+        assert summary["debt_growth"] == 3.0 and summary["transactions"] == 2
+        assert summary["gas"] == pytest.approx(0.02) and summary["gas_per_prg"] == pytest.approx(0.004)
+        assert summary["stir_price"] == 1.0 and summary["stir_market"] == 2.0
+        assert summary["stir_discount"] == 0.5 and summary["stir_saved"] == 1.0
+
+    def test_window_keeps_stake_held_before_it(self, analytics, tmp_path):
+        write_ledger(tmp_path, "0xA", 5 * PRECISION, {})
+        records = analytics.load_ledger(str(tmp_path / "0xA.ledger"))
+        summary = analytics.summarize(records, since=T0 + YEAR // 4, now=T0 + YEAR)
+        assert summary["staked_avg"] == pytest.approx(100)
+        assert summary["prg_apr"] == pytest.approx(5 / 75)
+        assert summary["transactions"] == 1 and math.isnan(summary["stir_market"])
+
+    def test_settings_comparison_and_digest(self, analytics, tmp_path):
+        write_ledger(tmp_path, "0x" + "a" * 40, 5 * PRECISION, {"allow_wallet_honey": False})
+        write_ledger(tmp_path, "0x" + "b" * 40, 10 * PRECISION, {"allow_wallet_honey": True})
+        fleet = analytics.load_fleet(str(tmp_path), now=T0 + YEAR)
+        comparison = analytics.compare(fleet)
+        assert comparison["allow_wallet_honey"][False] == (1, pytest.approx(0.05))
+        assert comparison["allow_wallet_honey"][True] == (1, pytest.approx(0.10))
+
+        digest = analytics.format_digest(fleet, comparison, 365)
+        assert "2 wallets" in digest and digest.index("0xbbbb") < digest.index("0xaaaa")
+        assert len(analytics.format_digest({f"0x{i:040x}": fleet["0x" + "a" * 40] for i in range(100)},
+                                           comparison, 365)) <= analytics.DIGEST_LIMIT
+
+    def test_millions_of_records(self, analytics, tmp_path):
+        import ledger
+        path = tmp_path / "0xA.ledger"
+        ledger.Ledger(str(path))
+        n = 2_000_000
+        records = np.zeros(n, dtype=analytics.LEDGER_DTYPE)
+        records["block"] = np.arange(n)
+        records["timestamp"] = T0 + np.arange(n)
+        records["kind"] = np.arange(n) % len(ledger.KINDS)
+        records["amount"] = 1.0
+        with open(path, "ab") as f:
+            records.tofile(f)
+
+        start = time.perf_counter()
+        summary = analytics.summarize(analytics.load_ledger(str(path)), now=T0 + n)
+        assert time.perf_counter() - start < 2
+        assert summary["prg_claimed"] == pytest.approx(n / len(ledger.KINDS), abs=1)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
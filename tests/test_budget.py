@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+budget = bot_module("budget")
+
+
+async def slow(seconds, result=None):
+    await asyncio.sleep(seconds)
+    return result
+
+
+class TestBudget:
+    """
+    Per-cycle deadline and step time budgets.
+    """
+
+    def test_step_gets_lower_of_step_and_cycle_budget(self, budget):
+        now = [0.0]
+        cycle = budget.CycleBudget(10, {"stir": 3}, clock=lambda: now[0])
+        assert cycle.timeout("stir") == 3 and cycle.timeout("stake") == 10
+        now[0] = 8
+        assert cycle.timeout("stir") == 2 and not cycle.exhausted()
+        now[0] = 11
+        assert cycle.exhausted()
+        with pytest.raises(budget.BudgetExceeded):
+            asyncio.run(cycle.run("stake", slow(0)))
+        assert budget.CycleBudget().timeout("stir") is None
+
+    def test_slow_step_is_cancelled(self, budget):
+        cycle = budget.CycleBudget(0, {"swap": 0.05})
+        start = time.monotonic()
+        with pytest.raises(budget.BudgetExceeded, match="swap"):
+            asyncio.run(cycle.run("swap", slow(5)))
+        assert time.monotonic() - start < 1
+        assert asyncio.run(cycle.run("stake", slow(0, 42))) == 42
+
+    def test_slow_swap_is_deferred_and_caught_up(self, budget, stub_chain, monkeypatch):
+        import config
+        import main
+        from web3_utils import ACCOUNT
+
+        monkeypatch.setattr(config, "SWAP_LEFTOVER_HONEY", True)
+        monkeypatch.setattr(config, "STEP_BUDGETS", {"swap": 0.05})
+        stub_chain.fund(ACCOUNT.address, porridge=PRECISION, staked=100 * PRECISION)
+        swap = main.swap_honey_to_locks
+        monkeypatch.setattr(main, "swap_honey_to_locks", lambda *args: slow(5, 0))
+
+        start = time.monotonic()
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert time.monotonic() - start < 2
+        assert budget.has_deferred(ACCOUNT.address)
+        assert stub_chain.staked[ACCOUNT.address] == 101 * PRECISION  # the stake step still ran
+        assert main.cycle_wait(ACCOUNT.address) == config.DEFERRED_STEP_RETRY
+
+        # The next cycle first swaps the 99 leftover HONEY and stakes the LOCKS bought
+        monkeypatch.setattr(main, "swap_honey_to_locks", swap)
+        asyncio.run(main.run_protocol_cycle())
+        assert not budget.has_deferred(ACCOUNT.address)
+        assert stub_chain.staked[ACCOUNT.address] >= 101 * PRECISION + 99 * PRECISION // 2 * 95 // 100
+
+    def test_cycle_budget_bounds_latency(self, budget, stub_chain, monkeypatch):
+        import config
+        import main
+        from web3_utils import ACCOUNT
+
+        monkeypatch.setattr(config, "CYCLE_BUDGET", 0.3)
+        stub_chain.fund(ACCOUNT.address, porridge=PRECISION, staked=100 * PRECISION)
+        monkeypatch.setattr(main, "stir_porridge", lambda *args: slow(5))
+
+        start = time.monotonic()
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert time.monotonic() - start < 1.5
+        assert budget.take_deferred(ACCOUNT.address) == {"stake": ()}
+
+    def test_stake_cancelled_after_broadcast_is_not_repeated(self, budget, stub_server, stub_chain, monkeypatch):
+        """A stake mined after its step was cancelled is picked up from the chain, not sent again"""
+        import clock
+        import config
+        import main
+        import rpc_stub
+        from notifications import EventMessageCollector
+        from web3_utils import ACCOUNT
+
+        virtual = clock.VirtualClock()
+        chain = stub_server.chain = rpc_stub.StubChain(block_time=1, clock=virtual.time)
+        chain.fund(ACCOUNT.address, locks=5 * PRECISION, staked=100 * PRECISION)
+        chain.allowances[rpc_stub.LOCKS_ADDRESS][(ACCOUNT.address, rpc_stub.PORRIDGE_ADDRESS)] = 2 ** 256 - 1
+        monkeypatch.setattr(config, "POSITION_MODEL", True)
+        monkeypatch.setattr(config, "POSITION_VERIFY_INTERVAL", 600)
+        monkeypatch.setattr(config, "STEP_BUDGETS", {"stake": 0.6})
+        monkeypatch.setattr(config, "BORROW_THRESHOLD", 10 ** 30)  # only the deferred stake runs
+
+        async def scenario():
+            await main.stake_step(budget.CycleBudget(0, config.STEP_BUDGETS), EventMessageCollector())
+            assert budget.has_deferred(ACCOUNT.address)
+            await asyncio.sleep(2)  # the cancelled stake is mined meanwhile
+            await main.run_protocol_cycle()
+
+        clock.run_virtual(scenario(), virtual)
+        assert chain.staked[ACCOUNT.address] == 105 * PRECISION
+        assert [receipt["status"] for receipt in chain.receipts.values()] == ["0x1"]
+        assert not budget.has_deferred(ACCOUNT.address)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import pytest
+from web3 import Web3
+
+import clock
+from cassette import Cassette, CassetteMismatchError, RecordingProvider, ReplayProvider, cycle_cassette_path
+from tests.conftest import PRECISION
+
+
+class CheckedReplayProvider(ReplayProvider):
+    """Replay provider that keeps the mismatches the bot caught and logged"""
+
+    def __init__(self, cassette):
+        super().__init__(cassette)
+        self.mismatches = []
+
+    def make_request(self, method, params):
+        try:
+            return super().make_request(method, params)
+        except CassetteMismatchError as e:
+            self.mismatches.append(str(e))
+            raise
+
+
+class TestCassette:
+    """
+    Recording JSON-RPC traffic against the local stand-in and replaying it offline.
+    """
+
+    def test_record_and_replay(self, stub_server, stub_chain, tmp_path):
+        recorder = RecordingProvider(Web3.HTTPProvider(stub_server.url))
+        live = Web3(recorder)
+        block = live.eth.block_number
+        chain_id = live.eth.chain_id
+        path = tmp_path / "cycle.rpc.gz"
+        Cassette({"wallet": "0x" + "00" * 20}, recorder.interactions).save(path)
+
+        cassette = Cassette.load(path)
+        replayed = Web3(ReplayProvider(cassette))
+        requests_before = stub_chain.request_count
+        assert replayed.eth.block_number == block
+        assert replayed.eth.chain_id == chain_id
+        assert stub_chain.request_count == requests_before
+        assert cassette.meta["wallet"] == "0x" + "00" * 20
+
+    def test_identical_requests_replay_in_order(self):
+        cassette = Cassette(interactions=[
+            ["eth_blockNumber", [], {"jsonrpc": "2.0", "id": 0, "result": "0x1"}],
+            ["eth_blockNumber", [], {"jsonrpc": "2.0", "id": 1, "result": "0x2"}],
+        ])
+        w3 = Web3(ReplayProvider(cassette))
+        assert [w3.eth.block_number, w3.eth.block_number] == [1, 2]
+        with pytest.raises(CassetteMismatchError):
+            w3.eth.block_number
+
+    def test_every_recorded_cycle_replays(self, stub_chain, tmp_path, monkeypatch):
+        """Each cassette holds all a fresh replay needs, including the position model's sync"""
+        import config
+        import main
+        from web3_utils import ACCOUNT, get_web3
+
+        monkeypatch.setattr(config, "RPC_RECORD_DIR", str(tmp_path))
+        monkeypatch.setattr(config, "POSITION_MODEL", True)
+        web3 = get_web3()
+        monkeypatch.setattr(web3, "provider", RecordingProvider(web3.provider))
+        for cycle in (1, 2):
+            stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+            assert asyncio.run(main.run_wallet_cycle(cycle)) is True
+        paths = sorted(tmp_path.iterdir())
+        assert len(paths) == 2
+
+        for path in paths:
+            main.reset_wallet_state()
+            replay = CheckedReplayProvider(Cassette.load(path))
+            monkeypatch.setattr(web3, "provider", replay)
+            requests_before = stub_chain.request_count
+            assert asyncio.run(main.run_protocol_cycle()) is True
+            assert replay.mismatches == []
+            assert stub_chain.request_count == requests_before
+
+    def test_cassette_name_follows_the_bot_clock(self):
+        previous = clock.set_clock(clock.VirtualClock(start=1_800_000_000))
+        try:
+            assert cycle_cassette_path("recordings", 42) == os.path.join("recordings", "cycle-1800000000-000042.rpc.gz")
+        finally:
+            clock.set_clock(previous)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+
+import rpc_stub
+from tests.conftest import PRECISION, bot_module
+
+
+clock = bot_module("clock")
+
+
+@pytest.fixture
+def virtual_chain(clock, stub_server, stub_chain):
+    """Stub chain on a simulated clock, mining a block every 2 seconds of it"""
+    virtual = clock.VirtualClock()
+    chain = rpc_stub.StubChain(block_time=2, clock=virtual.time)
+    stub_server.chain = chain
+    return virtual, chain
+
+
+class TestClock:
+    """
+    Simulated time for the event loop and the bot's clock reads.
+    """
+
+    def test_virtual_loop_does_not_wait(self, clock):
+        virtual = clock.VirtualClock()
+
+        async def scenario():
+            await asyncio.sleep(3600)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.Event().wait(), 10)
+            clock.sleep(5)  # blocking sleeps (RPC retry backoff) only move the clock
+            return clock.time()
+
+        start = time.perf_counter()
+        assert clock.run_virtual(scenario(), virtual) == virtual.start + 3615
+        assert time.perf_counter() - start < 1
+        assert isinstance(clock.get_clock(), clock.SystemClock)
+
+    def test_receipt_timeout_passes_in_simulated_time(self, clock, virtual_chain):
+        from web3_utils import wait_for_receipt
+
+        virtual, _ = virtual_chain
+        with pytest.raises(Exception, match="Timed out waiting for receipt"):
+            clock.run_virtual(wait_for_receipt(bytes(32), timeout=120), virtual)
+        assert 120 <= virtual.elapsed < 122
+
+    def test_hours_of_cycles_run_in_simulated_time(self, clock, virtual_chain, monkeypatch):
+        import config
+        import main
+        import soak
+        from web3_utils import ACCOUNT
+
+        virtual, chain = virtual_chain
+        monkeypatch.setattr(config, "CYCLE_INTERVAL", 120)
+        chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+
+        counts = clock.run_virtual(soak.soak(main, [ACCOUNT], 6 * 3600), virtual)
+        assert 175 <= counts["cycles"] <= 180  # a cycle every two minutes, plus its receipt waits
+        assert counts["completed"] >= 1  # the first borrow; later ones wait for enough PRG to accrue
+        assert chain.staked[ACCOUNT.address] > 100 * PRECISION
+        assert virtual.elapsed == pytest.approx(6 * 3600)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
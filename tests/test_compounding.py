@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+
+compounding = bot_module("compounding")
+
+
+class TestCompounding:
+    """
+    Gas-aware compounding decisions.
+    """
+
+    def test_threshold_minimizes_loss(self, compounding):
+        """The computed threshold matches a brute-force search over compounding intervals"""
+        gas_cost, staked, premium = PRECISION // 2, 1000 * PRECISION, PRECISION
+        accrual = 1000 / (365 * 86400)  # PRG per second, 100% APR on 1000 LOCKS
+        yield_rate = accrual / 1000  # PRG per staked LOCKS per second
+
+        def loss_per_second(interval):
+            return (gas_cost / PRECISION) / interval + accrual * interval * yield_rate * (premium / PRECISION) / 2
+
+        best = min(range(3600, 90 * 86400, 600), key=loss_per_second)
+        threshold = compounding.optimal_threshold(gas_cost, staked, premium) / PRECISION
+        assert threshold == pytest.approx(accrual * best, rel=0.01)
+
+    def test_defer_until_threshold(self, compounding):
+        decision = compounding.decide(claimable=PRECISION, staked=1000 * PRECISION, floor_price=PRECISION,
+                                      market_price=2 * PRECISION, gas_price=10 ** 9, gas_token_price=5.0,
+                                      accrual_rate=PRECISION / 3600)
+        assert not decision.run
+        assert decision.gas_cost == compounding.cycle_gas() * 10 ** 9 * 5
+        assert decision.defer == pytest.approx((decision.threshold - PRECISION) / (PRECISION / 3600))
+        assert compounding.decide(decision.threshold, 1000 * PRECISION, PRECISION, 2 * PRECISION,
+                                  10 ** 9, 5.0).run
+        assert not compounding.decide(10 * PRECISION, 0, PRECISION, PRECISION, 10 ** 9, 5.0).run
+
+    def test_accrual_rate_from_reads(self, compounding):
+        wallet = "0x" + "cd" * 20
+        assert compounding.observe_claimable(wallet, 0, now=1000) is None
+        assert compounding.observe_claimable(wallet, 600, now=1600) == 1.0
+        compounding.reset_claimable(wallet, now=1700)
+        assert compounding.observe_claimable(wallet, 200, now=1800) == 2.0
+
+    def test_swap_counts_towards_cycle_gas(self, compounding, stub_chain, monkeypatch):
+        """Wallets swapping leftover HONEY pay for the approval and the LOCKS buy as well"""
+        import config
+        import porridge_logic
+        import wallet_settings
+
+        monkeypatch.setattr(config, "GAS_TOKEN_PRICE", 1.0)
+        plain, swapping = compounding.cycle_txs(False), compounding.cycle_txs(True)
+        assert swapping == plain + ["approve", "buy"]
+
+        gas_costs = {}
+        for swap in (False, True):
+            with wallet_settings.use_settings(wallet_settings.defaults()._replace(swap_leftover_honey=swap)):
+                gas_costs[swap] = porridge_logic.schedule_cycle().gas_cost
+        assert gas_costs[True] * compounding.cycle_gas(plain) == gas_costs[False] * compounding.cycle_gas(swapping)
+        assert gas_costs[True] > gas_costs[False]
+
+    def test_cycle_deferred_when_gas_too_expensive(self, stub_chain, monkeypatch):
+        import config
+        import main
+        from web3_utils import ACCOUNT
+
+        monkeypatch.setattr(config, "COMPOUND_OPTIMIZER", True)
+        stub_chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        stub_chain.claimable[ACCOUNT.address] = PRECISION
+
+        monkeypatch.setattr(config, "GAS_TOKEN_PRICE", 10_000.0)
+        assert asyncio.run(main.run_protocol_cycle()) is False
+        assert stub_chain.method_counts["eth_sendRawTransaction"] == 0
+
+        monkeypatch.setattr(config, "GAS_TOKEN_PRICE", 0.0001)
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert stub_chain.method_counts["eth_sendRawTransaction"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from rpc_stub import PORRIDGE_ADDRESS
+from tests.conftest import PRECISION
+
+
+@pytest.fixture
+def bot(stub_chain):
+    """Import the bot against the local stub (imports connect to the RPC)"""
+    import main
+    return main
+
+
+@pytest.fixture
+def account(bot):
+    from web3_utils import ACCOUNT
+    return ACCOUNT
+
+
+class TestProtocolCycleLocal:
+    """
+    End-to-end protocol cycle tests against the local JSON-RPC stand-in.
+    """
+
+    def test_cycle_skipped_below_threshold(self, bot, stub_chain, account):
+        """Cycle stops after the borrow limit check when nothing can be borrowed"""
+        assert asyncio.run(bot.run_protocol_cycle()) is False
+        assert stub_chain.method_counts["eth_sendRawTransaction"] == 0
+
+    def test_full_cycle(self, bot, stub_chain, account):
+        """Borrow, claim, stir and stake all land on the emulated contracts"""
+        stub_chain.fund(account.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        floor = stub_chain.floor_price
+
+        assert asyncio.run(bot.run_protocol_cycle()) is True
+
+        borrowed = 100 * PRECISION * floor // PRECISION
+        assert stub_chain.borrowed[account.address] == borrowed
+        # All PRG stirred into LOCKS, which were then staked
+        assert stub_chain.balances[PORRIDGE_ADDRESS][account.address] == 0
+        assert stub_chain.staked[account.address] == 110 * PRECISION
+        assert any("Borrowed" in m for m in stub_chain.webhook_messages)
+
+    def test_stir_limited_to_borrowed_honey(self, bot, stub_chain, account):
+        """Without ALLOW_WALLET_HONEY only the borrowed HONEY is used for stirring"""
+        stub_chain.fund(account.address, honey=1000 * PRECISION, porridge=50 * PRECISION, staked=10 * PRECISION)
+
+        assert asyncio.run(bot.run_protocol_cycle()) is True
+
+        # 10 HONEY borrowed at a floor of 1 stirs 10 of the 50 PRG
+        assert stub_chain.balances[PORRIDGE_ADDRESS][account.address] == 40 * PRECISION
+        assert any("Stirred ~20%" in m for m in stub_chain.webhook_messages)
+
+    def test_stub_answers_like_the_real_services(self, bot, stub_chain):
+        """Block tags resolve and webhooks get Discord's message object back"""
+        from discord_webhook import DiscordWebhook
+        import config
+        from web3_utils import w3
+
+        assert w3.eth.get_block("earliest").number == 0
+        response = DiscordWebhook(url=config.WEBHOOK_URL, content="hello").execute()
+        assert response.status_code == 200
+        assert response.json()["content"] == "hello"
+        assert stub_chain.webhook_messages == ["hello"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+import rpc_stub
+from tests.conftest import PRECISION, bot_module
+
+
+deployments = bot_module("deployments")
+
+
+@pytest.fixture
+def second_chain(stub_server, monkeypatch):
+    """Another stub chain with its own server, connections and contracts dropped after the test"""
+    import contracts
+    import web3_utils
+
+    monkeypatch.setattr(web3_utils, "_connections", dict(web3_utils._connections))
+    monkeypatch.setattr(contracts, "_contracts", dict(contracts._contracts))
+    server = rpc_stub.StubServer(rpc_stub.StubChain(gas_price=7 * 10 ** 9, clock=lambda: 1_700_000_000))
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def write_deployments(path, entries):
+    path.write_text(json.dumps(entries))
+    return str(path)
+
+
+def stub_entry(url, **extra):
+    return {"rpc_url": url, "honey": rpc_stub.HONEY_ADDRESS, "locks": rpc_stub.LOCKS_ADDRESS,
+            "porridge": rpc_stub.PORRIDGE_ADDRESS, **extra}
+
+
+class TestDeployments:
+    """
+    Several protocol deployments served by one process.
+    """
+
+    def test_load_deployments_requires_rpc_and_addresses(self, deployments, tmp_path):
+        path = write_deployments(tmp_path / "deployments.json", {
+            "main": stub_entry("http://a", keys_file="main-keys.txt"),
+            "fork": {"rpc_url": "http://b", "honey": rpc_stub.HONEY_ADDRESS},
+        })
+        with pytest.raises(ValueError, match="fork .* lacks locks, porridge"):
+            deployments.load_deployments(path)
+
+        path = write_deployments(tmp_path / "deployments.json", {"main": stub_entry("http://a")})
+        [deployment] = deployments.load_deployments(path)
+        assert deployment.name == "main" and deployment.keys_file == ""
+        assert deployments.addresses(deployment)["locks"] == rpc_stub.LOCKS_ADDRESS
+
+    def test_wallet_state_is_kept_per_deployment(self, deployments, stub_chain, second_chain, tmp_path,
+                                                 monkeypatch):
+        """The same keys run on two deployments without sharing models, deferred steps or ledgers"""
+        import budget
+        import config
+        import main
+        import position
+        from web3_utils import ACCOUNT
+
+        path = write_deployments(tmp_path / "deployments.json", {
+            "main": stub_entry(config.RPC_URL),
+            "fork": stub_entry(second_chain.url),
+        })
+        monkeypatch.setattr(config, "DEPLOYMENTS_FILE", path)
+        monkeypatch.setattr(config, "POSITION_MODEL", True)
+        monkeypatch.setattr(config, "LEDGER_DIR", str(tmp_path / "ledger"))
+        (mainnet, main_accounts), (fork, fork_accounts) = main.load_assignments()
+        assert main_accounts == fork_accounts == [ACCOUNT]
+
+        stub_chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        second_chain.chain.fund(ACCOUNT.address, staked=300 * PRECISION)
+        for deployment in (mainnet, fork):
+            with deployments.use_deployment(deployment):
+                assert asyncio.run(main.run_wallet_cycle(1)) is True
+        with deployments.use_deployment(fork):
+            budget.defer_step(ACCOUNT.address, "stake")
+            assert position.get_position(ACCOUNT.address).get("staked_locks") == 300 * PRECISION
+        with deployments.use_deployment(mainnet):
+            assert position.get_position(ACCOUNT.address).get("staked_locks") == 100 * PRECISION
+            assert not budget.has_deferred(ACCOUNT.address)
+        assert (tmp_path / "ledger" / "main" / f"{ACCOUNT.address}.ledger").exists()
+        assert (tmp_path / "ledger" / "fork" / f"{ACCOUNT.address}.ledger").exists()
+
+    def test_cycle_runs_on_the_current_deployment(self, deployments, stub_chain, second_chain):
+        import main
+        from status import contract_addresses
+        from web3_utils import ACCOUNT, w3
+
+        other = deployments.Deployment("fork", second_chain.url, rpc_stub.HONEY_ADDRESS, rpc_stub.LOCKS_ADDRESS,
+                                       rpc_stub.PORRIDGE_ADDRESS, "", "")
+        second_chain.chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        with deployments.use_deployment(other):
+            assert contract_addresses() == deployments.addresses(other)
+            assert asyncio.run(main.run_wallet_cycle(1)) is True
+            assert w3.eth.gas_price == second_chain.chain.gas_price
+
+        assert second_chain.chain.receipts and second_chain.chain.borrowed[ACCOUNT.address] > 0
+        assert not stub_chain.receipts
+        assert deployments.current().name == deployments.DEFAULT_NAME
+
+    def test_deployments_run_concurrently_in_one_loop(self, deployments, stub_chain, second_chain, monkeypatch):
+        import config
+        import main
+        from web3_utils import get_web3
+
+        other = deployments.Deployment("fork", second_chain.url, rpc_stub.HONEY_ADDRESS, rpc_stub.LOCKS_ADDRESS,
+                                       rpc_stub.PORRIDGE_ADDRESS, "", "")
+        seen = {}
+
+        async def fleet_loop(accounts):
+            await asyncio.sleep(0)  # both loops are running before either reads its deployment
+            seen[deployments.current().name] = get_web3().eth.gas_price
+
+        monkeypatch.setattr(config, "DEPLOYMENTS_FILE", "deployments.json")
+        monkeypatch.setattr(main, "fleet_loop", fleet_loop)
+        asyncio.run(main.bot_loop([(deployments.default_deployment(), []), (other, [])]))
+        assert seen == {"default": stub_chain.gas_price, "fork": second_chain.chain.gas_price}
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
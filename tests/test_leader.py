@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+leader = bot_module("leader")
+
+
+class TestLeader:
+    """
+    Leader lease and hot standby failover.
+    """
+
+    def test_file_lease_is_exclusive(self, leader, tmp_path):
+        path = str(tmp_path / "bot.lock")
+        first, second = leader.FileLease(path, "a"), leader.FileLease(path, "b")
+        assert first.acquire() and first.renew()
+        assert not second.acquire()
+        first.release()
+        assert second.acquire() and second.held()
+        with open(path) as f:
+            assert f.read() == "b"
+        second.release()
+
+    def test_sqlite_lease_expires_without_heartbeat(self, leader, tmp_path):
+        path = str(tmp_path / "lease.db")
+        now = [1000.0]
+        first = leader.SqliteLease(path, 10, "a", clock=lambda: now[0])
+        second = leader.SqliteLease(path, 10, "b", clock=lambda: now[0])
+        assert first.acquire()
+        now[0] += 6
+        assert first.renew() and not second.acquire()
+        now[0] += 11  # the leader hung through a whole TTL
+        assert not first.held()
+        assert second.acquire()
+        assert not first.renew() and not first.held()
+        second.release()
+        assert first.acquire()
+
+    def test_lost_lease_blocks_sending(self, leader, stub_chain, tmp_path, monkeypatch):
+        import main
+        from web3_utils import ACCOUNT
+
+        lease = leader.SqliteLease(str(tmp_path / "lease.db"), 10, "a")
+        monkeypatch.setattr(leader, "_lease", lease)  # never acquired
+        stub_chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        assert asyncio.run(main.run_wallet_cycle(1)) is False
+        assert not stub_chain.receipts
+        with pytest.raises(leader.LeaseLost):
+            leader.check()
+
+    def test_standby_takes_over_and_steps_back(self, leader, stub_chain, tmp_path, monkeypatch):
+        import config
+        import main
+
+        monkeypatch.setattr(config, "LEADER_LEASE", "sqlite:" + str(tmp_path / "lease.db"))
+        monkeypatch.setattr(config, "LEADER_LEASE_TTL", 0.3)
+        monkeypatch.setattr(leader, "_lease", None)
+        path = str(tmp_path / "lease.db")
+        running = []
+
+        async def bot_loop(accounts):
+            running.append(True)
+            try:
+                await asyncio.sleep(3600)
+            finally:
+                running.append(False)
+
+        monkeypatch.setattr(main, "bot_loop", bot_loop)
+
+        async def scenario():
+            other = leader.SqliteLease(path, 0.3, "other")
+            assert other.acquire()
+            ours = leader.SqliteLease(path, 0.3, "ours")
+            task = asyncio.create_task(main.leader_loop(main.load_assignments(), ours))
+            await asyncio.sleep(0.2)
+            assert running == []  # standing by while the other instance renews
+            other.renew()
+            await asyncio.sleep(0.2)
+            assert running == []
+
+            start = time.monotonic()
+            while not running:  # the other instance stopped renewing
+                await asyncio.sleep(0.01)
+            assert time.monotonic() - start < 1
+            assert ours.held()
+
+            # The other instance comes back after the lease was lost to it; ours steps back
+            later = leader.SqliteLease(path, 0.3, "other", clock=lambda: time.time() + 1)
+            assert later.acquire()
+            while running[-1]:
+                await asyncio.sleep(0.01)
+            assert not ours.held()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import PRECISION
+
+
+class TestLedger:
+    """
+    Per-wallet ledger of the bot's own transactions.
+    """
+
+    def test_records_roundtrip(self, tmp_path):
+        import ledger
+        book = ledger.Ledger(str(tmp_path / "wallet.ledger"))
+        book.append(7, 1_700_000_000, [("tx", 0, 0, 10 ** 15), ("stir", 2 * PRECISION, PRECISION, 0)])
+        assert book.read() == [(7, 1_700_000_000, "tx", 0.0, 0.0, 0.001), (7, 1_700_000_000, "stir", 2.0, 1.0, 0.0)]
+        assert book.read(last=1)[0][2] == "stir"
+
+    def test_cycle_is_recorded(self, stub_chain, monkeypatch, tmp_path):
+        import config
+        import ledger
+        import main
+        from web3_utils import ACCOUNT
+
+        monkeypatch.setattr(config, "LEDGER_DIR", str(tmp_path))
+        stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        stub_chain.claimable[ACCOUNT.address] = PRECISION
+        assert asyncio.run(main.run_protocol_cycle()) is True
+
+        records = ledger.get_ledger(str(tmp_path), ACCOUNT.address).read()
+        by_kind = {}
+        for block, timestamp, kind, amount, honey, gas in records:
+            by_kind.setdefault(kind, []).append((amount, honey, gas))
+        assert len(by_kind["tx"]) == stub_chain.method_counts["eth_sendRawTransaction"]
+        assert all(gas > 0 for _, _, gas in by_kind["tx"])
+        assert by_kind["claim"] == [(1.0, 0.0, 0.0)]
+        stirred, honey, _ = by_kind["stir"][0]
+        assert stirred == 11.0 and honey == pytest.approx(stirred * stub_chain.floor_price / PRECISION)
+        assert by_kind["staked"][-1][0] == stub_chain.staked[ACCOUNT.address] / PRECISION
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from argparse import Namespace
+
+import pytest
+
+from tests.conftest import bot_module
+
+loadtest = bot_module("loadtest")
+
+
+class TestLoadtest:
+    """
+    Smoke run of the load-test ramp against the local RPC stand-in.
+    """
+
+    def test_one_level_report(self, loadtest, stub_server, stub_chain):
+        args = Namespace(wallets=3, concurrency=[2], block_time=0, latency=0.0, error_rate=0.0,
+                         log_level="WARNING", output=None)
+        report = asyncio.run(loadtest.run(args, server=stub_server))
+        assert json.loads(json.dumps(report)) == report  # as written by --output
+
+        assert report["version"] == loadtest.REPORT_VERSION
+        assert set(report) == {"version", "timestamp", "python", "params", "rss_start_mb", "levels"}
+        assert report["params"] == {"wallets": 3, "concurrency": [2], "block_time": 0, "latency": 0.0, "error_rate": 0.0}
+
+        [level] = report["levels"]
+        assert set(level) == {"concurrency", "cycles", "errors", "duration_s", "cycles_per_second",
+                              "cycle_latency_ms", "rpc_requests_per_cycle", "event_loop_lag_ms", "rss_mb"}
+        assert level["concurrency"] == 2 and level["cycles"] == 3 and level["errors"] == 0
+        assert set(level["cycle_latency_ms"]) == set(level["event_loop_lag_ms"]) == {"p50", "p99", "max"}
+        assert 0 < level["cycle_latency_ms"]["p50"] <= level["cycle_latency_ms"]["max"]
+        assert level["rpc_requests_per_cycle"] > 0
+
+        # Every synthetic wallet ran its cycle through to the stake
+        for account in loadtest.synthetic_accounts(3):
+            assert stub_server.chain.staked[account.address] > 100 * loadtest.PRECISION
+
+    def test_percentile(self, loadtest):
+        assert loadtest.percentile([], 99) == 0
+        assert loadtest.percentile([3, 1, 2], 50) == 2
+        assert loadtest.percentile(list(range(1, 101)), 99) == 99
+        assert loadtest.percentile([5], 99) == 5
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -4,45 +4,31 @@ import os
 from decimal import Decimal
 from web3 import Web3
 
-# Import environment variables for testing
-from dotenv import load_dotenv
 
-load_dotenv()
-
-# Environment variables
-RPC_URL = os.getenv("RPC_URL")
-LOCKS_ADDRESS = os.getenv("LOCKS_ADDRESS")
-HONEY_ADDRESS = os.getenv("HONEY_ADDRESS")
-PORRIDGE_ADDRESS = os.getenv("PORRIDGE_ADDRESS")
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-
-# Skip tests if environment is not set up
-if not (RPC_URL and LOCKS_ADDRESS and PRIVATE_KEY):
-    pytest.skip("Missing RPC_URL, LOCKS_ADDRESS, or PRIVATE_KEY in environment", allow_module_level=True)
+@pytest.fixture(scope="module")
+def web3(chain_session):
+    """Web3 connection to use for all tests (live, recording or replaying a cassette)"""
+    return chain_session.web3
 
 
 @pytest.fixture(scope="module")
-def web3():
-    """Create a Web3 connection to use for all tests"""
-    w3 = Web3(Web3.HTTPProvider(RPC_URL))
-    if not w3.is_connected():
-        pytest.skip("Could not connect to Ethereum node", allow_module_level=True)
-    return w3
+def account(chain_session):
+    """Account the tests read balances and allowances for"""
+    print(f"\nUsing account: {chain_session.account.address}")
+    return chain_session.account
 
 
 @pytest.fixture(scope="module")
-def account(web3):
-    """Create account from private key"""
-    account = web3.eth.account.from_key(PRIVATE_KEY)
-    print(f"\nUsing account: {account.address}")
-    return account
+def addresses(chain_session):
+    """Contract addresses from the environment, or recorded in the cassette"""
+    return chain_session.addresses
 
 
 @pytest.fixture(scope="module")
-def locks_contract(web3):
+def locks_contract(web3, addresses):
     """Initialize LOCKS contract instance for testing"""
     # Load ABI from file
-    abi_path = "../src/ABIs/abi_locks.json"
+    abi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "ABIs", "abi_locks.json")
     try:
         with open(abi_path, 'r') as f:
             locks_abi = json.load(f)
@@ -51,7 +37,7 @@ def locks_contract(web3):
 
     # Initialize contract
     contract = web3.eth.contract(
-        address=web3.to_checksum_address(LOCKS_ADDRESS),
+        address=web3.to_checksum_address(addresses["LOCKS_ADDRESS"]),
         abi=locks_abi
     )
     return contract
@@ -60,7 +46,7 @@ def locks_contract(web3):
 class TestLocksContract:
     """
     Tests for LOCKS token contract read functions.
-    These tests interact with the actual blockchain.
+    These tests interact with the actual blockchain, or replay a recorded cassette of it.
     """
 
     def test_contract_connection(self, locks_contract):
@@ -102,13 +88,13 @@ class TestLocksContract:
         assert isinstance(balance, int)
         assert balance >= 0
 
-    def test_allowance_for_porridge(self, locks_contract, account, web3):
+    def test_allowance_for_porridge(self, locks_contract, account, web3, addresses):
         """Test allowance for PORRIDGE contract (important for staking)"""
-        if not PORRIDGE_ADDRESS:
+        if not addresses["PORRIDGE_ADDRESS"]:
             pytest.skip("No PORRIDGE_ADDRESS provided in environment")
 
         owner = account.address
-        spender = web3.to_checksum_address(PORRIDGE_ADDRESS)
+        spender = web3.to_checksum_address(addresses["PORRIDGE_ADDRESS"])
 
         allowance = locks_contract.functions.allowance(owner, spender).call()
 
@@ -158,7 +144,7 @@ class TestLocksContract:
         except Exception as e:
             pytest.skip(f"fsl() or psl() function not available: {e}")
 
-    def test_honey_address(self, locks_contract, web3):
+    def test_honey_address(self, locks_contract, web3, addresses):
         """Test getting HONEY token address from LOCKS contract"""
         try:
             honey_address = locks_contract.functions.honey().call()
@@ -167,8 +153,8 @@ class TestLocksContract:
             assert Web3.is_checksum_address(honey_address)
 
             # Verify it matches the expected HONEY address if provided
-            if HONEY_ADDRESS:
-                expected_address = web3.to_checksum_address(HONEY_ADDRESS)
+            if addresses["HONEY_ADDRESS"]:
+                expected_address = web3.to_checksum_address(addresses["HONEY_ADDRESS"])
                 assert honey_address.lower() == expected_address.lower(), \
                     f"HONEY address mismatch: got {honey_address}, expected {expected_address}"
         except Exception as e:
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from tests.conftest import bot_module
+
+logger = bot_module("logger")
+
+
+def make_record(msg="HONEY balance: %s", args=(1,), level=logging.INFO, **extra):
+    """LogRecord as a bot logger would create it"""
+    record = logging.LogRecord("goldilocks.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def kept(sampler, records):
+    """Number of records the filter lets through"""
+    return sum(1 for record in records if sampler.filter(record))
+
+
+class TestLogger:
+    """
+    JSON/text formatting, sampling of noisy reads and the bound per-task context.
+    """
+
+    def test_json_line_has_context_and_extras(self, logger):
+        record = make_record(context={"wallet": "0xabc", "cycle": 3}, tx_hash="0x01", gas=21000, when=object())
+        entry = json.loads(logger.JsonFormatter().format(record))
+        assert entry["level"] == "INFO" and entry["logger"] == "goldilocks.test"
+        assert entry["msg"] == "HONEY balance: 1"
+        assert entry["wallet"] == "0xabc" and entry["cycle"] == 3
+        assert entry["tx_hash"] == "0x01" and entry["gas"] == 21000
+        assert entry["when"].startswith("<object")  # unserializable extras fall back to str
+        assert "context" not in entry and "sampled" not in entry and "args" not in entry
+        assert "exc" not in entry
+
+    def test_queued_record_keeps_message_and_traceback(self, logger):
+        try:
+            raise RuntimeError("nonce too low")
+        except RuntimeError:
+            record = logging.LogRecord("goldilocks.test", logging.ERROR, __file__, 1, "Stake failed: %s", ("x",), True)
+            record.exc_info = sys.exc_info()
+        log_queue = queue.SimpleQueue()
+        handler = logger._QueueHandler(log_queue)
+        handler.addFilter(logger.ContextFilter())
+        with logger.bind(wallet="0xabc", step="stake"):
+            handler.handle(record)
+        prepared = log_queue.get_nowait()
+        assert prepared.args is None and prepared.exc_info is None
+        entry = json.loads(logger.JsonFormatter().format(prepared))
+        assert entry["msg"] == "Stake failed: x"
+        assert entry["wallet"] == "0xabc" and entry["step"] == "stake"
+        assert "RuntimeError: nonce too low" in entry["exc"]
+
+        line = logger.TextFormatter().format(prepared)
+        assert "ERROR   wallet=0xabc step=stake Stake failed: x\nTraceback" in line
+
+    def test_sampling_keeps_every_nth_per_template(self, logger):
+        sampler = logger.SamplingFilter(0.1)
+        balances = [make_record(args=(i,), sampled=True) for i in range(100)]
+        prices = [make_record("Market price: %s", (i,), sampled=True) for i in range(20)]
+        assert kept(sampler, balances) == 10
+        assert kept(sampler, prices) == 2
+        assert sampler.filter(balances[0])  # the 101st balance line starts the next ten
+
+        # Unmarked messages and warnings are never sampled
+        assert kept(sampler, [make_record() for _ in range(10)]) == 10
+        assert kept(sampler, [make_record(level=logging.WARNING, sampled=True) for _ in range(10)]) == 10
+
+        assert kept(logger.SamplingFilter(1.0), balances) == 100
+        assert kept(logger.SamplingFilter(0.3), balances) == 34  # rounded to every third
+        assert kept(logger.SamplingFilter(0), balances) == 0
+        assert logger.SamplingFilter(0).filter(make_record(level=logging.ERROR, sampled=True))
+
+    def test_context_is_bound_per_task(self, logger):
+        context_filter = logger.ContextFilter()
+
+        async def cycle(wallet, delay):
+            with logger.bind(wallet=wallet, cycle=1):
+                await asyncio.sleep(delay)
+                with logger.bind(step="stake"):
+                    await asyncio.sleep(delay)
+                    inner = make_record()
+                    context_filter.filter(inner)
+                outer = make_record()
+                context_filter.filter(outer)
+            return inner.context, outer.context
+
+        async def scenario():
+            return await asyncio.gather(cycle("0xa", 0.02), cycle("0xb", 0.01))
+
+        with logger.bind(deployment="main"):
+            (a_inner, a_outer), (b_inner, b_outer) = asyncio.run(scenario())
+            record = make_record()
+            context_filter.filter(record)
+            assert record.context == {"deployment": "main"}
+        assert a_inner == {"deployment": "main", "wallet": "0xa", "cycle": 1, "step": "stake"}
+        assert a_outer == {"deployment": "main", "wallet": "0xa", "cycle": 1}
+        assert b_inner == {"deployment": "main", "wallet": "0xb", "cycle": 1, "step": "stake"}
+        assert b_outer == {"deployment": "main", "wallet": "0xb", "cycle": 1}
+
+        record = make_record()
+        context_filter.filter(record)
+        assert record.context == {}
+
+    def test_bot_loggers_share_one_hierarchy(self, logger):
+        assert logger.get_logger("main").name == "goldilocks.main"
+        root = logging.getLogger("goldilocks")
+        assert not root.propagate
+        assert sum(type(h) is logger._QueueHandler for h in root.handlers) == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
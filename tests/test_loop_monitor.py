@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from tests.conftest import bot_module
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+loop_monitor = bot_module("loop_monitor")
+
+
+class TestLoopMonitor:
+    """
+    Event-loop lag measurement and blocking callsites.
+    """
+
+    def test_blocking_call_is_charged_to_its_line(self, loop_monitor):
+        monitor = loop_monitor.LoopMonitor(0.1, interval=0.02, report_interval=0, roots=(TESTS_DIR,))
+
+        def blocking_read():
+            time.sleep(0.3)  # a synchronous RPC call inside a coroutine
+
+        async def cycle():
+            await asyncio.sleep(0.1)
+            blocking_read()
+            await asyncio.sleep(0.1)
+
+        async def scenario():
+            task = asyncio.create_task(monitor.run())
+            await cycle()
+            task.cancel()
+
+        asyncio.run(scenario())
+        [(site, blocks, seconds, longest)] = monitor.worst()
+        assert site.startswith("test_loop_monitor.py:") and site.endswith(" blocking_read")
+        assert blocks == 1 and 0.25 < seconds < 0.5
+        assert monitor.max_lag >= seconds
+
+    def test_blocked_time_is_split_by_samples(self, loop_monitor):
+        monitor = loop_monitor.LoopMonitor(0.1, report_interval=0)
+        monitor.beat(0.05)  # below the threshold: only lag
+        assert monitor.worst() == [] and monitor.max_lag == 0.05
+
+        monitor._samples = {"web3_utils.py:10 send_tx": 3, "notifications.py:20 send_discord_message": 1}
+        monitor.beat(0.4)
+        monitor._samples = {"notifications.py:20 send_discord_message": 2}
+        monitor.beat(0.24)
+        monitor.beat(0.15)  # not sampled
+        assert monitor.worst() == [
+            ("notifications.py:20 send_discord_message", 2, pytest.approx(0.34), pytest.approx(0.24)),
+            ("web3_utils.py:10 send_tx", 1, pytest.approx(0.3), pytest.approx(0.3)),
+            (loop_monitor.UNKNOWN_SITE, 1, pytest.approx(0.15), pytest.approx(0.15)),
+        ]
+        assert monitor.blocked == pytest.approx(0.79) and monitor.beats == 4
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
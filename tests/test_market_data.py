@@ -0,0 +1,71 @@
+import asyncio
+import subprocess
+import sys
+import os
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+market_data = bot_module("market_data")
+
+
+class TestMarketData:
+    """
+    Per-block market data shared by the workers.
+    """
+
+    def test_reader_in_other_process_sees_publish(self, market_data, tmp_path):
+        path = str(tmp_path / "market.board")
+        board = market_data.MarketBoard(path)
+        assert board.read() is None
+        board.publish(42, {"floor_price": 3 * PRECISION, "market_price": 2 ** 255})
+
+        reader = ("import sys, market_data; d = market_data.MarketBoard(sys.argv[1], readonly=True).read(); "
+                  "print(d.block, d.floor_price, d.market_price, d.fsl)")
+        out = subprocess.run([sys.executable, "-c", reader, path], cwd=SRC_DIR, env=os.environ,
+                             capture_output=True, text=True, check=True).stdout.split()
+        assert out == ["42", str(3 * PRECISION), str(2 ** 255), "None"]
+
+    def test_one_call_reads_all_globals(self, market_data, stub_chain):
+        from web3_utils import w3
+
+        stub_chain.method_counts.clear()
+        values = market_data.read_market(w3)
+        assert stub_chain.method_counts["eth_call"] == 1
+        assert values["floor_price"] == stub_chain.floor_price and values["market_price"] == stub_chain.market_price
+        assert values["fsl"] == stub_chain.fsl and values["psl"] == stub_chain.psl
+        assert None not in values.values()
+
+    def test_workers_skip_global_reads(self, market_data, stub_chain, monkeypatch, tmp_path):
+        import config
+        import main
+        from abi_tables import get_tables
+        from locks_logic import get_floor_price
+        from web3_utils import ACCOUNT, w3
+
+        locks = get_tables()["locks"]
+        global_reads = {"0x" + bytes(locks.encode_call(fn)).hex() for fn in ("floorPrice", "marketPrice")}
+        reads = []
+        eth_call = stub_chain.rpc_eth_call
+        monkeypatch.setattr(stub_chain, "rpc_eth_call", lambda tx, *args: reads.append(tx.get("data")) or eth_call(tx, *args))
+
+        path = str(tmp_path / "market.board")
+        board = market_data.MarketBoard(path)
+        board.publish(w3.eth.block_number, market_data.read_market(w3))
+        monkeypatch.setattr(config, "MARKET_DATA_FILE", path)
+        monkeypatch.setattr(config, "SWAP_LEFTOVER_HONEY", True)
+        stub_chain.fund(ACCOUNT.address, porridge=PRECISION, staked=100 * PRECISION)
+        reads.clear()
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert reads and not global_reads & set(reads)
+
+        board.publish(w3.eth.block_number, {}, updated_at=0)  # a stale board falls back to the chain
+        assert get_floor_price() == stub_chain.floor_price
+        assert global_reads & set(reads)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import signal
+import tracemalloc
+
+import pytest
+
+from tests.conftest import bot_module
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_leaked = []
+
+
+def leaky_cycle():
+    _leaked.append([bytearray(1000) for _ in range(100)])  # a cycle keeping its receipts reachable
+
+
+memory_guard = bot_module("memory_guard")
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    """Drop the test's allocations and stop tracing after each test"""
+    yield
+    _leaked.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class TestMemoryGuard:
+    """
+    Periodic tracemalloc snapshots and growth reports.
+    """
+
+    def test_growing_site_is_reported_with_its_caller(self, memory_guard):
+        guard = memory_guard.MemoryGuard(60, roots=(TESTS_DIR,))
+        guard.start()
+        for _ in range(5):
+            leaky_cycle()
+        growth = guard.check()
+        assert growth[0].callsite.startswith("test_memory_guard.py:")
+        assert growth[0].size_diff >= 5 * 100 * 1000
+        assert growth[0].count_diff >= 500
+
+        assert all(g.size_diff < 100 * 1000 for g in guard.check())  # nothing leaked since
+
+    def test_signal_dumps_a_snapshot(self, memory_guard, tmp_path):
+        guard = memory_guard.MemoryGuard(60, dump_dir=str(tmp_path / "dumps"))
+        guard.start()
+
+        async def scenario():
+            task = asyncio.create_task(guard.run())
+            await asyncio.sleep(0)
+            os.kill(os.getpid(), signal.SIGUSR2)
+            for _ in range(100):
+                if os.path.isdir(tmp_path / "dumps"):
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(scenario())
+        [name] = os.listdir(tmp_path / "dumps")
+        snapshot = tracemalloc.Snapshot.load(str(tmp_path / "dumps" / name))
+        assert snapshot.traceback_limit == guard.frames
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
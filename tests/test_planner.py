@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+import rpc_stub
+from tests.conftest import PRECISION, bot_module
+
+# (fund kwargs, claimable PRG, config overrides)
+SCENARIOS = {
+    "full_stir": (dict(porridge=10 * PRECISION, staked=100 * PRECISION), PRECISION, {}),
+    "below_threshold": (dict(staked=100 * PRECISION, borrowed=100 * PRECISION), PRECISION, {}),
+    "partial_stir": (dict(porridge=50 * PRECISION, staked=20 * PRECISION), 0, {}),
+    "wallet_honey": (dict(honey=15 * PRECISION, porridge=50 * PRECISION, staked=20 * PRECISION), 0,
+                     {"ALLOW_WALLET_HONEY": True}),
+    "swap_all": (dict(honey=30 * PRECISION, porridge=5 * PRECISION, staked=100 * PRECISION), 0,
+                 {"SWAP_ALL_WALLET_HONEY": True}),
+    "no_swap": (dict(locks=3 * PRECISION, staked=100 * PRECISION), 0, {"SWAP_LEFTOVER_HONEY": False}),
+}
+
+planner = bot_module("planner")
+
+
+def sample_state(**overrides):
+    state = {
+        "borrow_limit": 100 * PRECISION, "claimable_prg": 5 * PRECISION, "honey_balance": 0,
+        "prg_balance": 10 * PRECISION, "locks_balance": 0, "floor_price": PRECISION, "market_price": 2 * PRECISION,
+        "honey_allowance_porridge": 0, "prg_allowance_porridge": 0, "honey_allowance_locks": 0,
+        "locks_allowance_porridge": 0,
+    }
+    state.update(overrides)
+    return state
+
+
+class TestPlanner:
+    """
+    Pure cycle planning.
+    """
+
+    def test_plan_full_cycle(self, planner):
+        settings = planner.Settings(PRECISION, False, True, False)
+        plan = planner.plan_cycle(sample_state(), settings)
+        assert [(a.contract, a.function) for a in plan] == [
+            ("porridge", "borrow"), ("porridge", "claim"), ("honey", "approve"), ("porridge", "approve"),
+            ("porridge", "stir"), ("honey", "approve"), ("locks", "buy"), ("locks", "approve"), ("porridge", "stake")]
+        stir = next(a for a in plan if a.function == "stir")
+        assert stir.args == (15 * PRECISION,)
+        buy = next(a for a in plan if a.function == "buy")
+        assert buy.args == (int(85 * PRECISION * PRECISION / (2 * PRECISION) * 0.95), 85 * PRECISION)
+
+    def test_existing_allowances_skip_approvals(self, planner):
+        settings = planner.Settings(PRECISION, False, False, False)
+        plan = planner.plan_cycle(sample_state(honey_allowance_porridge=10 ** 30, prg_allowance_porridge=10 ** 30,
+                                               locks_allowance_porridge=10 ** 30), settings)
+        assert [a.function for a in plan] == ["borrow", "claim", "stir", "stake"]
+
+    def test_thousands_of_plans_per_second(self, planner):
+        settings = planner.Settings(PRECISION, True, True, False)
+        states = [sample_state(borrow_limit=i * PRECISION, prg_balance=(i % 50) * PRECISION) for i in range(5000)]
+        start = time.perf_counter()
+        for state in states:
+            planner.plan_cycle(state, settings)
+        assert len(states) / (time.perf_counter() - start) > 5000
+
+    @pytest.mark.parametrize("scenario", SCENARIOS)
+    def test_plan_matches_live_cycle(self, planner, stub_server, monkeypatch, scenario):
+        """The live cycle sends exactly the planned transactions"""
+        import config
+        import main
+        import position
+        from abi_tables import get_tables
+        from status import snapshot
+        from web3_utils import ACCOUNT, w3
+
+        fund, claimable, overrides = SCENARIOS[scenario]
+        for name, value in overrides.items():
+            monkeypatch.setattr(config, name, value)
+        chain = stub_server.chain = rpc_stub.StubChain(clock=lambda: 1_700_000_000)
+        position.reset_positions()
+        chain.fund(ACCOUNT.address, **fund)
+        chain.claimable[ACCOUNT.address] = claimable
+
+        state = planner.wallet_state(snapshot(w3, [ACCOUNT.address]), ACCOUNT.address)
+        plan = planner.plan_cycle(state, planner.settings_from_config())
+
+        sent = []
+        broadcast = chain.rpc_eth_sendRawTransaction
+        monkeypatch.setattr(chain, "rpc_eth_sendRawTransaction", lambda raw: sent.append(raw) or broadcast(raw))
+        asyncio.run(main.run_protocol_cycle())
+
+        addresses = {"honey": config.HONEY_ADDRESS, "locks": config.LOCKS_ADDRESS, "porridge": config.PORRIDGE_ADDRESS}
+        tables = get_tables()
+        expected = [(addresses[a.contract], tables[a.contract].encode_call(
+            a.function, *(addresses.get(arg, arg) if isinstance(arg, str) else arg for arg in a.args))) for a in plan]
+        decoded = [rpc_stub._decode_raw_transaction(bytes.fromhex(raw[2:])) for raw in sent]
+        assert [(tx["to"], tx["data"]) for tx in decoded] == expected
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
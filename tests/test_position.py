@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+import rpc_stub
+from tests.conftest import PRECISION
+
+
+@pytest.fixture
+def bot(stub_chain, monkeypatch):
+    """Bot modules with the position model enabled and never due for a periodic check"""
+    import config
+    import main
+    monkeypatch.setattr(config, "POSITION_MODEL", True)
+    monkeypatch.setattr(config, "POSITION_VERIFY_INTERVAL", 3600)
+    return main
+
+
+def run_cycle(main):
+    return asyncio.run(main.run_protocol_cycle())
+
+
+class TestPosition:
+    """
+    Event-sourced position model.
+    """
+
+    def test_model_matches_chain_after_cycle(self, bot, stub_chain, stub_server):
+        import position
+        from web3_utils import ACCOUNT, w3
+
+        stub_chain.fund(ACCOUNT.address, honey=5 * PRECISION, porridge=10 * PRECISION, staked=100 * PRECISION)
+        assert run_cycle(bot) is True
+
+        model = position.get_position(ACCOUNT.address)
+        assert model.applied > 0
+        tracked = dict(model.values)
+        model.sync(w3)
+        assert model.drift_count == 0
+        assert model.values == tracked
+        assert tracked["staked_locks"] > 100 * PRECISION
+
+    def test_fewer_reads_than_without_model(self, bot, stub_server, monkeypatch):
+        import config
+        import position
+        from web3_utils import ACCOUNT
+
+        def eth_calls_per_cycle():
+            chain = stub_server.chain = rpc_stub.StubChain(clock=lambda: 1_700_000_000)
+            position.reset_positions()
+            chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+            chain.claimable[ACCOUNT.address] = PRECISION
+            run_cycle(bot)  # the first cycle syncs the model
+            chain.claimable[ACCOUNT.address] = 10 * PRECISION
+            chain.method_counts.clear()
+            assert run_cycle(bot) is True
+            return chain.method_counts["eth_call"]
+
+        with_model = eth_calls_per_cycle()
+        monkeypatch.setattr(config, "POSITION_MODEL", False)
+        without_model = eth_calls_per_cycle()
+        assert with_model < without_model
+
+    def test_periodic_check_detects_drift(self, bot, stub_chain, monkeypatch):
+        import config
+        import position
+        from honey_logic import get_honey_balance
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, honey=PRECISION)
+        assert get_honey_balance() == PRECISION
+
+        stub_chain.fund(ACCOUNT.address, honey=PRECISION)  # transfer the receipts never showed
+        assert get_honey_balance() == PRECISION
+
+        monkeypatch.setattr(config, "POSITION_VERIFY_INTERVAL", 0)
+        position.get_position(ACCOUNT.address).verify_interval = 0
+        assert get_honey_balance() == 2 * PRECISION
+        assert position.get_position(ACCOUNT.address).drift_count == 1
+
+    def test_unexplained_debit_forces_resync(self, bot):
+        import position
+        from web3_utils import ACCOUNT, w3
+
+        model = position.Position(ACCOUNT.address, verify_interval=3600)
+        model.sync(w3)
+        log = {
+            "address": rpc_stub.HONEY_ADDRESS,
+            "topics": [position.get_tables()["honey"].events["Transfer"].topic,
+                       bytes(12) + bytes.fromhex(ACCOUNT.address[2:]), bytes(32)],
+            "data": (PRECISION).to_bytes(32, "big"),
+        }
+        model.apply_receipt({"logs": [log]})
+        assert model.needs_sync() and model.get("honey_balance") is None
+
+    def test_failed_transaction_forces_resync(self, bot, stub_chain):
+        """A reverted stake does not leave the next cycle planning from the stale balance"""
+        import position
+        from locks_logic import get_locks_balance
+        from porridge_logic import stake_all_locks
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, locks=5 * PRECISION)
+        assert get_locks_balance() == 5 * PRECISION
+        # Staked behind the model's back, e.g. by a transaction whose receipt never arrived
+        stub_chain.balances[rpc_stub.LOCKS_ADDRESS][ACCOUNT.address] = 0
+        stub_chain.staked[ACCOUNT.address] += 5 * PRECISION
+
+        with pytest.raises(Exception, match="reverted"):
+            asyncio.run(stake_all_locks())
+        assert position.get_position(ACCOUNT.address).needs_sync()
+        assert get_locks_balance() == 0
+        assert asyncio.run(stake_all_locks()) is False
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,68 @@
+import pytest
+
+from tests.conftest import bot_module
+
+rate_limiter = bot_module("rate_limiter")
+
+
+class TestPriorityRateLimiter:
+    """
+    Token bucket behaviour of the priority-aware RPC rate limiter.
+    """
+
+    def test_broadcast_never_throttled(self, rate_limiter):
+        """Broadcasts pass even when the bucket is empty"""
+        limiter = rate_limiter.PriorityRateLimiter(rate=1, burst=2)
+        for _ in range(5):
+            assert limiter.try_acquire(rate_limiter.Priority.BROADCAST) == 0
+        assert limiter.tokens < 0
+
+    def test_priority_override(self, rate_limiter):
+        """Reads take the bound class, including BROADCAST; broadcasts and receipts keep theirs"""
+        Priority = rate_limiter.Priority
+        assert rate_limiter.priority_for("eth_call") == Priority.READ
+        for priority in Priority:
+            with rate_limiter.rpc_priority(priority):
+                assert rate_limiter.priority_for("eth_call") == priority
+                assert rate_limiter.priority_for("eth_getTransactionReceipt") == Priority.RECEIPT
+        with rate_limiter.rpc_priority(Priority.BULK):
+            assert rate_limiter.priority_for("eth_sendRawTransaction") == Priority.BROADCAST
+
+    def test_lower_priorities_leave_reserve(self, rate_limiter):
+        """Bulk work stops at its reserve while reads can still go ahead"""
+        limiter = rate_limiter.PriorityRateLimiter(rate=1, burst=10)
+        bulk = 0
+        while limiter.try_acquire(rate_limiter.Priority.BULK) == 0:
+            bulk += 1
+        assert bulk == 5
+        assert limiter.try_acquire(rate_limiter.Priority.READ) == 0
+        assert limiter.try_acquire(rate_limiter.Priority.RECEIPT) == 0
+
+    def test_throttled_backs_off_lower_priorities(self, rate_limiter):
+        """A 429 pauses reads and bulk work but not broadcasts"""
+        limiter = rate_limiter.PriorityRateLimiter(rate=100, burst=100)
+        limiter.on_throttled()
+        assert limiter.penalty == 2.0
+        assert limiter.try_acquire(rate_limiter.Priority.BULK) > 0
+        assert limiter.try_acquire(rate_limiter.Priority.READ) > 0
+        assert limiter.try_acquire(rate_limiter.Priority.BROADCAST) == 0
+
+    def test_penalty_decays_on_success(self, rate_limiter):
+        limiter = rate_limiter.PriorityRateLimiter(rate=100)
+        limiter.on_throttled()
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.penalty == 1.0
+
+    @pytest.mark.parametrize("response, expected", [
+        ({"jsonrpc": "2.0", "id": 1, "result": "0x1"}, False),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "limit exceeded"}}, True),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "Rate limit reached"}}, True),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}}, False),
+    ])
+    def test_is_rate_limit_response(self, rate_limiter, response, expected):
+        assert rate_limiter.is_rate_limit_response(response) is expected
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
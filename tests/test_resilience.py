@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+resilience = bot_module("resilience")
+
+
+@pytest.fixture
+def breaker(resilience, stub_server):
+    """The circuit breaker of the stub endpoint, closed again after the test"""
+    breaker = resilience.get_breaker(stub_server.url)
+    yield breaker
+    breaker.record_success()
+
+
+class TestCircuitBreaker:
+    """
+    State transitions of the per-endpoint circuit breaker.
+    """
+
+    def test_opens_after_threshold(self, resilience):
+        breaker = resilience.CircuitBreaker(threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_trial_through(self, resilience):
+        breaker = resilience.CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == "half-open"
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_trial_reopens(self, resilience):
+        breaker = resilience.CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.opened_at is not None
+        assert breaker.allow()
+
+    @pytest.mark.parametrize("response, expected", [
+        ({"jsonrpc": "2.0", "id": 1, "result": "0x1"}, False),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "limit exceeded"}}, True),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "header not found"}}, True),
+        ({"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}}, False),
+    ])
+    def test_is_transient_response(self, resilience, response, expected):
+        assert resilience.is_transient_response(response) is expected
+
+
+class TestRetriesLocal:
+    """
+    Retries against the local JSON-RPC stand-in with injected failures.
+    """
+
+    def test_cycle_survives_transient_errors(self, stub_chain, breaker):
+        """A full cycle completes while a fifth of all requests fail"""
+        import main
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        stub_chain.error_rate = 0.2
+
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert stub_chain.staked[ACCOUNT.address] == 110 * PRECISION
+        assert breaker.state == "closed"
+
+    def test_open_circuit_fails_fast(self, resilience, stub_chain, breaker):
+        """While the circuit is open no request reaches the endpoint"""
+        from web3_utils import w3
+
+        breaker.opened_at = float("inf")
+        requests_before = stub_chain.request_count
+        with pytest.raises(resilience.CircuitOpenError):
+            w3.eth.block_number
+        assert stub_chain.request_count == requests_before
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
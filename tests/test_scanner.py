@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import PRECISION
+
+
+@pytest.fixture
+def fleet(stub_chain):
+    """300 wallets of which every 30th has a borrow limit above the threshold"""
+    from loadtest import synthetic_accounts
+    accounts = synthetic_accounts(300)
+    for i, account in enumerate(accounts):
+        if i % 30 == 0:
+            stub_chain.fund(account.address, porridge=PRECISION, staked=100 * PRECISION)
+        else:
+            stub_chain.fund(account.address, staked=PRECISION // 2)
+    return accounts
+
+
+class TestScanner:
+    """
+    Fleet-wide multicall threshold scanner.
+    """
+
+    def test_scan_reads_fleet_in_chunks(self, fleet, stub_chain):
+        from scanner import FleetScanner
+        from web3_utils import w3
+
+        scanner = FleetScanner(w3, fleet, threshold=PRECISION, chunk_wallets=100)
+        stub_chain.method_counts.clear()
+        due = scanner.due()
+        assert stub_chain.method_counts["eth_call"] == 3
+        assert due == fleet[::30]
+        reading = scanner.readings[fleet[0].address]
+        assert reading["borrow_limit"] == 100 * PRECISION and reading["prg_balance"] == PRECISION
+
+        scanner.rest(fleet[0].address, 60, now=0)
+        assert fleet[0] not in scanner.due(now=59) and fleet[0] in scanner.due(now=60)
+
+    def test_only_wallets_with_work_run(self, fleet, stub_chain, monkeypatch):
+        import config
+        import main
+        from scanner import FleetScanner
+        from web3_utils import use_account, w3
+
+        monkeypatch.setattr(config, "BORROW_THRESHOLD", PRECISION)
+        scanner = FleetScanner(w3, fleet, chunk_wallets=100)
+        ran = []
+
+        async def wallet_cycle(account):
+            with use_account(account):
+                ran.append(await main.run_wallet_cycle(1))
+
+        stub_chain.method_counts.clear()
+        assert asyncio.run(main.fleet_step(scanner, wallet_cycle)) == 10
+        assert ran == [True] * 10
+        assert [a.address for a in fleet if stub_chain.borrowed[a.address]] == [a.address for a in fleet[::30]]
+        # 3 scan calls plus the reads of the 10 busy cycles, not one borrow limit read per wallet
+        assert stub_chain.method_counts["eth_call"] < 3 + 10 * 10 < len(fleet)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import rpc_stub
+from tests.conftest import PRECISION, bot_module
+
+simulation = bot_module("simulation")
+
+
+@pytest.fixture
+def w3(stub_server):
+    from rpc import make_provider, make_web3
+    return make_web3(make_provider(stub_server.url))
+
+
+def wallet_state(w3, wallet, **overrides):
+    from planner import wallet_state
+    from status import snapshot
+    status = snapshot(w3, [wallet])
+    return {**wallet_state(status, wallet), **overrides}, status["block"]
+
+
+def paused_buy(ctx, token, amount, max_amount):
+    raise rpc_stub.Revert("trading paused")
+
+
+class TestSimulation:
+    """
+    Pre-broadcast simulation of the cycle's transactions.
+    """
+
+    def test_cycle_simulates_in_one_call_without_changing_state(self, simulation, w3, stub_chain):
+        from planner import Settings
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        state, block = wallet_state(w3, ACCOUNT.address)
+        calls = stub_chain.method_counts["eth_call"]
+
+        cycle = simulation.simulate_cycle(w3, ACCOUNT.address, state, Settings(PRECISION, False, True, False), block)
+        assert cycle.skipped == {}
+        assert [a.function for a in cycle.actions][-1] == "stake"
+        assert stub_chain.method_counts["eth_call"] - calls == 1
+        # Every step saw the previous ones: the stake spends the LOCKS the stir and buy minted
+        assert stub_chain.staked[ACCOUNT.address] == 100 * PRECISION
+        assert stub_chain.borrowed[ACCOUNT.address] == 0
+
+    def test_reverting_swap_is_dropped_and_cycle_replanned(self, simulation, w3, stub_chain):
+        from planner import Settings
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        # A stale market price: the buy's maximum HONEY no longer covers the cost
+        state, block = wallet_state(w3, ACCOUNT.address, market_price=PRECISION)
+
+        cycle = simulation.simulate_cycle(w3, ACCOUNT.address, state, Settings(PRECISION, False, True, False), block)
+        assert cycle.skipped == {"swap": "slippage exceeded"}
+        assert "buy" not in [a.function for a in cycle.actions]
+        assert cycle.actions[-1].args == (10 * PRECISION,)  # only the stirred LOCKS are staked
+        assert all(reason is None for reason in simulation.simulate(w3, ACCOUNT.address, cycle.actions, block))
+
+    def test_reverting_borrow_drops_the_cycle(self, simulation, w3, stub_chain):
+        from planner import Settings
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        state, block = wallet_state(w3, ACCOUNT.address, borrow_limit=200 * PRECISION)
+
+        cycle = simulation.simulate_cycle(w3, ACCOUNT.address, state, Settings(PRECISION, False, True, False), block)
+        assert cycle.actions == [] and cycle.skipped == {"borrow": "insufficient borrow limit"}
+
+    def test_cycle_skips_step_that_would_revert(self, simulation, stub_chain, monkeypatch):
+        import config
+        import main
+        from web3_utils import ACCOUNT
+
+        monkeypatch.setattr(config, "SIMULATE_CYCLE", True)
+        monkeypatch.setattr(config, "SWAP_LEFTOVER_HONEY", True)
+        monkeypatch.setattr(stub_chain, "_locks_buy", paused_buy)
+        stub_chain.fund(ACCOUNT.address, porridge=PRECISION, staked=100 * PRECISION)
+
+        assert asyncio.run(main.run_protocol_cycle()) is True
+        assert all(receipt["status"] == "0x1" for receipt in stub_chain.receipts.values())
+        assert stub_chain.staked[ACCOUNT.address] == 101 * PRECISION
+        assert any("Swap skipped" in message and "trading paused" in message
+                   for message in stub_chain.webhook_messages if message)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
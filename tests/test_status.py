@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import PRECISION
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+WALLET_A = "0x" + "a1" * 20
+WALLET_B = "0x" + "b2" * 20
+
+
+@pytest.fixture
+def status(stub_chain):
+    """Import after the stub configured the environment (config is read on import)"""
+    import status
+    return status
+
+
+@pytest.fixture
+def w3(status):
+    import config
+    from rpc import make_provider, make_web3
+    return make_web3(make_provider(config.RPC_URL))
+
+
+class TestStatus:
+    """
+    Read-only status snapshot.
+    """
+
+    def test_snapshot_reads_every_wallet_in_one_call(self, status, w3, stub_chain):
+        from web3 import Web3
+
+        stub_chain.fund(WALLET_A, honey=3 * PRECISION, staked=100 * PRECISION, borrowed=10 * PRECISION)
+        stub_chain.fund(WALLET_B, locks=2 * PRECISION)
+        stub_chain.method_counts.clear()
+
+        snap = status.snapshot(w3, [WALLET_A, WALLET_B])
+        assert stub_chain.method_counts["eth_call"] == 1
+
+        a = snap["wallets"][Web3.to_checksum_address(WALLET_A)]
+        assert a["honey_balance"] == 3 * PRECISION
+        assert a["staked_locks"] == 100 * PRECISION
+        assert a["borrowed_honey"] == 10 * PRECISION
+        assert a["borrow_limit"] == stub_chain._borrow_limit(Web3.to_checksum_address(WALLET_A))
+        assert a["native_balance"] == 1000 * PRECISION
+        assert a["vesting"] == 0
+        assert snap["wallets"][Web3.to_checksum_address(WALLET_B)]["locks_balance"] == 2 * PRECISION
+        assert snap["floor_price"] == stub_chain.floor_price
+        assert snap["market_price"] == stub_chain.market_price
+        assert "Borrowed HONEY:   10.0000" in status.format_status(snap)
+
+    def test_cli_skips_transaction_path(self, stub_server, stub_chain):
+        """The CLI runs without PRIVATE_KEY and never imports the signing/notification modules"""
+        stub_chain.fund(WALLET_A, honey=PRECISION)
+        env = {k: v for k, v in os.environ.items() if k not in ("PRIVATE_KEY", "WEBHOOK_URL")}
+        code = ("import sys, runpy; sys.argv = ['status.py', '--json', %r]; "
+                "runpy.run_path('status.py', run_name='__main__'); "
+                "print(sorted({'web3_utils', 'notifications', 'main'} & set(sys.modules)))" % WALLET_A)
+        result = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+
+        output, imported = result.stdout.rsplit("\n", 2)[:2]
+        assert imported == "[]"
+        snap = json.loads(output)
+        assert next(iter(snap["wallets"].values()))["honey_balance"] == PRECISION
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import time
+
+import pytest
+from websockets.asyncio.server import serve
+
+from tests.conftest import bot_module
+
+subscriptions = bot_module("subscriptions")
+
+CONTRACT = "0x" + "ab" * 20
+WALLET = "0x" + "12" * 20
+OWN_TX = b"\x01" * 32
+OTHER_TX = b"\x02" * 32
+
+
+def log_of(tx_hash):
+    """Minimal log entry of a transaction as handed to the stream"""
+    return {"transactionHash": tx_hash, "address": CONTRACT, "topics": []}
+
+
+def subscribed_stream(subscriptions):
+    """Stream with the subscription ids set as if _subscribe had run"""
+    stream = subscriptions.ChainEventStream("ws://unused", [CONTRACT], [WALLET])
+    stream._heads_id = "0x1"
+    stream._logs_ids = {"0x2", "0x3"}
+    stream.connected = True
+    return stream
+
+
+class FakeNode:
+    """
+    WebSocket node answering eth_subscribe and pushing one block header per
+    connection. The first connection is dropped right after the header.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.connected_at = []
+        self.server = None
+
+    async def handler(self, websocket):
+        session = len(self.connected_at)
+        self.connected_at.append(time.monotonic())
+        async for raw in websocket:
+            request = json.loads(raw)
+            self.requests.append(request)
+            count = sum(1 for r in self.requests if r["method"] == "eth_subscribe")
+            await websocket.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": hex(count)}))
+            if count % 3 == 0:
+                await websocket.send(json.dumps({
+                    "jsonrpc": "2.0",
+                    "method": "eth_subscription",
+                    "params": {"subscription": hex(count - 2), "result": {"number": hex(100 + session)}},
+                }))
+                if session == 0:
+                    await asyncio.sleep(0.1)
+                    await websocket.close()
+
+    async def __aenter__(self):
+        self.server = await serve(self.handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self):
+        return "ws://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+
+
+class TestSubscriptions:
+    """
+    Pushed block headers and logs driving receipt waits and cycle starts.
+    """
+
+    def test_address_topic_and_provider_choice(self, subscriptions):
+        assert subscriptions.address_topic(WALLET) == "0x" + "0" * 24 + "12" * 20
+        with pytest.raises(ValueError):
+            subscriptions.make_async_provider("http://localhost:8545")
+        assert type(subscriptions.make_async_provider("ws://localhost:8546")).__name__ == "WebSocketProvider"
+        assert type(subscriptions.make_async_provider("/tmp/geth.ipc")).__name__ == "AsyncIPCProvider"
+
+    def test_dispatch_routes_heads_and_logs(self, subscriptions):
+        async def scenario():
+            stream = subscribed_stream(subscriptions)
+            waiter = asyncio.ensure_future(stream.wait_for_block(5))
+            await asyncio.sleep(0)
+            stream._dispatch({"subscription": "0x1", "result": {"number": 42}})
+            assert await waiter is True
+            assert stream.latest_block == 42
+
+            stream._dispatch({"subscription": "0x9", "result": log_of(OTHER_TX)})  # not one of ours
+            assert not stream._activity_event.is_set()
+            stream._dispatch({"subscription": "0x3", "result": log_of(OTHER_TX)})
+            assert stream._activity_event.is_set()
+            assert await stream.wait_for_block(0.01) is False
+
+        asyncio.run(scenario())
+
+    def test_own_logs_wake_the_receipt_wait_only(self, subscriptions):
+        async def scenario():
+            stream = subscribed_stream(subscriptions)
+            start = time.monotonic()
+            waiter = asyncio.ensure_future(stream.wait_for_tx(OWN_TX, 5))
+            await asyncio.sleep(0)
+            stream._on_log(log_of(OWN_TX))
+            await waiter
+            assert time.monotonic() - start < 1
+
+            # A second log of the same transaction after the waiter was dropped is still ours
+            stream.forget_tx(OWN_TX)
+            stream._on_log(log_of(OWN_TX))
+            assert not stream._activity_event.is_set()
+            stream._on_log(log_of(OTHER_TX))
+            assert stream._activity_event.is_set()
+
+        asyncio.run(scenario())
+
+    def test_receipt_wait_ends_with_the_next_block(self, subscriptions):
+        async def scenario():
+            stream = subscribed_stream(subscriptions)
+            waiter = asyncio.ensure_future(stream.wait_for_tx(OWN_TX, 5))
+            await asyncio.sleep(0)
+            stream._dispatch({"subscription": "0x1", "result": {"number": 7}})
+            await asyncio.wait_for(waiter, 1)
+            await stream.wait_for_tx(OWN_TX, 0.01)  # times out quietly
+
+        asyncio.run(scenario())
+
+    def test_external_activity_starts_cycle_early(self, subscriptions):
+        async def scenario():
+            stream = subscribed_stream(subscriptions)
+            stream._own_tx_hashes.add(OWN_TX)
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, stream._on_log, log_of(OWN_TX))
+            loop.call_later(0.1, stream._on_log, log_of(OTHER_TX))
+            start = time.monotonic()
+            await stream.wait_for_cycle(5)
+            assert 0.1 <= time.monotonic() - start < 1
+            assert not stream._own_tx_hashes
+
+            # Without activity the cycle waits out the interval, then the next block
+            loop.call_later(0.3, stream._dispatch, {"subscription": "0x1", "result": {"number": 8}})
+            start = time.monotonic()
+            await stream.wait_for_cycle(0.2)
+            assert 0.25 <= time.monotonic() - start < 0.4
+            assert stream.latest_block == 8
+
+            stream.connected = False  # on polling only the interval is waited
+            start = time.monotonic()
+            await stream.wait_for_cycle(0.1)
+            assert time.monotonic() - start < 0.3
+
+        asyncio.run(scenario())
+
+    def test_reconnects_with_backoff(self, subscriptions):
+        async def scenario():
+            async with FakeNode() as node:
+                stream = subscriptions.ChainEventStream(node.url, [CONTRACT], [WALLET])
+                stream.start()
+                assert await stream.wait_for_block(5)
+                assert stream.latest_block == 100
+
+                # The dropped connection wakes waiters, then the stream resubscribes after its backoff
+                assert await stream.wait_for_block(5)
+                assert not stream.connected
+                assert await stream.wait_for_block(5)
+                assert stream.latest_block == 101 and stream.connected
+                await stream.stop()
+                assert not stream.connected
+
+            assert len(node.connected_at) == 2
+            assert node.connected_at[1] - node.connected_at[0] >= 1
+            params = [r["params"] for r in node.requests]
+            assert params[:3] == params[3:]
+            assert params[0] == ["newHeads"]
+            topic = subscriptions.address_topic(WALLET)
+            assert params[1] == ["logs", {"address": [CONTRACT], "topics": [None, [topic]]}]
+            assert params[2] == ["logs", {"address": [CONTRACT], "topics": [None, None, [topic]]}]
+
+        asyncio.run(scenario())
+
+    def test_start_stream_registers_active_stream(self, subscriptions, monkeypatch):
+        monkeypatch.setattr(subscriptions, "_active_stream", None)
+
+        async def scenario():
+            async with FakeNode() as node:
+                stream = await subscriptions.start_stream(node.url, [CONTRACT], [WALLET])
+                assert subscriptions.get_stream() is stream
+                assert await stream.wait_for_block(5)
+                await stream.stop()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,96 @@
+import asyncio
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import PRECISION, bot_module
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+timeseries = bot_module("timeseries")
+
+
+def values(price):
+    return {"floor_price": price * PRECISION, "market_price": 2 * price * PRECISION}
+
+
+class TestTimeSeries:
+    """
+    Memory-mapped ring of per-block samples.
+    """
+
+    def test_ring_stays_bounded(self, timeseries, tmp_path):
+        path = str(tmp_path / "wallet.ts")
+        series = timeseries.TimeSeries(path, capacity=4)
+        for block in range(1, 11):
+            series.append(block, 1_700_000_000 + block, values(block))
+
+        samples = series.read()
+        assert [s.block for s in samples] == [7, 8, 9, 10]
+        assert samples[-1].floor_price == 10.0 and samples[-1].market_price == 20.0
+        assert math.isnan(samples[-1].borrow_limit)
+        assert [s.block for s in series.read(last=2)] == [9, 10]
+        assert os.path.getsize(path) == timeseries.HEADER_SIZE + 4 * timeseries.RECORD.size
+        series.close()
+
+    def test_same_block_replaces_last_sample(self, timeseries, tmp_path):
+        series = timeseries.TimeSeries(str(tmp_path / "wallet.ts"), capacity=4)
+        series.append(5, 0, values(1))
+        series.append(5, 0, values(3))
+        assert [(s.block, s.floor_price) for s in series.read()] == [(5, 3.0)]
+        assert series.count == 1
+
+    def test_reader_in_other_process_sees_writes(self, timeseries, tmp_path):
+        path = str(tmp_path / "wallet.ts")
+        series = timeseries.TimeSeries(path, capacity=100)
+        reader = ("import sys, timeseries; s = timeseries.TimeSeries(sys.argv[1], readonly=True); "
+                  "print(','.join(str(x.block) for x in s.read()))")
+
+        def read_other_process():
+            out = subprocess.run([sys.executable, "-c", reader, path], cwd=SRC_DIR,
+                                 capture_output=True, text=True, check=True).stdout
+            return out.strip()
+
+        series.append(1, 0, values(1))
+        assert read_other_process() == "1"
+        series.append(2, 0, values(1))
+        assert read_other_process() == "1,2"
+
+    def test_rejects_foreign_file(self, timeseries, tmp_path):
+        path = tmp_path / "other.ts"
+        path.write_bytes(b"\0" * 128)
+        with pytest.raises(ValueError):
+            timeseries.TimeSeries(str(path), readonly=True)
+
+    def test_every_block_is_sampled(self, stub_server, stub_chain, tmp_path, monkeypatch):
+        """All four fields are recorded on each block, whether or not a cycle ran"""
+        import clock
+        import config
+        import main
+        import rpc_stub
+        import timeseries
+        from deployments import default_deployment
+        from web3_utils import ACCOUNT
+
+        virtual = clock.VirtualClock()
+        chain = stub_server.chain = rpc_stub.StubChain(block_time=2, clock=virtual.time)
+        chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        monkeypatch.setattr(config, "TIMESERIES_DIR", str(tmp_path))
+        monkeypatch.setattr(config, "TIMESERIES_POLL_INTERVAL", 1)
+
+        async def sample(seconds):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(main.sample_loop(default_deployment(), [ACCOUNT]), seconds)
+
+        clock.run_virtual(sample(9.5), virtual)
+        samples = timeseries.TimeSeries(str(tmp_path / f"{ACCOUNT.address}.ts"), readonly=True).read()
+        assert [s.block for s in samples] == [0, 1, 2, 3, 4]
+        assert all(s.floor_price == chain.floor_price / PRECISION and s.market_price == chain.market_price / PRECISION
+                   for s in samples)
+        assert samples[-1].borrow_limit > 0 and not math.isnan(samples[-1].claimable_prg)
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+from tests.conftest import PRECISION
+
+
+@pytest.fixture
+def traced_bot(stub_chain, tmp_path):
+    """Bot with tracing exported to a temporary OTLP/JSON file"""
+    import main
+    import tracing
+
+    path = tmp_path / "traces.jsonl"
+    tracing.setup_tracing(str(path))
+    yield main, tracing, path
+    tracing.setup_tracing(None)
+
+
+def read_spans(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return spans
+
+
+def attributes(span):
+    return {a["key"]: next(iter(a["value"].values())) for a in span["attributes"]}
+
+
+class TestTracing:
+    """
+    Cycle traces exported as OTLP/JSON.
+    """
+
+    def test_cycle_trace_hierarchy(self, traced_bot, stub_chain):
+        main, tracing, path = traced_bot
+        from web3_utils import ACCOUNT
+
+        stub_chain.fund(ACCOUNT.address, porridge=10 * PRECISION, staked=100 * PRECISION)
+        with tracing.span("cycle", cycle=1):
+            assert asyncio.run(main.run_protocol_cycle()) is True
+        tracing.setup_tracing(None)  # flush
+
+        spans = read_spans(path)
+        by_id = {s["spanId"]: s for s in spans}
+        assert len({s["traceId"] for s in spans}) == 1
+
+        def parent_name(span):
+            return by_id[span["parentSpanId"]]["name"]
+
+        names = {s["name"] for s in spans}
+        assert {"cycle", "borrow_if_possible", "claim_porridge", "stir_porridge", "stake_all_locks",
+                "send_tx", "sign", "broadcast", "receipt_wait", "eth_call"} <= names
+
+        stir_tx = next(s for s in spans if s["name"] == "send_tx" and attributes(s)["function"] == "stir")
+        assert parent_name(stir_tx) == "stir_porridge"
+        sign = next(s for s in spans if s["name"] == "sign" and s["parentSpanId"] == stir_tx["spanId"])
+        assert {"nonce", "gas", "gas_price"} <= set(attributes(sign))
+        receipt = next(s for s in spans if s["name"] == "receipt_wait" and s["parentSpanId"] == stir_tx["spanId"])
+        assert int(attributes(receipt)["block"]) > 0
+
+        broadcast = next(s for s in spans if s["name"] == "broadcast")
+        assert any(s["name"] == "eth_sendRawTransaction" and s["parentSpanId"] == broadcast["spanId"] for s in spans)
+        assert all(int(s["endTimeUnixNano"]) >= int(s["startTimeUnixNano"]) for s in spans)
+
+        [(root, totals)] = tracing.slowest_traces(path)
+        assert root["name"] == "cycle"
+        assert "send_tx" in totals and "eth_call" in totals
+
+    def test_failed_span_records_exception(self, traced_bot):
+        _, tracing, path = traced_bot
+        with pytest.raises(ValueError):
+            with tracing.span("step"):
+                raise ValueError("boom")
+        tracing.setup_tracing(None)
+
+        [span] = read_spans(path)
+        assert span["status"]["code"] == tracing.STATUS_ERROR
+        assert span["events"][0]["name"] == "exception"
+
+    def test_disabled_tracing_is_noop(self, stub_server):
+        import tracing
+        with tracing.span("cycle") as span:
+            assert span is None
+            tracing.set_attributes(x=1)
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
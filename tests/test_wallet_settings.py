@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from tests.conftest import PRECISION
+
+WALLET = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+@pytest.fixture
+def wallet_settings(stub_server, monkeypatch):
+    import wallet_settings
+    monkeypatch.setattr(wallet_settings, "_watcher", None)
+    return wallet_settings
+
+
+class TestWalletSettings:
+    """
+    Per-wallet settings reloaded between cycles.
+    """
+
+    def test_file_overrides_apply_per_wallet(self, wallet_settings, tmp_path):
+        path = tmp_path / "settings.json"
+        path.write_text(json.dumps({
+            "*": {"cycle_interval": 300},
+            WALLET.lower(): {"borrow_threshold": "5", "swap_leftover_honey": "true", "cycle_interval": 60},
+        }))
+        watcher = wallet_settings.SettingsWatcher(wallet_settings.FileSettingsStore(str(path)))
+        assert watcher.refresh() == ["*", WALLET]
+        assert watcher.refresh() == []  # unchanged file
+
+        settings = watcher.settings_for(WALLET)
+        assert (settings.borrow_threshold, settings.swap_leftover_honey, settings.cycle_interval) == (5, True, 60)
+        other = watcher.settings_for("0x0000000000000000000000000000000000000001")
+        assert other._replace(cycle_interval=0) == wallet_settings.defaults()._replace(cycle_interval=0)
+        assert other.cycle_interval == 300
+
+    def test_invalid_store_keeps_previous_settings(self, wallet_settings, tmp_path):
+        store = wallet_settings.FileSettingsStore(str(tmp_path / "settings.json"))
+        watcher = wallet_settings.SettingsWatcher(store)
+        store.set(WALLET, "borrow_threshold", 5)
+        assert watcher.refresh() == [WALLET]
+
+        (tmp_path / "settings.json").write_text(json.dumps({WALLET: {"cycle_interval": 0, "borrow_threshold": 7}}))
+        assert watcher.refresh() == []
+        assert watcher.settings_for(WALLET).borrow_threshold == 5
+        with pytest.raises(ValueError, match="unknown setting"):
+            wallet_settings.parse_value("gas_limit", 1)
+
+    def test_sqlite_store_sees_other_writers(self, wallet_settings, tmp_path):
+        path = str(tmp_path / "settings.db")
+        watcher = wallet_settings.SettingsWatcher(wallet_settings.SqliteSettingsStore(path))
+        assert watcher.refresh() == []
+        wallet_settings.SqliteSettingsStore(path).set(WALLET, "allow_wallet_honey", True)
+        assert watcher.refresh() == [WALLET]
+        assert watcher.settings_for(WALLET).allow_wallet_honey is True
+        wallet_settings.SqliteSettingsStore(path).set(WALLET, "allow_wallet_honey", None)
+        assert watcher.refresh() == [WALLET]
+        assert watcher.settings_for(WALLET) == wallet_settings.defaults()
+
+    def test_change_applies_from_the_next_cycle(self, wallet_settings, stub_chain, tmp_path):
+        import main
+        from web3_utils import ACCOUNT
+
+        store = wallet_settings.FileSettingsStore(str(tmp_path / "settings.json"))
+        wallet_settings.set_store(store)
+        stub_chain.fund(ACCOUNT.address, staked=100 * PRECISION)
+        store.set(ACCOUNT.address, "borrow_threshold", 1000 * PRECISION)
+        assert asyncio.run(main.run_wallet_cycle(1)) is False
+        assert not stub_chain.receipts
+
+        store.set(ACCOUNT.address, "borrow_threshold", PRECISION)
+        assert asyncio.run(main.run_wallet_cycle(2)) is True
+        assert stub_chain.borrowed[ACCOUNT.address] > 0
+        assert wallet_settings.current() == wallet_settings.defaults()  # only inside the cycle
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])